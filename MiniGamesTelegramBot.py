@@ -1,1201 +1,836 @@
-import os
-import asyncio
-import sqlite3
-import logging
-import random
-import time
-from datetime import datetime
-from aiogram import Bot, Dispatcher, types, F
-from aiogram.filters import Command
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from aiogram.utils.markdown import hbold
-
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-# Получаем токен из переменных окружения
-BOT_TOKEN = os.getenv('BOT_TOKEN')
-if not BOT_TOKEN:
-    logger.error("❌ BOT_TOKEN not found!")
-    exit(1)
-
-bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher()
-
-# Инициализация БД
-def init_db():
-    conn = sqlite3.connect('games.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            user_id INTEGER,
-            chat_id INTEGER,
-            username TEXT,
-            wins INTEGER DEFAULT 0,
-            losses INTEGER DEFAULT 0,
-            points INTEGER DEFAULT 0,
-            PRIMARY KEY (user_id, chat_id)
-        )
-    ''')
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS game_stats (
-            user_id INTEGER,
-            chat_id INTEGER,
-            game_type TEXT,
-            wins INTEGER DEFAULT 0,
-            losses INTEGER DEFAULT 0,
-            PRIMARY KEY (user_id, chat_id, game_type)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-init_db()
-
-# Менеджер активных игр
-class GameManager:
-    def __init__(self):
-        self.active_games = {}
-    
-    def create_game(self, game_type, chat_id, player1_id, player2_id, player1_name, player2_name):
-        game_id = f"{game_type}_{chat_id}_{player1_id}_{player2_id}_{int(time.time())}"
-        
-        if game_type == "russian_roulette":
-            self.active_games[game_id] = {
-                'type': game_type,
-                'chat_id': chat_id,
-                'players': {
-                    player1_id: {'name': player1_name, 'alive': True, 'turn': True},
-                    player2_id: {'name': player2_name, 'alive': True, 'turn': False}
-                },
-                'revolver': [False] * 6,
-                'current_chamber': 0,
-                'created_at': datetime.now()
-            }
-            # Заряжаем 1 патрон в случайную камору
-            bullet_chamber = random.randint(0, 5)
-            self.active_games[game_id]['revolver'][bullet_chamber] = True
-            
-        elif game_type == "dice_battle":
-            self.active_games[game_id] = {
-                'type': game_type,
-                'chat_id': chat_id,
-                'players': {
-                    player1_id: {'name': player1_name, 'score': 0, 'rolls_left': 3},
-                    player2_id: {'name': player2_name, 'score': 0, 'rolls_left': 3}
-                },
-                'current_player': player1_id,
-                'created_at': datetime.now()
-            }
-            
-        elif game_type == "number_guess":
-            target_number = random.randint(1, 100)
-            self.active_games[game_id] = {
-                'type': game_type,
-                'chat_id': chat_id,
-                'players': {
-                    player1_id: {'name': player1_name, 'attempts': 0},
-                    player2_id: {'name': player2_name, 'attempts': 0}
-                },
-                'target_number': target_number,
-                'current_player': player1_id,
-                'created_at': datetime.now()
-            }
-            
-        elif game_type == "tic_tac_toe":
-            self.active_games[game_id] = {
-                'type': game_type,
-                'chat_id': chat_id,
-                'players': {
-                    player1_id: {'name': player1_name, 'symbol': '❌'},
-                    player2_id: {'name': player2_name, 'symbol': '⭕'}
-                },
-                'board': ['⬜'] * 9,
-                'current_player': player1_id,
-                'created_at': datetime.now()
-            }
-            
-        elif game_type == "quick_math":
-            num1, num2 = random.randint(1, 20), random.randint(1, 20)
-            operations = ['+', '-', '*']
-            operation = random.choice(operations)
-            
-            if operation == '+':
-                answer = num1 + num2
-            elif operation == '-':
-                answer = num1 - num2
-            else:
-                answer = num1 * num2
-                
-            self.active_games[game_id] = {
-                'type': game_type,
-                'chat_id': chat_id,
-                'players': {
-                    player1_id: {'name': player1_name, 'score': 0},
-                    player2_id: {'name': player2_name, 'score': 0}
-                },
-                'problem': f"{num1} {operation} {num2}",
-                'answer': answer,
-                'current_player': player1_id,
-                'created_at': datetime.now()
-            }
-            
-        elif game_type == "coin_flip":
-            self.active_games[game_id] = {
-                'type': game_type,
-                'chat_id': chat_id,
-                'players': {
-                    player1_id: {'name': player1_name, 'choice': None},
-                    player2_id: {'name': player2_name, 'choice': None}
-                },
-                'result': None,
-                'created_at': datetime.now()
-            }
-        
-        # Автоудаление игры через 10 минут
-        asyncio.create_task(self.remove_game_after_timeout(game_id, 600))
-        return game_id
-    
-    def get_game(self, game_id):
-        return self.active_games.get(game_id)
-    
-    def remove_game(self, game_id):
-        if game_id in self.active_games:
-            del self.active_games[game_id]
-    
-    async def remove_game_after_timeout(self, game_id, timeout):
-        await asyncio.sleep(timeout)
-        self.remove_game(game_id)
-
-game_manager = GameManager()
-
-# Менеджер пользователей
-class UserManager:
-    def __init__(self):
-        self.conn = sqlite3.connect('games.db', check_same_thread=False)
-    
-    def get_or_create_user(self, user_id, chat_id, username):
-        cursor = self.conn.cursor()
-        cursor.execute(
-            'SELECT * FROM users WHERE user_id = ? AND chat_id = ?',
-            (user_id, chat_id)
-        )
-        user = cursor.fetchone()
-        
-        if not user:
-            cursor.execute(
-                'INSERT INTO users (user_id, chat_id, username) VALUES (?, ?, ?)',
-                (user_id, chat_id, username)
-            )
-            self.conn.commit()
-        
-        return user
-    
-    def update_stats(self, user_id, chat_id, game_type, won=True):
-        cursor = self.conn.cursor()
-        
-        # Общая статистика
-        if won:
-            cursor.execute(
-                'UPDATE users SET wins = wins + 1, points = points + 1 WHERE user_id = ? AND chat_id = ?',
-                (user_id, chat_id)
-            )
-        else:
-            cursor.execute(
-                'UPDATE users SET losses = losses + 1, points = points - 1 WHERE user_id = ? AND chat_id = ?',
-                (user_id, chat_id)
-            )
-        
-        # Статистика по играм
-        if won:
-            cursor.execute(
-                '''INSERT OR REPLACE INTO game_stats 
-                (user_id, chat_id, game_type, wins, losses) 
-                VALUES (?, ?, ?, COALESCE((SELECT wins FROM game_stats WHERE user_id = ? AND chat_id = ? AND game_type = ?), 0) + 1,
-                COALESCE((SELECT losses FROM game_stats WHERE user_id = ? AND chat_id = ? AND game_type = ?), 0))''',
-                (user_id, chat_id, game_type, user_id, chat_id, game_type, user_id, chat_id, game_type)
-            )
-        else:
-            cursor.execute(
-                '''INSERT OR REPLACE INTO game_stats 
-                (user_id, chat_id, game_type, wins, losses) 
-                VALUES (?, ?, ?, COALESCE((SELECT wins FROM game_stats WHERE user_id = ? AND chat_id = ? AND game_type = ?), 0),
-                COALESCE((SELECT losses FROM game_stats WHERE user_id = ? AND chat_id = ? AND game_type = ?), 0) + 1)''',
-                (user_id, chat_id, game_type, user_id, chat_id, game_type, user_id, chat_id, game_type)
-            )
-        
-        self.conn.commit()
-    
-    def get_user_stats(self, user_id, chat_id):
-        cursor = self.conn.cursor()
-        cursor.execute(
-            'SELECT username, wins, losses, points FROM users WHERE user_id = ? AND chat_id = ?',
-            (user_id, chat_id)
-        )
-        return cursor.fetchone()
-    
-    def get_game_stats(self, user_id, chat_id, game_type):
-        cursor = self.conn.cursor()
-        cursor.execute(
-            'SELECT wins, losses FROM game_stats WHERE user_id = ? AND chat_id = ? AND game_type = ?',
-            (user_id, chat_id, game_type)
-        )
-        return cursor.fetchone()
-
-user_manager = UserManager()
-
-# Клавиатуры
-def get_main_keyboard():
-    keyboard = [
-        [InlineKeyboardButton(text="🎮 Выбрать игру", callback_data="select_game")],
-        [InlineKeyboardButton(text="📊 Моя статистика", callback_data="my_stats"),
-         InlineKeyboardButton(text="🏆 Топ игроков", callback_data="top_players")],
-        [InlineKeyboardButton(text="📖 Правила игр", callback_data="game_rules")]
-    ]
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
-
-def get_games_keyboard():
-    keyboard = [
-        [InlineKeyboardButton(text="🔫 Русская рулетка", callback_data="game_russian_roulette"),
-         InlineKeyboardButton(text="🎲 Битва кубиков", callback_data="game_dice_battle")],
-        [InlineKeyboardButton(text="🔢 Угадай число", callback_data="game_number_guess"),
-         InInlineKeyboardButton(text="⭕ Крестики-нолики", callback_data="game_tic_tac_toe")],
-        [InlineKeyboardButton(text="🧮 Быстрая математика", callback_data="game_quick_math"),
-         InlineKeyboardButton(text="🪙 Бросок монеты", callback_data="game_coin_flip")],
-        [InlineKeyboardButton(text="⬅️ Назад", callback_data="main_menu")]
-    ]
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
-
-def get_play_again_keyboard(game_type):
-    keyboard = [
-        [InlineKeyboardButton(text="🎮 Играть снова", callback_data=f"game_{game_type}"),
-         InlineKeyboardButton(text="📊 Статистика", callback_data="my_stats")],
-        [InlineKeyboardButton(text="🏠 Главное меню", callback_data="main_menu")]
-    ]
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
-
-# Команды
-@dp.message(Command("start"))
-async def start_command(message: types.Message):
-    user_manager.get_or_create_user(message.from_user.id, message.chat.id, 
-                                  message.from_user.username or message.from_user.first_name)
-    
-    text = (
-        "🎮 **GameBot - Мини-игры для двоих!**\n\n"
-        "💫 *6 увлекательных игр:*\n"
-        "• 🔫 Русская рулетка (рандом)\n"
-        "• 🎲 Битва кубиков (рандом)\n" 
-        "• 🔢 Угадай число (навык)\n"
-        "• ⭕ Крестики-нолики (стратегия)\n"
-        "• 🧮 Быстрая математика (реакция)\n"
-        "• 🪙 Бросок монеты (рандом)\n\n"
-        "🎯 **Как играть:**\n"
-        "1. Выбери игру\n"
-        "2. Ответь на сообщение соперника\n"
-        "3. Или упомяни @username\n\n"
-        "Начни игру кнопкой ниже! 👇"
-    )
-    
-    await message.answer(text, reply_markup=get_main_keyboard(), parse_mode='Markdown')
-
-@dp.message(Command("games"))
-async def games_command(message: types.Message):
-    await message.answer("🎮 **Выбери игру:**", reply_markup=get_games_keyboard())
-
-@dp.message(Command("play"))
-async def play_command(message: types.Message):
-    parts = message.text.split()
-    if len(parts) > 1:
-        game_type = parts[1]
-        if game_type in ["russian_roulette", "dice_battle", "number_guess", "tic_tac_toe", "quick_math", "coin_flip"]:
-            if message.reply_to_message:
-                target_user = message.reply_to_message.from_user
-                await start_specific_game(message, message.from_user, target_user, game_type)
-                return
-    
-    await message.answer("❌ Использование: Ответь на сообщение командой `/play тип_игры`", parse_mode='Markdown')
-
-# Обработчики callback
-@dp.callback_query(F.data == "main_menu")
-async def main_menu(callback: types.CallbackQuery):
-    await callback.message.edit_text("🎮 **GameBot - Главное меню**", reply_markup=get_main_keyboard())
-
-@dp.callback_query(F.data == "select_game")
-async def select_game(callback: types.CallbackQuery):
-    await callback.message.edit_text("🎮 **Выбери игру:**", reply_markup=get_games_keyboard())
-
-@dp.callback_query(F.data.startswith("game_"))
-async def game_selected(callback: types.CallbackQuery):
-    game_type = callback.data.replace("game_", "")
-    
-    if game_type in ["russian_roulette", "dice_battle", "number_guess", "tic_tac_toe", "quick_math", "coin_flip"]:
-        await callback.message.edit_text(
-            f"🎮 **{get_game_name(game_type)}**\n\n"
-            f"💡 {get_game_description(game_type)}\n\n"
-            f"**Чтобы начать:**\n"
-            f"Ответь на сообщение соперника или упомяни @username",
-            reply_markup=get_main_keyboard()
-        )
-    else:
-        await callback.answer("❌ Игра не найдена!")
-
-@dp.message(F.text.contains("@"))
-async def handle_mention(message: types.Message):
-    # Обработка упоминаний для вызова на игру
-    if "игра" in message.text.lower() or "play" in message.text.lower():
-        mentioned_users = [entity for entity in message.entities if entity.type == "mention"]
-        if mentioned_users:
-            await message.answer("🎮 Выбери игру для вызова:", reply_markup=get_games_keyboard())
-
-# Запуск конкретной игры
-async def start_specific_game(message: types.Message, initiator: types.User, target: types.User, game_type: str):
-    if initiator.id == target.id:
-        await message.reply("❌ Нельзя играть с самим собой!")
-        return
-    
-    if target.is_bot:
-        await message.reply("❌ Нельзя играть с ботом!")
-        return
-    
-    initiator_name = initiator.username or initiator.first_name
-    target_name = target.username or target.first_name
-    
-    game_id = game_manager.create_game(game_type, message.chat.id, initiator.id, target.id, initiator_name, target_name)
-    user_manager.get_or_create_user(initiator.id, message.chat.id, initiator_name)
-    user_manager.get_or_create_user(target.id, message.chat.id, target_name)
-    
-    # Запускаем соответствующую игру
-    if game_type == "russian_roulette":
-        await start_russian_roulette(message, game_id)
-    elif game_type == "dice_battle":
-        await start_dice_battle(message, game_id)
-    elif game_type == "number_guess":
-        await start_number_guess(message, game_id)
-    elif game_type == "tic_tac_toe":
-        await start_tic_tac_toe(message, game_id)
-    elif game_type == "quick_math":
-        await start_quick_math(message, game_id)
-    elif game_type == "coin_flip":
-        await start_coin_flip(message, game_id)
-
-# Русская рулетка
-async def start_russian_roulette(message: types.Message, game_id: str):
-    game = game_manager.get_game(game_id)
-    if not game:
-        return
-    
-    player1_id, player2_id = list(game['players'].keys())
-    player1_name = game['players'][player1_id]['name']
-    player2_name = game['players'][player2_id]['name']
-    
-    text = (
-        f"🔫 **Русская рулетка**\n\n"
-        f"🎯 Игроки:\n"
-        f"• {player1_name}\n"
-        f"• {player2_name}\n\n"
-        f"💀 В револьвере 1 патрон из 6 камор\n"
-        f"🎲 Ход: {player1_name}\n\n"
-        f"Нажми кнопку чтобы выстрелить..."
-    )
-    
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="💥 ВЫСТРЕЛИТЬ!", callback_data=f"rr_shoot_{game_id}")]
-    ])
-    
-    await message.reply(text, reply_markup=keyboard)
-
-@dp.callback_query(F.data.startswith("rr_shoot_"))
-async def rr_shoot(callback: types.CallbackQuery):
-    game_id = callback.data.replace("rr_shoot_", "")
-    game = game_manager.get_game(game_id)
-    
-    if not game:
-        await callback.answer("❌ Игра завершена!", show_alert=True)
-        return
-    
-    user_id = callback.from_user.id
-    if user_id not in game['players']:
-        await callback.answer("❌ Вы не участник игры!", show_alert=True)
-        return
-    
-    if not game['players'][user_id]['turn']:
-        await callback.answer("❌ Сейчас не ваш ход!", show_alert=True)
-        return
-    
-    # Определяем результат выстрела
-    current_chamber = game['current_chamber']
-    is_bullet = game['revolver'][current_chamber]
-    
-    player_name = game['players'][user_id]['name']
-    game['current_chamber'] = (current_chamber + 1) % 6
-    
-    if is_bullet:
-        # Игрок проиграл
-        game['players'][user_id]['alive'] = False
-        winner_id = [pid for pid in game['players'] if pid != user_id][0]
-        winner_name = game['players'][winner_id]['name']
-        
-        # Обновляем статистику
-        user_manager.update_stats(winner_id, game['chat_id'], "russian_roulette", won=True)
-        user_manager.update_stats(user_id, game['chat_id'], "russian_roulette", won=False)
-        
-        text = (
-            f"💥 **БАБАХ!**\n\n"
-            f"💀 {player_name} был убит!\n"
-            f"🏆 Победитель: {winner_name}\n\n"
-            f"Патрон был в каморе {current_chamber + 1}"
-        )
-        
-        await callback.message.edit_text(text, reply_markup=get_play_again_keyboard("russian_roulette"))
-        game_manager.remove_game(game_id)
-        
-    else:
-        # Игрок выжил, передаем ход
-        game['players'][user_id]['turn'] = False
-        next_player_id = [pid for pid in game['players'] if pid != user_id][0]
-        game['players'][next_player_id]['turn'] = True
-        next_player_name = game['players'][next_player_id]['name']
-        
-        text = (
-            f"🔫 **Русская рулетка**\n\n"
-            f"✅ {player_name} выжил!\n"
-            f"🎲 Следующий ход: {next_player_name}\n"
-            f"📍 Пройдено камор: {game['current_chamber']}\n\n"
-            f"Следующий игрок, нажми кнопку..."
-        )
-        
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="💥 ВЫСТРЕЛИТЬ!", callback_data=f"rr_shoot_{game_id}")]
-        ])
-        
-        await callback.message.edit_text(text, reply_markup=keyboard)
-    
-    await callback.answer()
-
-# Битва кубиков
-async def start_dice_battle(message: types.Message, game_id: str):
-    game = game_manager.get_game(game_id)
-    if not game:
-        return
-    
-    player1_id, player2_id = list(game['players'].keys())
-    player1_name = game['players'][player1_id]['name']
-    player2_name = game['players'][player2_id]['name']
-    
-    text = (
-        f"🎲 **Битва кубиков**\n\n"
-        f"🎯 Игроки:\n"
-        f"• {player1_name} (3 броска)\n"
-        f"• {player2_name} (3 броска)\n\n"
-        f"🎲 Ход: {player1_name}\n\n"
-        f"Бросай кубик и набирай очки!"
-    )
-    
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🎲 БРОСИТЬ КУБИК", callback_data=f"db_roll_{game_id}")]
-    ])
-    
-    await message.reply(text, reply_markup=keyboard)
-
-@dp.callback_query(F.data.startswith("db_roll_"))
-async def db_roll(callback: types.CallbackQuery):
-    game_id = callback.data.replace("db_roll_", "")
-    game = game_manager.get_game(game_id)
-    
-    if not game:
-        await callback.answer("❌ Игра завершена!", show_alert=True)
-        return
-    
-    user_id = callback.from_user.id
-    if user_id not in game['players']:
-        await callback.answer("❌ Вы не участник игры!", show_alert=True)
-        return
-    
-    if user_id != game['current_player']:
-        await callback.answer("❌ Сейчас не ваш ход!", show_alert=True)
-        return
-    
-    # Бросаем кубик
-    dice_roll = random.randint(1, 6)
-    player = game['players'][user_id]
-    player['score'] += dice_roll
-    player['rolls_left'] -= 1
-    
-    player_name = player['name']
-    
-    if player['rolls_left'] > 0:
-        # Еще есть броски
-        text = (
-            f"🎲 **Битва кубиков**\n\n"
-            f"🎯 {player_name} выбросил: {dice_roll}
-@dp.callback_query(F.data.startswith("db_roll_"))
-async def db_roll(callback: types.CallbackQuery):
-    game_id = callback.data.replace("db_roll_", "")
-    game = game_manager.get_game(game_id)
-    
-    if not game:
-        await callback.answer("❌ Игра завершена!", show_alert=True)
-        return
-    
-    user_id = callback.from_user.id
-    if user_id not in game['players']:
-        await callback.answer("❌ Вы не участник игры!", show_alert=True)
-        return
-    
-    if user_id != game['current_player']:
-        await callback.answer("❌ Сейчас не ваш ход!", show_alert=True)
-        return
-    
-    # Бросаем кубик
-    dice_roll = random.randint(1, 6)
-    player = game['players'][user_id]
-    player['score'] += dice_roll
-    player['rolls_left'] -= 1
-    
-    player_name = player['name']
-    player1_id, player2_id = list(game['players'].keys())
-    player1 = game['players'][player1_id]
-    player2 = game['players'][player2_id]
-    
-    if player['rolls_left'] > 0:
-        # Еще есть броски
-        text = (
-            f"🎲 **Битва кубиков**\n\n"
-            f"🎯 {player_name} выбросил: {dice_roll}\n"
-            f"📊 Текущий счет: {player['score']}\n"
-            f"🎲 Осталось бросков: {player['rolls_left']}\n\n"
-            f"Бросай снова!"
-        )
-        
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🎲 БРОСИТЬ КУБИК", callback_data=f"db_roll_{game_id}")]
-        ])
-        
-        await callback.message.edit_text(text, reply_markup=keyboard)
-        
-    else:
-        # Броски закончились, передаем ход
-        if game['current_player'] == player1_id:
-            game['current_player'] = player2_id
-            next_player_name = player2['name']
-            
-            text = (
-                f"🎲 **Битва кубиков**\n\n"
-                f"🎯 {player_name} выбросил: {dice_roll}\n"
-                f"📊 Итоговый счет {player_name}: {player['score']}\n\n"
-                f"🎲 Ход переходит к: {next_player_name}"
-            )
-            
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🎲 БРОСИТЬ КУБИК", callback_data=f"db_roll_{game_id}")]
-            ])
-            
-            await callback.message.edit_text(text, reply_markup=keyboard)
-            
-        else:
-            # Оба игрока бросили, определяем победителя
-            if player1['score'] > player2['score']:
-                winner_id, loser_id = player1_id, player2_id
-            elif player2['score'] > player1['score']:
-                winner_id, loser_id = player2_id, player1_id
-            else:
-                # Ничья
-                text = (
-                    f"🎲 **Битва кубиков - НИЧЬЯ!**\n\n"
-                    f"📊 Счет:\n"
-                    f"• {player1['name']}: {player1['score']}\n"
-                    f"• {player2['name']}: {player2['score']}\n\n"
-                    f"🤝 Оба игрока получают по 1 очку!"
-                )
-                
-                user_manager.update_stats(player1_id, game['chat_id'], "dice_battle", won=True)
-                user_manager.update_stats(player2_id, game['chat_id'], "dice_battle", won=True)
-                
-                await callback.message.edit_text(text, reply_markup=get_play_again_keyboard("dice_battle"))
-                game_manager.remove_game(game_id)
-                return
-            
-            winner_name = game['players'][winner_id]['name']
-            loser_name = game['players'][loser_id]['name']
-            
-            text = (
-                f"🎲 **Битва кубиков - ПОБЕДА!**\n\n"
-                f"🏆 Победитель: {winner_name}\n"
-                f"📊 Счет:\n"
-                f"• {player1['name']}: {player1['score']}\n"
-                f"• {player2['name']}: {player2['score']}\n\n"
-                f"🎯 {winner_name} получает 1 очко!"
-            )
-            
-            user_manager.update_stats(winner_id, game['chat_id'], "dice_battle", won=True)
-            user_manager.update_stats(loser_id, game['chat_id'], "dice_battle", won=False)
-            
-            await callback.message.edit_text(text, reply_markup=get_play_again_keyboard("dice_battle"))
-            game_manager.remove_game(game_id)
-    
-    await callback.answer()
-
-# Угадай число
-async def start_number_guess(message: types.Message, game_id: str):
-    game = game_manager.get_game(game_id)
-    if not game:
-        return
-    
-    player1_id, player2_id = list(game['players'].keys())
-    player1_name = game['players'][player1_id]['name']
-    player2_name = game['players'][player2_id]['name']
-    
-    text = (
-        f"🔢 **Угадай число**\n\n"
-        f"🎯 Игроки:\n"
-        f"• {player1_name}\n"
-        f"• {player2_name}\n\n"
-        f"🎲 Загадано число от 1 до 100\n"
-        f"👤 Ход: {player1_name}\n\n"
-        f"Отправь число от 1 до 100:"
-    )
-    
-    await message.reply(text)
-
-@dp.message(F.text & F.text.regexp(r'^\d+$'))
-async def handle_number_guess(message: types.Message):
-    # Ищем активную игру для этого пользователя в этом чате
-    user_id = message.from_user.id
-    chat_id = message.chat.id
-    
-    # Ищем игру "Угадай число" где текущий ход этого пользователя
-    for game_id, game in game_manager.active_games.items():
-        if (game['type'] == "number_guess" and 
-            game['chat_id'] == chat_id and 
-            game['current_player'] == user_id):
-            
-            try:
-                guess = int(message.text)
-                if guess < 1 or guess > 100:
-                    await message.reply("❌ Число должно быть от 1 до 100!")
-                    return
-                
-                target_number = game['target_number']
-                player_name = game['players'][user_id]['name']
-                game['players'][user_id]['attempts'] += 1
-                
-                if guess == target_number:
-                    # Игрок угадал!
-                    winner_id = user_id
-                    loser_id = [pid for pid in game['players'] if pid != user_id][0]
-                    winner_name = game['players'][winner_id]['name']
-                    loser_name = game['players'][loser_id]['name']
-                    attempts = game['players'][user_id]['attempts']
-                    
-                    text = (
-                        f"🔢 **Угадай число - ПОБЕДА!**\n\n"
-                        f"🎯 Загаданное число: {target_number}\n"
-                        f"🏆 Победитель: {winner_name}\n"
-                        f"📊 Попыток: {attempts}\n\n"
-                        f"🎯 {winner_name} угадал число!"
-                    )
-                    
-                    user_manager.update_stats(winner_id, game['chat_id'], "number_guess", won=True)
-                    user_manager.update_stats(loser_id, game['chat_id'], "number_guess", won=False)
-                    
-                    await message.reply(text, reply_markup=get_play_again_keyboard("number_guess"))
-                    game_manager.remove_game(game_id)
-                    
-                else:
-                    # Не угадал, передаем ход
-                    hint = "🔻 Меньше" if guess > target_number else "🔺 Больше"
-                    next_player_id = [pid for pid in game['players'] if pid != user_id][0]
-                    game['current_player'] = next_player_id
-                    next_player_name = game['players'][next_player_id]['name']
-                    
-                    text = (
-                        f"🔢 **Угадай число**\n\n"
-                        f"🎯 {player_name}: {guess} {hint}\n"
-                        f"📊 Попыток: {game['players'][user_id]['attempts']}\n\n"
-                        f"👤 Следующий ход: {next_player_name}\n\n"
-                        f"Отправь число от 1 до 100:"
-                    )
-                    
-                    await message.reply(text)
-                
-                break
-                
-            except ValueError:
-                await message.reply("❌ Введи корректное число!")
-            break
-
-# Крестики-нолики
-async def start_tic_tac_toe(message: types.Message, game_id: str):
-    game = game_manager.get_game(game_id)
-    if not game:
-        return
-    
-    player1_id, player2_id = list(game['players'].keys())
-    player1_name = game['players'][player1_id]['name']
-    player2_name = game['players'][player2_id]['name']
-    
-    text = (
-        f"⭕ **Крестики-нолики**\n\n"
-        f"🎯 Игроки:\n"
-        f"• {player1_name} (❌)\n"
-        f"• {player2_name} (⭕)\n\n"
-        f"🎲 Ход: {player1_name}\n\n"
-        f"Выбери клетку:"
-    )
-    
-    keyboard = get_tic_tac_toe_keyboard(game_id, game['board'])
-    await message.reply(text, reply_markup=keyboard)
-
-def get_tic_tac_toe_keyboard(game_id: str, board: list):
-    keyboard = []
-    for i in range(0, 9, 3):
-        row = []
-        for j in range(3):
-            cell_index = i + j
-            row.append(InlineKeyboardButton(
-                text=board[cell_index],
-                callback_data=f"ttt_{game_id}_{cell_index}"
-            ))
-        keyboard.append(row)
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
-
-@dp.callback_query(F.data.startswith("ttt_"))
-async def ttt_move(callback: types.CallbackQuery):
-    parts = callback.data.split('_')
-    game_id = parts[1]
-    cell_index = int(parts[2])
-    
-    game = game_manager.get_game(game_id)
-    if not game:
-        await callback.answer("❌ Игра завершена!", show_alert=True)
-        return
-    
-    user_id = callback.from_user.id
-    if user_id not in game['players']:
-        await callback.answer("❌ Вы не участник игры!", show_alert=True)
-        return
-    
-    if user_id != game['current_player']:
-        await callback.answer("❌ Сейчас не ваш ход!", show_alert=True)
-        return
-    
-    if game['board'][cell_index] != '⬜':
-        await callback.answer("❌ Клетка уже занята!", show_alert=True)
-        return
-    
-    # Делаем ход
-    symbol = game['players'][user_id]['symbol']
-    game['board'][cell_index] = symbol
-    player_name = game['players'][user_id]['name']
-    
-    # Проверяем победу
-    if check_tic_tac_toe_win(game['board'], symbol):
-        # Игрок победил
-        winner_id = user_id
-        loser_id = [pid for pid in game['players'] if pid != user_id][0]
-        winner_name = game['players'][winner_id]['name']
-        loser_name = game['players'][loser_id]['name']
-        
-        text = (
-            f"⭕ **Крестики-нолики - ПОБЕДА!**\n\n"
-            f"🏆 Победитель: {winner_name} ({symbol})\n"
-            f"💀 Проигравший: {loser_name}\n\n"
-            f"🎯 {winner_name} выиграл партию!"
-        )
-        
-        user_manager.update_stats(winner_id, game['chat_id'], "tic_tac_toe", won=True)
-        user_manager.update_stats(loser_id, game['chat_id'], "tic_tac_toe", won=False)
-        
-        keyboard = get_tic_tac_toe_keyboard(game_id, game['board'])
-        await callback.message.edit_text(text, reply_markup=keyboard)
-        await callback.message.reply("🎮 Игра завершена!", reply_markup=get_play_again_keyboard("tic_tac_toe"))
-        game_manager.remove_game(game_id)
-        
-    elif '⬜' not in game['board']:
-        # Ничья
-        player1_id, player2_id = list(game['players'].keys())
-        
-        text = f"⭕ **Крестики-нолики - НИЧЬЯ!**\n\n🤝 Партия завершилась вничью!"
-        
-        user_manager.update_stats(player1_id, game['chat_id'], "tic_tac_toe", won=True)
-        user_manager.update_stats(player2_id, game['chat_id'], "tic_tac_toe", won=True)
-        
-        keyboard = get_tic_tac_toe_keyboard(game_id, game['board'])
-        await callback.message.edit_text(text, reply_markup=keyboard)
-        await callback.message.reply("🎮 Игра завершена!", reply_markup=get_play_again_keyboard("tic_tac_toe"))
-        game_manager.remove_game(game_id)
-        
-    else:
-        # Продолжаем игру
-        next_player_id = [pid for pid in game['players'] if pid != user_id][0]
-        game['current_player'] = next_player_id
-        next_player_name = game['players'][next_player_id]['name']
-        next_symbol = game['players'][next_player_id]['symbol']
-        
-        text = (
-            f"⭕ **Крестики-нолики**\n\n"
-            f"🎯 Ход сделал: {player_name} ({symbol})\n"
-            f"🎲 Следующий ход: {next_player_name} ({next_symbol})"
-        )
-        
-        keyboard = get_tic_tac_toe_keyboard(game_id, game['board'])
-        await callback.message.edit_text(text, reply_markup=keyboard)
-    
-    await callback.answer()
-
-def check_tic_tac_toe_win(board, symbol):
-    # Проверяем все выигрышные комбинации
-    win_combinations = [
-        [0, 1, 2], [3, 4, 5], [6, 7, 8],  # Горизонтальные
-        [0, 3, 6], [1, 4, 7], [2, 5, 8],  # Вертикальные
-        [0, 4, 8], [2, 4, 6]              # Диагональные
-    ]
-    
-    for combo in win_combinations:
-        if board[combo[0]] == symbol and board[combo[1]] == symbol and board[combo[2]] == symbol:
-            return True
-    return False
-
-# Быстрая математика
-async def start_quick_math(message: types.Message, game_id: str):
-    game = game_manager.get_game(game_id)
-    if not game:
-        return
-    
-    player1_id, player2_id = list(game['players'].keys())
-    player1_name = game['players'][player1_id]['name']
-    player2_name = game['players'][player2_id]['name']
-    
-    text = (
-        f"🧮 **Быстрая математика**\n\n"
-        f"🎯 Игроки:\n"
-        f"• {player1_name}\n"
-        f"• {player2_name}\n\n"
-        f"🎲 Ход: {player1_name}\n\n"
-        f"Реши пример:\n"
-        f"**{game['problem']} = ?**\n\n"
-        f"Отправь ответ числом:"
-    )
-    
-    await message.reply(text, parse_mode='Markdown')
-
-@dp.message(F.text & F.text.regexp(r'^-?\d+$'))
-async def handle_math_answer(message: types.Message):
-    user_id = message.from_user.id
-    chat_id = message.chat.id
-    
-    # Ищем активную игру "Быстрая математика"
-    for game_id, game in game_manager.active_games.items():
-        if (game['type'] == "quick_math" and 
-            game['chat_id'] == chat_id and 
-            game['current_player'] == user_id):
-            
-            try:
-                answer = int(message.text)
-                correct_answer = game['answer']
-                player_name = game['players'][user_id]['name']
-                
-                if answer == correct_answer:
-                    # Правильный ответ
-                    game['players'][user_id]['score'] += 1
-                    player1_id, player2_id = list(game['players'].keys())
-                    player1 = game['players'][player1_id]
-                    player2 = game['players'][player2_id]
-                    
-                    if player1['score'] >= 3 or player2['score'] >= 3:
-                        # Кто-то достиг 3 очков
-                        if player1['score'] >= 3:
-                            winner_id, loser_id = player1_id, player2_id
-                        else:
-                            winner_id, loser_id = player2_id, player1_id
-                        
-                        winner_name = game['players'][winner_id]['name']
-                        loser_name = game['players'][loser_id]['name']
-                        
-                        text = (
-                            f"🧮 **Быстрая математика - ПОБЕДА!**\n\n"
-                            f"🏆 Победитель: {winner_name}\n"
-                            f"📊 Счет:\n"
-                            f"• {player1['name']}: {player1['score']}\n"
-                            f"• {player2['name']}: {player2['score']}\n\n"
-                            f"🎯 {winner_name} быстрее решает примеры!"
-                        )
-                        
-                        user_manager.update_stats(winner_id, game['chat_id'], "quick_math", won=True)
-                        user_manager.update_stats(loser_id, game['chat_id'], "quick_math", won=False)
-                        
-                        await message.reply(text, reply_markup=get_play_again_keyboard("quick_math"))
-                        game_manager.remove_game(game_id)
-                        
-                    else:
-                        # Генерируем новый пример
-                        num1, num2 = random.randint(1, 20), random.randint(1, 20)
-                        operations = ['+', '-', '*']
-                        operation = random.choice(operations)
-                        
-                        if operation == '+':
-                            new_answer = num1 + num2
-                        elif operation == '-':
-                            new_answer = num1 - num2
-                        else:
-                            new_answer = num1 * num2
-                        
-                        game['problem'] = f"{num1} {operation} {num2}"
-                        game['answer'] = new_answer
-                        
-                        # Передаем ход
-                        next_player_id = [pid for pid in game['players'] if pid != user_id][0]
-                        game['current_player'] = next_player_id
-                        next_player_name = game['players'][next_player_id]['name']
-                        
-                        text = (
-                            f"🧮 **Быстрая математика**\n\n"
-                            f"✅ {player_name} ответил правильно!\n"
-                            f"📊 Счет:\n"
-                            f"• {player1['name']}: {player1['score']}\n"
-                            f"• {player2['name']}: {player2['score']}\n\n"
-                            f"🎲 Следующий ход: {next_player_name}\n\n"
-                            f"Реши пример:\n"
-                            f"**{game['problem']} = ?**"
-                        )
-                        
-                        await message.reply(text, parse_mode='Markdown')
-                        
-                else:
-                    # Неправильный ответ
-                    next_player_id = [pid for pid in game['players'] if pid != user_id][0]
-                    game['current_player'] = next_player_id
-                    next_player_name = game['players'][next_player_id]['name']
-                    
-                    text = (
-                        f"🧮 **Быстрая математика**\n\n"
-                        f"❌ {player_name} ответил неправильно!\n"
-                        f"✅ Правильный ответ: {correct_answer}\n\n"
-                        f"🎲 Следующий ход: {next_player_name}\n\n"
-                        f"Реши пример:\n"
-                        f"**{game['problem']} = ?**"
-                    )
-                    
-                    await message.reply(text, parse_mode='Markdown')
-                
-                break
-                
-            except ValueError:
-                await message.reply("❌ Введи корректное число!")
-            break
-
-# Бросок монеты
-async def start_coin_flip(message: types.Message, game_id: str):
-    game = game_manager.get_game(game_id)
-    if not game:
-        return
-    
-    player1_id, player2_id = list(game['players'].keys())
-    player1_name = game['players'][player1_id]['name']
-    player2_name = game['players'][player2_id]['name']
-    
-    text = (
-        f"🪙 **Бросок монеты**\n\n"
-        f"🎯 Игроки:\n"
-        f"• {player1_name}\n"
-        f"• {player2_name}\n\n"
-        f"Выбери сторону монеты:"
-    )
-    
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="🦅 Орел", callback_data=f"cf_choice_{game_id}_heads"),
-            InlineKeyboardButton(text="📀 Решка", callback_data=f"cf_choice_{game_id}_tails")
-        ]
-    ])
-    
-    await message.reply(text, reply_markup=keyboard)
-
-@dp.callback_query(F.data.startswith("cf_choice_"))
-async def cf_choice(callback: types.CallbackQuery):
-    parts = callback.data.split('_')
-    game_id = parts[2]
-    choice = parts[3]  # heads или tails
-    
-    game = game_manager.get_game(game_id)
-    if not game:
-        await callback.answer("❌ Игра завершена!", show_alert=True)
-        return
-    
-    user_id = callback.from_user.id
-    if user_id not in game['players']:
-        await callback.answer("❌ Вы не участник игры!", show_alert=True)
-        return
-    
-    # Записываем выбор игрока
-    game['players'][user_id]['choice'] = choice
-    player_name = game['players'][user_id]['name']
-    
-    # Проверяем, сделали ли оба игрока выбор
-    player1_id, player2_id = list(game['players'].keys())
-    player1_choice = game['players'][player1_id]['choice']
-    player2_choice = game['players'][player2_id]['choice']
-    
-    if player1_choice and player2_choice:
-        # Оба сделали выбор, подбрасываем монету
-        result = random.choice(['heads', 'tails'])
-        result_emoji = '🦅' if result == 'heads' else '📀'
-        
-        # Определяем победителя
-        if player1_choice == result:
-            winner_id, loser_id = player1_id, player2_id
-        else:
-            winner_id, loser_id = player2_id, player1_id
-        
-        winner_name = game['players'][winner_id]['name']
-        loser_name = game['players'][loser_id]['name']
-        
-        text = (
-            f"🪙 **Бросок монеты**\n\n"
-            f"🎯 Результат: {result_emoji} {'Орел' if result == 'heads' else 'Решка'}\n\n"
-            f"🏆 Победитель: {winner_name}\n"
-            f"💀 Проигравший: {loser_name}\n\n"
-            f"Выборы:\n"
-            f"• {game['players'][player1_id]['name']}: {'Орел' if player1_choice == 'heads' else 'Решка'}\n"
-            f"• {game['players'][player2_id]['name']}: {'Орел' if player2_choice == 'heads' else 'Решка'}"
-        )
-        
-        user_manager.update_stats(winner_id, game['chat_id'], "coin_flip", won=True)
-        user_manager.update_stats(loser_id, game['chat_id'], "coin_flip", won=False)
-        
-        await callback.message.edit_text(text, reply_markup=get_play_again_keyboard("coin_flip"))
-        game_manager.remove_game(game_id)
-        
-    else:
-        # Ждем второго игрока
-        text = (
-            f"🪙 **Бросок монеты**\n\n"
-            f"✅ {player_name} выбрал: {'Орел' if choice == 'heads' else 'Решка'}\n"
-            f"⏳ Ожидаем выбор второго игрока..."
-        )
-        
-        await callback.message.edit_text(text, reply_markup=callback.message.reply_markup)
-        await callback.answer(f"✅ Ты выбрал {'Орел' if choice == 'heads' else 'Решка'}!")
-
-# Вспомогательные функции
-def get_game_name(game_type: str) -> str:
-    names = {
-        "russian_roulette": "🔫 Русская рулетка",
-        "dice_battle": "🎲 Битва кубиков", 
-        "number_guess": "🔢 Угадай число",
-        "tic_tac_toe": "⭕ Крестики-нолики",
-        "quick_math": "🧮 Быстрая математика",
-        "coin_flip": "🪙 Бросок монеты"
-    }
-    return names.get(game_type, "Неизвестная игра")
-
-def get_game_description(game_type: str) -> str:
-    descriptions = {
-        "russian_roulette": "Смертельная игра на удачу. 1 патрон, 6 камор. Кто выживет?",
-        "dice_battle": "Бросай кубики и набирай очки. У кого будет больше?",
-        "number_guess": "Угадай загаданное число. Меньше попыток - больше шансов!",
-        "tic_tac_toe": "Классическая игра в крестики-нолики. Прояви стратегию!",
-        "quick_math": "Решай примеры на скорость. Первый до 3 очков побеждает!",
-        "coin_flip": "Простая игра на удачу. Выбери сторону монеты!"
-    }
-    return descriptions.get(game_type, "Описание недоступно")
-
-# Статистика
-@dp.callback_query(F.data == "my_stats")
-async def my_stats(callback: types.CallbackQuery):
-    user_stats = user_manager.get_user_stats(callback.from_user.id, callback.message.chat.id)
-    
-    if user_stats:
-        username, wins, losses, points = user_stats
-        
-        # Получаем статистику по играм
-        cursor = user_manager.conn.cursor()
-        cursor.execute(
-            'SELECT game_type, wins, losses FROM game_stats WHERE user_id = ? AND chat_id = ?',
-            (callback.from_user.id, callback.message.chat.id)
-        )
-        game_stats = cursor.fetchall()
-        
-        text = f"📊 **Статистика {username}**\n\n"
-        text += f"🏆 Побед: {wins}\n"
-        text += f"💀 Поражений: {losses}\n" 
-        text += f"🎯 Очков: {points}\n\n"
-        
-        if game_stats:
-            text += "**Статистика по играм:**\n"
-            for game_type, game_wins, game_losses in game_stats:
-                game_name = get_game_name(game_type)
-                total = game_wins + game_losses
-                win_rate = (game_wins / total * 100) if total > 0 else 0
-                text += f"• {game_name}: {game_wins}/{total} ({win_rate:.1f}%)\n"
-        
-        await callback.message.edit_text(text, reply_markup=get_main_keyboard())
-    else:
-        await callback.message.edit_text("📊 Статистика не найдена. Сыграй в свою первую игру!", 
-                                       reply_markup=get_main_keyboard())
-
-@dp.callback_query(F.data == "top_players")
-async def top_players(callback: types.CallbackQuery):
-    cursor = user_manager.conn.cursor()
-    cursor.execute(
-        'SELECT username, wins, losses, points FROM users WHERE chat_id = ? ORDER BY points DESC LIMIT 10',
-        (callback.message.chat.id,)
-    )
-    top_users = cursor.fetchall()
-    
-    if top_users:
-        text = "🏆 **Топ игроков чата:**\n\n"
-        for i, (username, wins, losses, points) in enumerate(top_users, 1):
-            text += f"{i}. {username} - {points} очков ({wins}🏆/{losses}💀)\n"
-    else:
-        text = "🏆 В этом чате еще нет игроков!\nСыграй в первую игру!"
-    
-    await callback.message.edit_text(text, reply_markup=get_main_keyboard())
-
-@dp.callback_query(F.data == "game_rules")
-async def game_rules(callback: types.CallbackQuery):
-    text = (
-        "📖 **Правила игр:**\n\n"
-        "🔫 **Русская рулетка:**\n"
-        "• 1 патрон в 6-зарядном револьвере\n"
-        "• Игроки по очереди стреляют в себя\n"
-        "• Проигрывает тот, в кого попадет патрон\n\n"
-        
-        "🎲 **Битва кубиков:**\n"
-        "• Каждый игрок бросает кубик 3 раза\n"
-        "• Суммируются результаты бросков\n"
-        "• Побеждает игрок с большей суммой\n\n"
-        
-        "🔢 **Угадай число:**\n"
-        "• Загадано число от 1 до 100\n"
-        "• Игроки по очереди называют числа\n"
-        "• Получают подсказки 'больше/меньше'\n"
-        "• Побеждает угадавший число\n\n"
-        
-        "⭕ **Крестики-нолики:**\n"
-        "• Классическая игра 3x3\n"
-        "• Собирай 3 в ряд по горизонтали, вертикали или диагонали\n\n"
-        
-        "🧮 **Быстрая математика:**\n"
-        "• Решай простые математические примеры\n"
-        "• Первый до 3 правильных ответов побеждает\n\n"
-        
-        "🪙 **Бросок монеты:**\n"
-        "• Игроки выбирают сторону монеты\n"
-        "• Подбрасывается виртуальная монета\n"
-        "• Побеждает угадавший сторону"
-    )
-    
-    await callback.message.edit_text(text, reply_markup=get_main_keyboard())
-
-# Запуск бота
-async def main():
-    logger.info("🚀 GameBot starting...")
-    await dp.start_polling(bot)
-
-if __name__ == "__main__":
+import os
+import asyncio
+import sqlite3
+import logging
+from aiogram import Bot, Dispatcher, types, F
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.filters import Command
+from aiogram.utils.markdown import hbold
+from minigames import global_stats
+from minigames.codec import IdAllocator, action_of, unpack
+from minigames.expiry import DeadlineHeap
+from minigames.games import CALLBACK_PREFIXES, GAME_TYPES
+from minigames.games.base import ABANDONED, BOT_PLAYER_ID, BOT_PLAYER_NAME, GameContext
+from minigames.keyboards import get_main_keyboard, get_games_keyboard, get_game_menu_keyboard
+from minigames.leaderboard import Leaderboard
+from minigames.locks import KeyedLocks, RecentIds
+from minigames.match_log import SCHEMA as MATCH_LOG_SCHEMA, MatchLog
+from minigames.matchmaking import Matchmaker
+from minigames.metrics import ApiTimingMiddleware, HandlerTimingMiddleware, registry, start_metrics_server
+from minigames.outbox import Outbox
+from minigames.rating import SCHEMA as RATINGS_SCHEMA, Ratings
+from minigames.rollups import SCHEMA as ROLLUP_SCHEMA, WINDOWS, RollupCompactor, today, window_start, window_stats
+from minigames.snapshot import GameSnapshotter
+from minigames.stats_writer import StatsWriter
+from minigames.storage import Storage
+from minigames.user_cache import UserCache
+from minigames.webhook import run_webhook
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Получаем токен из переменных окружения
+BOT_TOKEN = os.getenv('BOT_TOKEN')
+if not BOT_TOKEN:
+    logger.error("❌ BOT_TOKEN not found!")
+    exit(1)
+
+DB_PATH = os.getenv('DB_PATH', 'games.db')
+
+# Режим получения апдейтов: polling (по умолчанию) или webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_MAX_IN_FLIGHT = int(os.getenv('WEBHOOK_MAX_IN_FLIGHT', '100'))
+
+# Администраторы (через запятую) могут смотреть /metrics; METRICS_PORT включает HTTP-эндпоинт
+ADMIN_IDS = {int(user_id) for user_id in os.getenv('ADMIN_IDS', '').split(',') if user_id.strip()}
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+# Подбор соперника по силе в /find: ширина диапазона очков (0 - без учета очков)
+MATCH_SKILL_BAND = int(os.getenv('MATCH_SKILL_BAND', '0'))
+
+bot = Bot(token=BOT_TOKEN)
+dp = Dispatcher()
+
+# Замеры времени обработчиков и запросов к Bot API
+bot.session.middleware(ApiTimingMiddleware())
+dp.message.middleware(HandlerTimingMiddleware())
+dp.callback_query.middleware(HandlerTimingMiddleware())
+GAME_SECONDS = registry.histogram('minigames_game_seconds', 'Game handler time', 'handler')
+STATS_UPDATE_SECONDS = registry.histogram('minigames_stats_update_seconds', 'update_stats time', 'game')
+
+# Инициализация БД
+def init_db(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER,
+            chat_id INTEGER,
+            username TEXT,
+            wins INTEGER DEFAULT 0,
+            losses INTEGER DEFAULT 0,
+            points INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, chat_id)
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS game_stats (
+            user_id INTEGER,
+            chat_id INTEGER,
+            game_type TEXT,
+            wins INTEGER DEFAULT 0,
+            losses INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, chat_id, game_type)
+        )
+    ''')
+    
+    # Для загрузки таблицы лидеров чата
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_chat_points ON users (chat_id, points DESC)')
+    
+    # Снимок активных игр для восстановления после перезапуска
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS game_snapshot (
+            id INTEGER PRIMARY KEY,
+            saved_at REAL,
+            data BLOB
+        )
+    ''')
+    
+    # Журнал завершенных партий (minigames.match_log) и рейтинги Эло (minigames.rating)
+    cursor.execute(MATCH_LOG_SCHEMA)
+    cursor.execute(RATINGS_SCHEMA)
+    
+    # Статистика по дням и месяцам для топов за период (minigames.rollups)
+    cursor.execute(ROLLUP_SCHEMA)
+    
+    # Суммы по всем чатам (minigames.global_stats), на старой БД - с переносом данных
+    global_stats.init(conn)
+    
+    conn.commit()
+    conn.close()
+
+init_db()
+
+# Игра удаляется, если в ней не было ходов 10 минут
+GAME_IDLE_TIMEOUT = 600
+
+# Менеджер активных игр
+class GameManager:
+    def __init__(self):
+        self.active_games = {}
+        # Вторичные индексы: chat_id -> {game_id} и (chat_id, user_id) -> {game_id: game_type}
+        # для игр, где сейчас ход этого игрока. Поиск игры по сообщению не зависит
+        # от общего числа активных игр.
+        self.chat_games = {}
+        self.turn_index = {}
+        self.expiry = DeadlineHeap(self.expire_game)
+        self.ids = IdAllocator()
+        # Вызываются с (game, result) при окончании партии: журнал, рейтинги
+        self.finish_listeners = []
+        # Ходы в одной игре обрабатываются строго по очереди
+        self.locks = KeyedLocks()
+    
+    def create_game(self, game_type, chat_id, player1_id, player2_id, player1_name, player2_name, **options):
+        game_id = self.ids.next_id()
+        
+        self.active_games[game_id] = GAME_TYPES[game_type].create_state(
+            chat_id, player1_id, player2_id, player1_name, player2_name, **options
+        )
+        self._index_game(game_id)
+        
+        # Автоудаление игры после 10 минут без ходов
+        self.expiry.schedule(game_id, GAME_IDLE_TIMEOUT)
+        return game_id
+    
+    def restore_game(self, game_id, game, remaining):
+        # Игра из снимка: возвращаем в индексы и заново ставим таймаут
+        self.active_games[game_id] = game
+        self._index_game(game_id)
+        self.expiry.schedule(game_id, max(remaining, 0))
+        self.ids.advance_past(game_id)
+    
+    def _index_game(self, game_id):
+        game = self.active_games[game_id]
+        self.chat_games.setdefault(game.chat_id, set()).add(game_id)
+        if game.has_turns:
+            key = (game.chat_id, game.current_player)
+            self.turn_index.setdefault(key, {})[game_id] = game.type
+    
+    def _unindex_turn(self, game_id, game):
+        if not game.has_turns:
+            return
+        key = (game.chat_id, game.current_player)
+        games = self.turn_index.get(key)
+        if games is not None:
+            games.pop(game_id, None)
+            if not games:
+                del self.turn_index[key]
+    
+    def get_game(self, game_id):
+        return self.active_games.get(game_id)
+    
+    def touch_game(self, game_id):
+        self.expiry.touch(game_id, GAME_IDLE_TIMEOUT)
+    
+    def count_by_type(self):
+        counts = dict.fromkeys(GAME_TYPES, 0)
+        for game in self.active_games.values():
+            counts[game.type] += 1
+        return counts
+    
+    def get_chat_games(self, chat_id):
+        return self.chat_games.get(chat_id, set())
+    
+    def pass_turn(self, game_id):
+        game = self.active_games.get(game_id)
+        if not game:
+            return
+        self._unindex_turn(game_id, game)
+        game.pass_turn()
+        key = (game.chat_id, game.current_player)
+        self.turn_index.setdefault(key, {})[game_id] = game.type
+    
+    def get_turn_games(self, chat_id, user_id):
+        # {game_id: game_type} игр в чате, где сейчас ход пользователя
+        return self.turn_index.get((chat_id, user_id), {})
+    
+    def finish_game(self, game_id, result):
+        # Партия закончилась: сообщаем слушателям исход и удаляем игру
+        game = self.active_games.get(game_id)
+        if game is not None:
+            for listener in self.finish_listeners:
+                try:
+                    listener(game, result)
+                except Exception:
+                    logger.exception("Finish listener failed for game %s", game_id)
+        self.remove_game(game_id)
+    
+    def expire_game(self, game_id):
+        self.finish_game(game_id, ABANDONED)
+    
+    def remove_game(self, game_id):
+        game = self.active_games.pop(game_id, None)
+        if game is None:
+            return
+        self.expiry.cancel(game_id)
+        self._unindex_turn(game_id, game)
+        chat_games = self.chat_games.get(game.chat_id)
+        if chat_games is not None:
+            chat_games.discard(game_id)
+            if not chat_games:
+                del self.chat_games[game.chat_id]
+
+game_manager = GameManager()
+
+# Менеджер пользователей
+class UserManager:
+    def __init__(self, db_path=DB_PATH):
+        # Все запросы к БД выполняются в отдельном потоке Storage
+        self.storage = Storage(db_path)
+        self.stats_writer = StatsWriter(self.storage)
+        self.match_log = MatchLog(self.storage)
+        self.ratings = Ratings(self.storage)
+        self.leaderboard = Leaderboard()
+        self._leaderboard_loads = {}
+        self.user_cache = UserCache()
+    
+    def get_or_create_user(self, user_id, chat_id, username):
+        # Известные игроки берутся из UserCache без запроса к БД; новые строки и
+        # смена имени уходят в пакет StatsWriter (upsert перед счетчиками)
+        if self.user_cache.check(user_id, chat_id, username):
+            self.stats_writer.add_user(user_id, chat_id, username)
+            self.leaderboard.add_user(chat_id, user_id, username)
+    
+    def update_stats(self, user_id, chat_id, game_type, won=True):
+        # Запись в БД идет пакетами в фоне, см. StatsWriter
+        with STATS_UPDATE_SECONDS.time(game_type):
+            self.stats_writer.add(user_id, chat_id, game_type, won)
+            self.leaderboard.apply(chat_id, user_id, 1 if won else 0, 0 if won else 1)
+    
+    async def get_user_stats(self, user_id, chat_id):
+        # Незаписанные результаты берем до запроса, см. StatsWriter.flush
+        pending_wins, pending_losses = self.stats_writer.pending_user(user_id, chat_id)
+        pending_name = self.stats_writer.pending_users.get((user_id, chat_id))
+        row = await self.storage.fetchone(
+            'SELECT username, wins, losses, points FROM users WHERE user_id = ? AND chat_id = ?',
+            (user_id, chat_id)
+        )
+        if not row:
+            if pending_name is None:
+                return row
+            # Строка игрока еще ждет записи
+            row = (pending_name, 0, 0, 0)
+        
+        username, wins, losses, points = row
+        if pending_name is not None:
+            username = pending_name
+        return username, wins + pending_wins, losses + pending_losses, points + pending_wins - pending_losses
+    
+    async def get_all_game_stats(self, user_id, chat_id):
+        pending = self.stats_writer.pending_games(user_id, chat_id)
+        rows = await self.storage.fetchall(
+            'SELECT game_type, wins, losses FROM game_stats WHERE user_id = ? AND chat_id = ?',
+            (user_id, chat_id)
+        )
+        stats = {game_type: [wins, losses] for game_type, wins, losses in rows}
+        for game_type, (pending_wins, pending_losses) in pending.items():
+            game = stats.setdefault(game_type, [0, 0])
+            game[0] += pending_wins
+            game[1] += pending_losses
+        return [(game_type, wins, losses) for game_type, (wins, losses) in stats.items()]
+    
+    async def get_game_stats(self, user_id, chat_id, game_type):
+        pending = self.stats_writer.pending_games(user_id, chat_id).get(game_type)
+        row = await self.storage.fetchone(
+            'SELECT wins, losses FROM game_stats WHERE user_id = ? AND chat_id = ? AND game_type = ?',
+            (user_id, chat_id, game_type)
+        )
+        if pending:
+            wins, losses = row or (0, 0)
+            return wins + pending[0], losses + pending[1]
+        return row
+    
+    async def get_top_players(self, chat_id, limit=10):
+        # Таблица лидеров читается из памяти, БД - только при первом запросе по чату
+        if not self.leaderboard.is_loaded(chat_id):
+            task = self._leaderboard_loads.get(chat_id)
+            if task is None:
+                task = asyncio.ensure_future(self._load_leaderboard(chat_id))
+                self._leaderboard_loads[chat_id] = task
+                task.add_done_callback(lambda _: self._leaderboard_loads.pop(chat_id, None))
+            await task
+        return self.leaderboard.top(chat_id, limit)
+    
+    async def _load_leaderboard(self, chat_id):
+        self.leaderboard.begin_load(chat_id)
+        pending = self.stats_writer.pending_chat(chat_id)
+        users = self.stats_writer.pending_chat_users(chat_id)
+        try:
+            rows = await self.storage.fetchall(
+                'SELECT user_id, username, wins, losses, points FROM users WHERE chat_id = ?',
+                (chat_id,)
+            )
+        except Exception:
+            self.leaderboard.abort_load(chat_id)
+            raise
+        self.leaderboard.finish_load(chat_id, rows, pending, users)
+    
+    async def get_window_top(self, chat_id, days, game_type=None, limit=10):
+        # Топ за последние days дней по корзинам stats_rollup.
+        # Внеочередной сброс StatsWriter не делаем: результаты последних партий
+        # появятся здесь не позже чем через flush_interval
+        since_day, since_month = window_start(days, today())
+        rows = await self.storage.run(window_stats, chat_id, since_day, game_type, since_month)
+        rows.sort(key=lambda row: (row[3] - row[2], -row[2]))
+        return [(username, wins, losses, wins - losses) for _, username, wins, losses in rows[:limit]]
+    
+    async def get_global_top(self, limit=10):
+        # Общий топ по всем чатам; отстает от партий на flush_interval, как get_window_top
+        return await self.storage.run(global_stats.top, limit)
+    
+    async def get_global_profile(self, user_id):
+        return await self.storage.run(global_stats.profile, user_id)
+    
+    async def close(self):
+        await self.match_log.close()
+        await self.ratings.close()
+        await self.stats_writer.close()
+        await self.storage.close()
+
+user_manager = UserManager()
+game_manager.finish_listeners += [user_manager.match_log.append, user_manager.ratings.record]
+
+outbox = Outbox(bot)
+seen_callbacks = RecentIds()
+
+def search_expired(waiter):
+    outbox.send(
+        waiter.chat_id,
+        f"⌛ {waiter.name}, соперник для игры {get_game_name(waiter.game_type)} не найден. "
+        f"Попробуй еще раз: /find {waiter.game_type}"
+    )
+
+matchmaker = Matchmaker(search_expired, skill_band=MATCH_SKILL_BAND)
+
+# Метрики, которые считаются при чтении
+registry.gauge(
+    'minigames_active_games', 'Active games by type',
+    lambda: game_manager.count_by_type(), label='game'
+)
+registry.gauge(
+    'minigames_matchmaking_waiting', 'Players waiting for an opponent by game',
+    lambda: matchmaker.count_by_type(), label='game'
+)
+registry.gauge('minigames_outbox_pending', 'Queued outgoing requests', lambda: outbox.pending())
+registry.gauge('minigames_outbox_sent', 'Sent outgoing requests', lambda: outbox.sent)
+registry.gauge('minigames_outbox_skipped', 'Edits skipped as unchanged', lambda: outbox.skipped)
+registry.gauge('minigames_outbox_collapsed', 'Edits replaced by newer ones', lambda: outbox.collapsed)
+registry.gauge('minigames_outbox_retries', 'Requests retried after 429', lambda: outbox.retries)
+registry.gauge('minigames_outbox_failed', 'Requests rejected or failed', lambda: outbox.failed)
+registry.gauge('minigames_match_log_pending', 'Matches waiting for flush', lambda: len(user_manager.match_log.pending))
+registry.gauge('minigames_ratings_pending', 'Ratings waiting for flush', lambda: len(user_manager.ratings.pending))
+registry.gauge('minigames_stats_pending', 'Stats rows waiting for flush', lambda: len(user_manager.stats_writer.pending))
+registry.gauge('minigames_user_cache_size', 'Cached users rows', lambda: len(user_manager.user_cache))
+registry.gauge('minigames_user_cache_hits', 'Users rows served from cache', lambda: user_manager.user_cache.hits)
+registry.gauge('minigames_user_cache_misses', 'Users rows queued for insert', lambda: user_manager.user_cache.misses)
+registry.gauge('minigames_user_cache_renames', 'Usernames refreshed', lambda: user_manager.user_cache.renames)
+registry.gauge('minigames_user_cache_hit_ratio', 'Share of lookups without a DB write', lambda: round(user_manager.user_cache.hit_rate(), 4))
+game_context = GameContext(game_manager, user_manager, outbox)
+game_snapshotter = GameSnapshotter(game_manager, user_manager.storage)
+rollup_compactor = RollupCompactor(user_manager.storage)
+
+# Команды
+@dp.message(Command("start"))
+async def start_command(message: types.Message):
+    user_manager.get_or_create_user(message.from_user.id, message.chat.id, 
+                                  message.from_user.username or message.from_user.first_name)
+    
+    text = (
+        "🎮 **GameBot - Мини-игры для двоих!**\n\n"
+        "💫 *6 увлекательных игр:*\n"
+        "• 🔫 Русская рулетка (рандом)\n"
+        "• 🎲 Битва кубиков (рандом)\n" 
+        "• 🔢 Угадай число (навык)\n"
+        "• ⭕ Крестики-нолики (стратегия)\n"
+        "• 🧮 Быстрая математика (реакция)\n"
+        "• 🪙 Бросок монеты (рандом)\n\n"
+        "🎯 **Как играть:**\n"
+        "1. Выбери игру\n"
+        "2. Ответь на сообщение соперника\n"
+        "3. Или найди случайного: /find тип_игры\n\n"
+        "Начни игру кнопкой ниже! 👇"
+    )
+    
+    outbox.send(message.chat.id, text, reply_markup=get_main_keyboard(), parse_mode='Markdown')
+
+@dp.message(Command("games"))
+async def games_command(message: types.Message):
+    outbox.send(message.chat.id, "🎮 **Выбери игру:**", reply_markup=get_games_keyboard())
+
+@dp.message(Command("play"))
+async def play_command(message: types.Message):
+    parts = message.text.split()
+    if len(parts) > 1:
+        game_type = parts[1]
+        spec = GAME_TYPES.get(game_type)
+        options = spec.parse_options(parts[2:]) if spec else None
+        if options is not None:
+            if message.reply_to_message:
+                target_user = message.reply_to_message.from_user
+                await start_specific_game(message, message.from_user, target_user, game_type, options)
+                return
+    
+    outbox.send(message.chat.id, "❌ Использование: Ответь на сообщение командой `/play тип_игры [параметры]`", parse_mode='Markdown')
+
+# Поиск случайного соперника в чате
+@dp.message(Command("find"))
+async def find_command(message: types.Message):
+    parts = message.text.split()
+    if len(parts) > 1 and parts[1] in GAME_TYPES:
+        await find_opponent(message, message.from_user, parts[1])
+        return
+    
+    outbox.send(message.chat.id, "❌ Использование: `/find тип_игры`", parse_mode='Markdown')
+
+@dp.message(Command("cancel"))
+async def cancel_command(message: types.Message):
+    if matchmaker.cancel(message.chat.id, message.from_user.id):
+        outbox.reply(message, "🚫 Поиск соперника отменен")
+    else:
+        outbox.reply(message, "❌ Ты не ищешь соперника")
+
+# Рейтинг Эло: /rating - свои рейтинги по играм, /rating тип_игры - топ чата
+@dp.message(Command("rating"))
+async def rating_command(message: types.Message):
+    parts = message.text.split()
+    chat_id = message.chat.id
+    ratings = user_manager.ratings
+    
+    if len(parts) > 1:
+        game_type = parts[1]
+        if game_type not in GAME_TYPES:
+            outbox.reply(message, "❌ Использование: `/rating [тип_игры]`", parse_mode='Markdown')
+            return
+        top = await ratings.top(chat_id, game_type)
+        if not top:
+            outbox.reply(message, f"📈 В игре {get_game_name(game_type)} еще нет рейтинговых партий")
+            return
+        text = f"📈 **Рейтинг: {get_game_name(game_type)}**\n\n"
+        for i, (username, rating, games) in enumerate(top, 1):
+            text += f"{i}. {username} - {rating:.0f} (партий: {games})\n"
+        outbox.reply(message, text)
+        return
+    
+    user_id = message.from_user.id
+    lines = []
+    for game_type in GAME_TYPES:
+        board = await ratings.board(chat_id, game_type)
+        rating, games = board.get(user_id)
+        if games:
+            lines.append(f"• {get_game_name(game_type)}: {rating:.0f} (#{board.rank(user_id)}, партий: {games})")
+    
+    name = message.from_user.username or message.from_user.first_name
+    if lines:
+        text = f"📈 **Рейтинг {name}**\n\n" + "\n".join(lines) + "\n\nТоп по игре: /rating тип_игры"
+    else:
+        text = f"📈 {name}, у тебя еще нет рейтинговых партий. Рейтинг растет за победы над сильными соперниками!"
+    outbox.reply(message, text)
+
+# Топ чата: /top - за все время, /top day|week|month|year [тип_игры] - за период,
+# /top global - по всем чатам
+@dp.message(Command("top"))
+async def top_command(message: types.Message):
+    parts = message.text.split()[1:]
+    if not parts:
+        top_users = await user_manager.get_top_players(message.chat.id)
+        title = "🏆 **Топ игроков чата:**"
+        empty = "🏆 В этом чате еще нет игроков!"
+    elif parts == ['global']:
+        top_users = await user_manager.get_global_top()
+        title = "🌍 **Топ игроков всех чатов:**"
+        empty = "🌍 Еще никто не играл!"
+    else:
+        window = WINDOWS.get(parts[0])
+        game_type = parts[1] if len(parts) > 1 else None
+        if window is None or len(parts) > 2 or (game_type is not None and game_type not in GAME_TYPES):
+            outbox.reply(message, "❌ Использование: `/top [day|week|month|year] [тип_игры]` или `/top global`", parse_mode='Markdown')
+            return
+        days, period = window
+        top_users = await user_manager.get_window_top(message.chat.id, days, game_type)
+        title = f"🏆 **Топ {period}" + (f": {get_game_name(game_type)}**" if game_type else "**")
+        empty = f"🏆 {period.capitalize()} еще никто не играл!"
+    
+    if not top_users:
+        outbox.reply(message, empty)
+        return
+    text = title + "\n\n"
+    for i, (username, wins, losses, points) in enumerate(top_users, 1):
+        text += f"{i}. {username} - {points} очков ({wins}🏆/{losses}💀)\n"
+    outbox.reply(message, text)
+
+# Общий профиль по всем чатам: свой или автора сообщения, на которое ответили
+@dp.message(Command("profile"))
+async def profile_command(message: types.Message):
+    user = message.reply_to_message.from_user if message.reply_to_message else message.from_user
+    profile = await user_manager.get_global_profile(user.id)
+    if profile is None:
+        outbox.reply(message, f"🌍 У {user.username or user.first_name} еще нет сыгранных партий")
+        return
+    
+    username, wins, losses, points, rank, chats, games = profile
+    text = f"🌍 **Профиль {username or user.first_name}**\n\n"
+    text += f"🏆 Побед: {wins}\n"
+    text += f"💀 Поражений: {losses}\n"
+    text += f"🎯 Очков: {points} (#{rank} среди всех игроков)\n"
+    text += f"💬 Чатов: {chats}\n\n"
+    text += "**По играм:**\n"
+    for game_type, game_wins, game_losses in games:
+        total = game_wins + game_losses
+        text += f"• {get_game_name(game_type)}: {game_wins}/{total} ({game_wins / total * 100 if total else 0:.1f}%)\n"
+    outbox.reply(message, text)
+
+# Метрики для администраторов
+@dp.message(Command("metrics"))
+async def metrics_command(message: types.Message):
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    
+    text = registry.summary() or "Метрик пока нет"
+    # Лимит Telegram на длину сообщения
+    outbox.reply(message, text[:4000])
+
+# Обработчики callback
+@dp.callback_query(F.data == "main_menu")
+async def main_menu(callback: types.CallbackQuery):
+    outbox.edit(callback.message, "🎮 **GameBot - Главное меню**", reply_markup=get_main_keyboard())
+
+@dp.callback_query(F.data == "select_game")
+async def select_game(callback: types.CallbackQuery):
+    outbox.edit(callback.message, "🎮 **Выбери игру:**", reply_markup=get_games_keyboard())
+
+@dp.callback_query(F.data.startswith("game_") & (F.data != "game_rules"))
+async def game_selected(callback: types.CallbackQuery):
+    game_type = callback.data.replace("game_", "")
+    
+    if game_type in GAME_TYPES:
+        outbox.edit(
+            callback.message,
+            f"🎮 **{get_game_name(game_type)}**\n\n"
+            f"💡 {get_game_description(game_type)}\n\n"
+            f"**Чтобы начать:**\n"
+            f"Ответь на сообщение соперника или найди случайного кнопкой ниже",
+            reply_markup=get_game_menu_keyboard(game_type)
+        )
+    else:
+        await callback.answer("❌ Игра не найдена!")
+
+@dp.message(F.text.contains("@"))
+async def handle_mention(message: types.Message):
+    # Обработка упоминаний для вызова на игру
+    if "игра" in message.text.lower() or "play" in message.text.lower():
+        mentioned_users = [entity for entity in message.entities if entity.type == "mention"]
+        if mentioned_users:
+            outbox.send(message.chat.id, "🎮 Выбери игру для вызова:", reply_markup=get_games_keyboard())
+
+# Запуск конкретной игры
+async def start_specific_game(message: types.Message, initiator: types.User, target: types.User, game_type: str, options=None):
+    if initiator.id == target.id:
+        outbox.reply(message, "❌ Нельзя играть с самим собой!")
+        return
+    
+    if target.is_bot:
+        # Ответ на сообщение самого бота - одиночная игра, если она поддерживается
+        if target.id == bot.id and GAME_TYPES[game_type].solo:
+            await start_solo_game(message, initiator, game_type, options)
+        else:
+            outbox.reply(message, "❌ Нельзя играть с ботом!")
+        return
+    
+    initiator_name = initiator.username or initiator.first_name
+    target_name = target.username or target.first_name
+    
+    game_id = game_manager.create_game(
+        game_type, message.chat.id, initiator.id, target.id, initiator_name, target_name, **(options or {})
+    )
+    user_manager.get_or_create_user(initiator.id, message.chat.id, initiator_name)
+    user_manager.get_or_create_user(target.id, message.chat.id, target_name)
+    
+    # Запускаем соответствующую игру
+    with GAME_SECONDS.time(f"{game_type}.start"):
+        await GAME_TYPES[game_type].start(game_context, message, game_id, game_manager.get_game(game_id))
+
+# Игра против бота
+@dp.callback_query(F.data.startswith("solo_"))
+async def solo_selected(callback: types.CallbackQuery):
+    game_type = callback.data.replace("solo_", "")
+    spec = GAME_TYPES.get(game_type)
+    if spec is None or not spec.solo:
+        await callback.answer("❌ Игра не найдена!")
+        return
+    
+    await callback.answer()
+    await start_solo_game(callback.message, callback.from_user, game_type)
+
+@dp.callback_query(F.data.startswith("find_"))
+async def find_selected(callback: types.CallbackQuery):
+    game_type = callback.data.replace("find_", "")
+    if game_type not in GAME_TYPES:
+        await callback.answer("❌ Игра не найдена!")
+        return
+    
+    await callback.answer()
+    await find_opponent(callback.message, callback.from_user, game_type)
+
+async def find_opponent(message: types.Message, player: types.User, game_type: str):
+    chat_id = message.chat.id
+    player_name = player.username or player.first_name
+    waiting = matchmaker.get(chat_id, player.id)
+    if waiting is not None and waiting.game_type == game_type:
+        outbox.send(chat_id, f"⏳ {player_name}, ты уже ищешь соперника. Отменить: /cancel")
+        return
+    
+    points = 0
+    if matchmaker.skill_band:
+        user_stats = await user_manager.get_user_stats(player.id, chat_id)
+        points = user_stats[3] if user_stats else 0
+    
+    opponent = matchmaker.find(chat_id, chat_id, player.id, player_name, game_type, points)
+    if opponent is None:
+        outbox.send(
+            chat_id,
+            f"🔍 {player_name} ищет соперника для игры {get_game_name(game_type)}.\n"
+            f"Напиши /find {game_type}, чтобы сыграть! Отменить поиск: /cancel"
+        )
+        return
+    
+    # Первым ходит тот, кто ждал дольше
+    game_id = game_manager.create_game(game_type, chat_id, opponent.user_id, player.id, opponent.name, player_name)
+    user_manager.get_or_create_user(opponent.user_id, chat_id, opponent.name)
+    user_manager.get_or_create_user(player.id, chat_id, player_name)
+    
+    with GAME_SECONDS.time(f"{game_type}.start"):
+        await GAME_TYPES[game_type].start(game_context, message, game_id, game_manager.get_game(game_id))
+
+async def start_solo_game(message: types.Message, player: types.User, game_type: str, options=None):
+    options = options or {}
+    error = GAME_TYPES[game_type].solo_error(options)
+    if error:
+        outbox.reply(message, error)
+        return
+    
+    player_name = player.username or player.first_name
+    game_id = game_manager.create_game(
+        game_type, message.chat.id, player.id, BOT_PLAYER_ID, player_name, BOT_PLAYER_NAME, **options
+    )
+    user_manager.get_or_create_user(player.id, message.chat.id, player_name)
+    
+    with GAME_SECONDS.time(f"{game_type}.start"):
+        await GAME_TYPES[game_type].start(game_context, message, game_id, game_manager.get_game(game_id))
+
+# Ходы в играх: callback_data "<действие>:<id>:<аргумент>" (см. minigames.codec) уходят в модуль игры
+@dp.callback_query(F.data.func(lambda data: action_of(data) in CALLBACK_PREFIXES))
+async def game_callback(callback: types.CallbackQuery):
+    # Повторная доставка того же нажатия ничего не меняет
+    if not seen_callbacks.check(callback.id):
+        return
+    
+    action, game_id, _ = unpack(callback.data)
+    spec = CALLBACK_PREFIXES[action]
+    async with game_manager.locks.hold(game_id):
+        with GAME_SECONDS.time(f"{spec.type}.on_callback"):
+            await spec.on_callback(game_context, callback)
+
+# Ответы числом (угадай число, быстрая математика)
+@dp.message(F.text & F.text.regexp(r'^-?\d+$'))
+async def handle_game_answer(message: types.Message):
+    # Игры в этом чате, где сейчас ход этого пользователя
+    turn_games = game_manager.get_turn_games(message.chat.id, message.from_user.id)
+    for game_id, game_type in list(turn_games.items()):
+        on_text = GAME_TYPES[game_type].on_text
+        if on_text is not None:
+            async with game_manager.locks.hold(game_id):
+                # Пока ждали блокировку, ход мог уйти или игра закончиться
+                if game_id in game_manager.get_turn_games(message.chat.id, message.from_user.id):
+                    with GAME_SECONDS.time(f"{game_type}.on_text"):
+                        await on_text(game_context, message, game_id, game_manager.get_game(game_id))
+            return
+    
+    raise SkipHandler()
+
+# Вспомогательные функции
+def get_game_name(game_type: str) -> str:
+    spec = GAME_TYPES.get(game_type)
+    return spec.name if spec else "Неизвестная игра"
+
+def get_game_description(game_type: str) -> str:
+    spec = GAME_TYPES.get(game_type)
+    return spec.description if spec else "Описание недоступно"
+
+# Статистика
+@dp.callback_query(F.data == "my_stats")
+async def my_stats(callback: types.CallbackQuery):
+    user_stats = await user_manager.get_user_stats(callback.from_user.id, callback.message.chat.id)
+    
+    if user_stats:
+        username, wins, losses, points = user_stats
+        
+        # Получаем статистику по играм
+        game_stats = await user_manager.get_all_game_stats(callback.from_user.id, callback.message.chat.id)
+        
+        text = f"📊 **Статистика {username}**\n\n"
+        text += f"🏆 Побед: {wins}\n"
+        text += f"💀 Поражений: {losses}\n" 
+        text += f"🎯 Очков: {points}\n\n"
+        
+        if game_stats:
+            text += "**Статистика по играм:**\n"
+            for game_type, game_wins, game_losses in game_stats:
+                game_name = get_game_name(game_type)
+                total = game_wins + game_losses
+                win_rate = (game_wins / total * 100) if total > 0 else 0
+                text += f"• {game_name}: {game_wins}/{total} ({win_rate:.1f}%)\n"
+        text += "\n🌍 Профиль по всем чатам: /profile"
+        
+        outbox.edit(callback.message, text, reply_markup=get_main_keyboard())
+    else:
+        outbox.edit(callback.message, "📊 Статистика не найдена. Сыграй в свою первую игру!", 
+                                       reply_markup=get_main_keyboard())
+
+@dp.callback_query(F.data == "top_players")
+async def top_players(callback: types.CallbackQuery):
+    top_users = await user_manager.get_top_players(callback.message.chat.id)
+    
+    if top_users:
+        text = "🏆 **Топ игроков чата:**\n\n"
+        for i, (username, wins, losses, points) in enumerate(top_users, 1):
+            text += f"{i}. {username} - {points} очков ({wins}🏆/{losses}💀)\n"
+    else:
+        text = "🏆 В этом чате еще нет игроков!\nСыграй в первую игру!"
+    text += "\n📅 За неделю и месяц: /top week, /top month\n📆 С начала месяца год назад: /top year\n🌍 По всем чатам: /top global\n📈 Рейтинг по играм: /rating тип_игры"
+    
+    outbox.edit(callback.message, text, reply_markup=get_main_keyboard())
+
+@dp.callback_query(F.data == "game_rules")
+async def game_rules(callback: types.CallbackQuery):
+    text = (
+        "📖 **Правила игр:**\n\n"
+        "🔫 **Русская рулетка:**\n"
+        "• 1 патрон в 6-зарядном револьвере\n"
+        "• Игроки по очереди стреляют в себя\n"
+        "• Проигрывает тот, в кого попадет патрон\n\n"
+        
+        "🎲 **Битва кубиков:**\n"
+        "• Каждый игрок бросает кубик 3 раза\n"
+        "• Суммируются результаты бросков\n"
+        "• Побеждает игрок с большей суммой\n"
+        "• Можно сыграть против бота (без очков)\n\n"
+        
+        "🔢 **Угадай число:**\n"
+        "• Загадано число от 1 до 100\n"
+        "• Игроки по очереди называют числа\n"
+        "• Получают подсказки 'больше/меньше'\n"
+        "• Побеждает угадавший число\n"
+        "• Можно сыграть против бота (без очков)\n\n"
+        
+        "⭕ **Крестики-нолики:**\n"
+        "• Классическая игра 3x3\n"
+        "• Собирай 3 в ряд по горизонтали, вертикали или диагонали\n"
+        "• Поле побольше: /play tic_tac_toe 8 5 - 8x8, 5 в ряд\n"
+        "• Можно сыграть против бота - он не ошибается (без очков)\n\n"
+        
+        "🧮 **Быстрая математика:**\n"
+        "• Решай простые математические примеры\n"
+        "• Первый до 3 правильных ответов побеждает\n"
+        "• Уровни: /play quick_math easy, normal, hard или expert\n"
+        "• Общий набор задач для турнира: /play quick_math hard турнир1\n\n"
+        
+        "🪙 **Бросок монеты:**\n"
+        "• Игроки выбирают сторону монеты\n"
+        "• Подбрасывается виртуальная монета\n"
+        "• Побеждает угадавший сторону"
+    )
+    
+    outbox.edit(callback.message, text, reply_markup=get_main_keyboard())
+
+# Запуск бота
+async def main():
+    logger.info("🚀 GameBot starting...")
+    
+    # Восстанавливаем игры, прерванные прошлым перезапуском
+    restored = await game_snapshotter.restore()
+    logger.info("♻️ Restored %d active games", restored)
+    game_snapshotter.start()
+    rollup_compactor.start()
+    metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT) if METRICS_PORT else None
+    
+    try:
+        if BOT_MODE == 'webhook':
+            await run_webhook(
+                dp, bot, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH,
+                url=WEBHOOK_URL, secret_token=WEBHOOK_SECRET, max_in_flight=WEBHOOK_MAX_IN_FLIGHT
+            )
+        else:
+            await dp.start_polling(bot)
+    finally:
+        # Останавливаем таймеры поиска и игр, досылаем исходящие сообщения,
+        # сохраняем игры и накопленную статистику, закрываем БД
+        await matchmaker.stop()
+        await game_manager.expiry.stop()
+        await outbox.close()
+        await game_snapshotter.stop()
+        await rollup_compactor.stop()
+        await user_manager.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+
+if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,221 @@
+# Нагрузочный тест бота целиком без сети: синтетические апдейты (много чатов, /play
+# ответом на сообщение, нажатия кнопок во всех шести играх, числа в угадайке и
+# математике) прогоняются через dp.feed_update, а Bot API подменен фейковой
+# сессией, которая только записывает запросы.
+#
+#   python benchmarks/bench_dispatcher.py --chats 200 --games 12
+#
+# Игроки в каждом чате играют партии по очереди, выбирая ходы по текущему
+# состоянию игры. Чаты работают параллельно, как при обычной нагрузке.
+# Отчет: игры и апдейты в секунду, p50/p99 времени обработки апдейта,
+# пиковая память процесса.
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import EditMessageText, SendMessage
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from minigames.codec import pack
+
+GAME_ORDER = ["russian_roulette", "dice_battle", "number_guess", "tic_tac_toe", "quick_math", "coin_flip"]
+
+
+class FakeSession(BaseSession):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.message_ids = itertools.count(1)
+    
+    async def make_request(self, bot, method, timeout=None):
+        self.calls += 1
+        if isinstance(method, (SendMessage, EditMessageText)):
+            return Message(
+                message_id=method.message_id if isinstance(method, EditMessageText) else next(self.message_ids),
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id, type="supergroup"),
+                text=method.text
+            )
+        return True
+    
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+    
+    async def close(self):
+        pass
+
+
+def peak_memory_mb():
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдает килобайты, macOS - байты
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Driver:
+    def __init__(self, bot_module, rng):
+        self.m = bot_module
+        self.rng = rng
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(10 ** 9)
+        self.callback_ids = itertools.count(1)
+        self.latencies = []
+        self.games = 0
+    
+    def user(self, user_id):
+        return User(id=user_id, is_bot=False, first_name=f"player{user_id}", username=f"player{user_id}")
+    
+    def message(self, chat_id, user_id, text, reply_to=None):
+        return Message(
+            message_id=next(self.message_ids),
+            date=datetime.now(),
+            chat=Chat(id=chat_id, type="supergroup"),
+            from_user=self.user(user_id) if user_id else None,
+            text=text,
+            reply_to_message=reply_to
+        )
+    
+    async def feed(self, update):
+        started = time.perf_counter()
+        await self.m.dp.feed_update(self.m.bot, update)
+        self.latencies.append(time.perf_counter() - started)
+    
+    async def send(self, chat_id, user_id, text, reply_to=None):
+        message = self.message(chat_id, user_id, text, reply_to)
+        await self.feed(Update(update_id=next(self.update_ids), message=message))
+    
+    async def press(self, chat_id, user_id, data, board):
+        callback = CallbackQuery(
+            id=str(next(self.callback_ids)),
+            from_user=self.user(user_id),
+            chat_instance=str(chat_id),
+            data=data,
+            message=board
+        )
+        await self.feed(Update(update_id=next(self.update_ids), callback_query=callback))
+    
+    async def play(self, chat_id, players, game_type):
+        m = self.m
+        challenger, opponent = players
+        target = self.message(chat_id, opponent, "го играть")
+        await self.send(chat_id, challenger, f"/play {game_type}", reply_to=target)
+        
+        game_ids = m.game_manager.get_chat_games(chat_id)
+        if not game_ids:
+            return
+        game_id = next(iter(game_ids))
+        board = self.message(chat_id, None, "board")
+        lo, hi = 1, 100
+        
+        # Ходы до конца партии; лимит на случай зависшей игры
+        for _ in range(500):
+            game = m.game_manager.get_game(game_id)
+            if game is None:
+                break
+            await asyncio.sleep(0)
+            
+            if game_type == "coin_flip":
+                slot = 0 if game.choices[0] == 0 else 1
+                side = self.rng.choice("ht")
+                await self.press(chat_id, game.player_ids[slot], pack("cf", game_id, side), board)
+            elif game_type == "russian_roulette":
+                await self.press(chat_id, game.current_player, pack("rr", game_id), board)
+            elif game_type == "dice_battle":
+                await self.press(chat_id, game.current_player, pack("db", game_id), board)
+            elif game_type == "tic_tac_toe":
+                cell = self.rng.choice([cell for cell in range(9) if game.is_free(cell)])
+                await self.press(chat_id, game.current_player, pack("ttt", game_id, cell), board)
+            elif game_type == "number_guess":
+                guess = (lo + hi) // 2
+                if guess < game.target_number:
+                    lo = guess + 1
+                elif guess > game.target_number:
+                    hi = guess - 1
+                await self.send(chat_id, game.current_player, str(guess))
+            elif game_type == "quick_math":
+                answer = game.answer if self.rng.random() < 0.8 else game.answer + 1
+                await self.send(chat_id, game.current_player, str(answer))
+        
+        self.games += 1
+    
+    async def run_chat(self, index, games):
+        chat_id = -(10 ** 12) - index
+        players = (index * 2 + 1, index * 2 + 2)
+        await self.send(chat_id, players[0], "/start")
+        for number in range(games):
+            game_type = GAME_ORDER[(index + number) % len(GAME_ORDER)]
+            await self.play(chat_id, players if number % 2 == 0 else players[::-1], game_type)
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(args):
+    import MiniGamesTelegramBot as m
+    
+    session = FakeSession()
+    m.bot.session = session
+    driver = Driver(m, random.Random(args.seed))
+    
+    # Прогрев: первые апдейты достраивают pydantic-модели aiogram, в замер это не входит
+    await asyncio.gather(*(driver.run_chat(args.chats + index, len(GAME_ORDER)) for index in range(2)))
+    driver.latencies.clear()
+    driver.games = 0
+    session.calls = 0
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(driver.run_chat(index, args.games) for index in range(args.chats)))
+    handled = time.perf_counter() - started
+    
+    await m.outbox.close(timeout=60)
+    await m.user_manager.close()
+    elapsed = time.perf_counter() - started
+    
+    latencies = sorted(driver.latencies)
+    print(f"chats: {args.chats}, games: {driver.games}, updates: {len(latencies)}, api calls: {session.calls}")
+    print(f"handling: {handled:.2f} s, with outbox and stats flush: {elapsed:.2f} s")
+    print(f"throughput: {driver.games / handled:,.0f} games/s, {len(latencies) / handled:,.0f} updates/s")
+    print(f"handler latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p99: {percentile(latencies, 0.99) * 1000:.2f} ms, "
+          f"max: {latencies[-1] * 1000:.2f} ms")
+    print(f"peak memory: {peak_memory_mb():.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--games", type=int, default=12, help="партий на чат")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--real-limits", action="store_true",
+                        help="оставить лимиты Telegram в очереди отправки (по умолчанию сняты)")
+    args = parser.parse_args()
+    
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp()
+    os.environ.setdefault("BOT_TOKEN", "123456:offline-benchmark")
+    os.environ["DB_PATH"] = os.path.join(workdir, "bench.db")
+    
+    if not args.real_limits:
+        import minigames.outbox as outbox
+        outbox.PRIVATE_RATE = outbox.GLOBAL_RATE = 1e9
+        outbox.PRIVATE_BURST = outbox.GLOBAL_BURST = outbox.GROUP_LIMIT = 1e9
+    
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
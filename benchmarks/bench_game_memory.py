@@ -0,0 +1,106 @@
+# Память на одну живую игру для каждого типа: slotted-классы из minigames.games
+# против прежних вложенных словарей.
+#
+#   python benchmarks/bench_game_memory.py --games 20000
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from minigames.games import GAME_TYPES
+
+
+# Прежнее представление игры из GameManager.create_game
+def legacy_game(game_type, chat_id, player1_id, player2_id, player1_name, player2_name):
+    game = {'type': game_type, 'chat_id': chat_id, 'created_at': datetime.now()}
+    if game_type == "russian_roulette":
+        game['players'] = {
+            player1_id: {'name': player1_name, 'alive': True, 'turn': True},
+            player2_id: {'name': player2_name, 'alive': True, 'turn': False}
+        }
+        game['revolver'] = [False] * 6
+        game['revolver'][random.randint(0, 5)] = True
+        game['current_chamber'] = 0
+    elif game_type == "dice_battle":
+        game['players'] = {
+            player1_id: {'name': player1_name, 'score': 0, 'rolls_left': 3},
+            player2_id: {'name': player2_name, 'score': 0, 'rolls_left': 3}
+        }
+        game['current_player'] = player1_id
+    elif game_type == "number_guess":
+        game['players'] = {
+            player1_id: {'name': player1_name, 'attempts': 0},
+            player2_id: {'name': player2_name, 'attempts': 0}
+        }
+        game['target_number'] = random.randint(1, 100)
+        game['current_player'] = player1_id
+    elif game_type == "tic_tac_toe":
+        game['players'] = {
+            player1_id: {'name': player1_name, 'symbol': '❌'},
+            player2_id: {'name': player2_name, 'symbol': '⭕'}
+        }
+        game['board'] = ['⬜'] * 9
+        game['current_player'] = player1_id
+    elif game_type == "quick_math":
+        num1, num2 = random.randint(1, 20), random.randint(1, 20)
+        game['players'] = {
+            player1_id: {'name': player1_name, 'score': 0},
+            player2_id: {'name': player2_name, 'score': 0}
+        }
+        game['problem'] = f"{num1} + {num2}"
+        game['answer'] = num1 + num2
+        game['current_player'] = player1_id
+    elif game_type == "coin_flip":
+        game['players'] = {
+            player1_id: {'name': player1_name, 'choice': None},
+            player2_id: {'name': player2_name, 'choice': None}
+        }
+        game['result'] = None
+    return game
+
+
+def measure(factory, game_type, count):
+    # Id и имена игроков создаются заранее: они живут в боте и без игры
+    players = [
+        (-1001000000000 - i, 100000000 + 2 * i, 100000001 + 2 * i, f"player{2 * i}", f"player{2 * i + 1}")
+        for i in range(count)
+    ]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = [factory(game_type, *args) for args in players]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Сам список ссылок на игры не считаем
+    list_size = sys.getsizeof(games)
+    del games
+    return (after - before - list_size) / count
+
+
+def slotted_game(game_type, *args):
+    return GAME_TYPES[game_type].create_state(*args)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--games', type=int, default=20000)
+    args = parser.parse_args()
+    
+    # Модули игр грузятся лениво - импортируем заранее, чтобы не считать их код
+    for spec in GAME_TYPES.values():
+        spec.module
+    
+    print(f"{'game type':<18} {'dict (old)':>12} {'slots':>10} {'ratio':>7}")
+    for game_type in GAME_TYPES:
+        legacy = measure(legacy_game, game_type, args.games)
+        slotted = measure(slotted_game, game_type, args.games)
+        print(f"{game_type:<18} {legacy:>10.0f} B {slotted:>8.0f} B {legacy / slotted:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# Общий топ и профиль по всем чатам: готовая таблица global_stats против
+# GROUP BY по users на каждый запрос, плюс время полной пересборки.
+#
+#   python benchmarks/bench_global_stats.py --users 200000 --chats-per-user 3
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from minigames import global_stats
+
+GAME_TYPES = ["russian_roulette", "dice_battle", "number_guess", "tic_tac_toe", "quick_math", "coin_flip"]
+
+
+def create_db(path, args, rng):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('''
+        CREATE TABLE users (
+            user_id INTEGER, chat_id INTEGER, username TEXT,
+            wins INTEGER DEFAULT 0, losses INTEGER DEFAULT 0, points INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, chat_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE game_stats (
+            user_id INTEGER, chat_id INTEGER, game_type TEXT,
+            wins INTEGER DEFAULT 0, losses INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, chat_id, game_type)
+        )
+    ''')
+    users = []
+    games = []
+    for user_id in range(1, args.users + 1):
+        for chat_id in rng.sample(range(args.chats), rng.randint(1, 2 * args.chats_per_user - 1)):
+            wins = losses = 0
+            for game_type in rng.sample(GAME_TYPES, 3):
+                game_wins, game_losses = rng.randint(0, 30), rng.randint(0, 30)
+                games.append((user_id, chat_id, game_type, game_wins, game_losses))
+                wins += game_wins
+                losses += game_losses
+            users.append((user_id, chat_id, f"user{user_id}", wins, losses, wins - losses))
+    conn.executemany('INSERT INTO users VALUES (?, ?, ?, ?, ?, ?)', users)
+    conn.executemany('INSERT INTO game_stats VALUES (?, ?, ?, ?, ?)', games)
+    conn.commit()
+    return conn, len(users)
+
+
+def group_by_top(conn, limit=10):
+    # Топ без global_stats: полный проход users на каждый запрос
+    return conn.execute(
+        '''SELECT MIN(username), SUM(wins), SUM(losses), SUM(points) AS total FROM users
+        GROUP BY user_id HAVING SUM(wins) + SUM(losses) > 0 ORDER BY total DESC LIMIT ?''',
+        (limit,)
+    ).fetchall()
+
+
+def measure(func, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--chats", type=int, default=5000)
+    parser.add_argument("--chats-per-user", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    
+    conn, rows = create_db(os.path.join(tempfile.mkdtemp(), "global.db"), args, rng)
+    print(f"users: {args.users} players, {rows} per-chat rows")
+    
+    conn.execute(global_stats.SCHEMA)
+    conn.execute(global_stats.INDEX)
+    started = time.perf_counter()
+    players = global_stats.rebuild(conn)
+    print(f"rebuild: {players} global rows in {time.perf_counter() - started:.2f} s")
+    assert [row[3] for row in global_stats.top(conn)] == [row[3] for row in group_by_top(conn)]
+    
+    print(f"top, GROUP BY users:  {measure(group_by_top, 3, conn):9.3f} ms")
+    print(f"top, global_stats:    {measure(global_stats.top, args.repeat, conn):9.3f} ms")
+    user_ids = [rng.randint(1, args.users) for _ in range(args.repeat)]
+    timings = [measure(global_stats.profile, 1, conn, user_id) for user_id in user_ids]
+    print(f"profile, global_stats: {statistics.median(timings):8.3f} ms (median of {len(timings)} players)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# Скорость журнала партий: запись пакетами и потоковый повтор через логику игр.
+#
+#   python benchmarks/bench_replay.py --matches 1000000
+#
+# Партии всех шести игр играются случайными ходами прямо на объектах состояния
+# (ходы пишутся в game.moves так же, как в боте), складываются в match_log
+# временной БД через MatchLog.write_batch, затем читаются iter_matches и
+# повторяются minigames.replay.replay с проверкой исхода.
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from minigames.games import GAME_TYPES
+from minigames.games.base import DRAW
+from minigames.games.coin_flip import SIDES
+from minigames.games.number_guess import bot_guess
+from minigames.games.quick_math import WIN_SCORE
+from minigames.match_log import SCHEMA, MatchLog, iter_matches
+from minigames.replay import expected, replay
+
+
+def play_russian_roulette(game, rng):
+    while not game.shoot():
+        game.pass_turn()
+    return game.turn ^ 1
+
+
+def play_dice_battle(game, rng):
+    for slot in (0, 1):
+        while game.rolls_left[slot]:
+            game.roll(slot, rng.randint(1, 6))
+        game.pass_turn()
+    return game.winner()
+
+
+def play_number_guess(game, rng):
+    while not game.guess(game.turn, bot_guess(game.low, game.high, 0.5, rng)):
+        game.pass_turn()
+    return game.turn
+
+
+def play_tic_tac_toe(game, rng):
+    cells = list(range(game.size * game.size))
+    rng.shuffle(cells)
+    for cell in cells:
+        slot = game.turn
+        game.place(slot, cell)
+        if game.is_win_at(slot, cell):
+            return slot
+        game.pass_turn()
+    return DRAW
+
+
+def play_quick_math(game, rng):
+    while True:
+        slot = game.turn
+        answer = game.answer if rng.random() < 0.7 else game.answer + 1
+        if game.submit(slot, answer):
+            if game.scores[slot] >= WIN_SCORE:
+                return slot
+            game.next_problem()
+        game.pass_turn()
+
+
+def play_coin_flip(game, rng):
+    game.choose(0, rng.choice(SIDES))
+    game.choose(1, rng.choice(SIDES))
+    return game.winner(game.flip())
+
+
+PLAYERS = {
+    'russian_roulette': play_russian_roulette,
+    'dice_battle': play_dice_battle,
+    'number_guess': play_number_guess,
+    'tic_tac_toe': play_tic_tac_toe,
+    'quick_math': play_quick_math,
+    'coin_flip': play_coin_flip,
+}
+
+
+def generate(conn, matches, rng, batch_size=10000):
+    types = list(PLAYERS)
+    log = MatchLog(storage=None)
+    for number in range(matches):
+        game_type = types[number % len(types)]
+        game = GAME_TYPES[game_type].create_state(-number % 1000, 2 * number + 1, 2 * number + 2, "", "")
+        log.append(game, PLAYERS[game_type](game, rng))
+        if len(log.pending) >= batch_size:
+            MatchLog.write_batch(conn, log.pending)
+            log.pending = []
+    MatchLog.write_batch(conn, log.pending)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--matches", type=int, default=300_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    rng = random.Random(args.seed)
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "replay.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(SCHEMA)
+    for spec in GAME_TYPES.values():
+        spec.module
+    
+    started = time.perf_counter()
+    generate(conn, args.matches, rng)
+    elapsed = time.perf_counter() - started
+    size = sum(os.path.getsize(path) for path in (db_path, db_path + "-wal") if os.path.exists(path))
+    print(f"generated and logged {args.matches} matches: {args.matches / elapsed:,.0f} matches/s, "
+          f"{size / args.matches:.0f} bytes per match")
+    
+    started = time.perf_counter()
+    replayed = mismatches = moves = 0
+    for match in iter_matches(conn):
+        replayed += 1
+        moves += len(match.moves) // 2
+        if replay(match) != expected(match):
+            mismatches += 1
+    elapsed = time.perf_counter() - started
+    print(f"replayed {replayed} matches ({moves} moves) in {elapsed:.2f} s: "
+          f"{replayed / elapsed:,.0f} matches/s, {moves / elapsed:,.0f} moves/s")
+    print(f"mismatches: {mismatches}")
+    print(f"1M matches would take ~{1_000_000 / (replayed / elapsed):.0f} s to replay")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Топ за период по корзинам stats_rollup на чатах с многолетней историей.
+#
+#   python benchmarks/bench_rollups.py --chats 20 --days 1095
+#
+# История пишется по дням через StatsWriter.write_batch (как в боте), старые дневные
+# корзины сжимаются в месячные раз в 30 дней (как RollupCompactor), затем замеряется
+# window_stats за день, неделю, месяц и год - по всем играм и по одной игре.
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from minigames.global_stats import SCHEMA as GLOBAL_SCHEMA
+from minigames.rollups import DAILY, DAY_RETENTION, MONTHLY, SCHEMA, WINDOWS, compact, window_start, window_stats
+from minigames.stats_writer import StatsWriter
+
+GAME_TYPES = ["russian_roulette", "dice_battle", "number_guess", "tic_tac_toe", "quick_math", "coin_flip"]
+
+
+def create_db(path, users, chats):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('''
+        CREATE TABLE users (
+            user_id INTEGER, chat_id INTEGER, username TEXT,
+            wins INTEGER DEFAULT 0, losses INTEGER DEFAULT 0, points INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, chat_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE game_stats (
+            user_id INTEGER, chat_id INTEGER, game_type TEXT,
+            wins INTEGER DEFAULT 0, losses INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, chat_id, game_type)
+        )
+    ''')
+    conn.execute(GLOBAL_SCHEMA)
+    conn.execute(SCHEMA)
+    conn.executemany(
+        'INSERT INTO users (user_id, chat_id, username) VALUES (?, ?, ?)',
+        [(user_id, chat_id, f"user{user_id}") for chat_id in range(chats) for user_id in range(users)]
+    )
+    conn.commit()
+    return conn
+
+
+def generate(conn, args, rng):
+    first_day = 20000
+    results = 0
+    for day in range(first_day, first_day + args.days):
+        writer = StatsWriter(storage=None)
+        for chat_id in range(args.chats):
+            for _ in range(args.games_per_day):
+                game_type = rng.choice(GAME_TYPES)
+                winner, loser = rng.sample(range(args.users), 2)
+                writer.add(winner, chat_id, game_type, True)
+                writer.add(loser, chat_id, game_type, False)
+                results += 2
+        StatsWriter.write_batch(conn, writer.take_batch(), day)
+        if (day - first_day) % 30 == 29:
+            compact(conn, day - DAY_RETENTION)
+    return first_day + args.days - 1, results
+
+
+def measure(conn, chats, since_day, since_month, game_type, repeat):
+    timings = []
+    for _ in range(repeat):
+        for chat_id in range(chats):
+            started = time.perf_counter()
+            window_stats(conn, chat_id, since_day, game_type, since_month)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    return statistics.median(timings) * 1000, timings[int(len(timings) * 0.99)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--days", type=int, default=1095)
+    parser.add_argument("--games-per-day", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    
+    conn = create_db(os.path.join(tempfile.mkdtemp(), "rollups.db"), args.users, args.chats)
+    started = time.perf_counter()
+    last_day, results = generate(conn, args, rng)
+    elapsed = time.perf_counter() - started
+    daily, monthly = (
+        conn.execute('SELECT COUNT(*) FROM stats_rollup WHERE period = ?', (period,)).fetchone()[0]
+        for period in (DAILY, MONTHLY)
+    )
+    print(f"wrote {results} results over {args.days} days in {args.chats} chats in {elapsed:.1f} s")
+    print(f"stats_rollup: {daily} daily rows, {monthly} monthly rows")
+    
+    for key, (days, _) in WINDOWS.items():
+        since_day, since_month = window_start(days, last_day)
+        for game_type in (None, "tic_tac_toe"):
+            median, p99 = measure(conn, args.chats, since_day, since_month, game_type, args.repeat)
+            print(f"/top {key} {game_type or '':12} median {median:.3f} ms, p99 {p99:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
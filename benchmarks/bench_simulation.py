@@ -0,0 +1,54 @@
+# Скорость пакетной симуляции партий (NumPy) и калибровка ботов.
+#
+#   python benchmarks/bench_simulation.py --games 1000000
+#
+# Печатает число симулированных партий в секунду, сравнение "Битвы кубиков" с точным
+# распределением, долю побед бота в "Угадай число" при разной силе и проверку
+# random.randint хи-квадратом.
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from minigames import simulation
+from minigames.games.number_guess import BOT_BISECT_RATE
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    
+    (win, draw, loss), elapsed = timed(simulation.dice_battle, args.games, rng)
+    exact = simulation.dice_battle_exact()
+    print(f"dice_battle: {args.games / elapsed:,.0f} games/s")
+    print(f"  simulated first/draw/second: {win:.4f} / {draw:.4f} / {loss:.4f}")
+    print(f"  exact     first/draw/second: {exact[0]:.4f} / {exact[1]:.4f} / {exact[2]:.4f}")
+    
+    (first_wins, moves), elapsed = timed(simulation.number_guess, args.games, 1.0, BOT_BISECT_RATE, rng)
+    print(f"number_guess: {args.games / elapsed:,.0f} games/s, {moves:.2f} moves per game")
+    print(f"  bot (bisect rate {BOT_BISECT_RATE}) wins {1 - first_wins:.1%} against a binary-searching player")
+    
+    rates = (0.0, 0.2, 0.4, 0.5, 0.6, 0.7, 0.8, 1.0)
+    calibration = simulation.calibrate_number_guess(rates, min(args.games, 200_000), rng)
+    print("  bot bisect rate -> bot win rate: " + ", ".join(f"{rate}: {wins:.1%}" for rate, wins in calibration.items()))
+    
+    (chi2, freedom, frequencies), elapsed = timed(simulation.randint_fairness, min(args.games, 1_000_000))
+    print(f"random.randint(1, 6): chi2 = {chi2:.2f} at {freedom} degrees of freedom (11.07 is the 5% critical value)")
+    print("  frequencies: " + " ".join(f"{value:.4f}" for value in frequencies))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# Сравнение скорости записи статистики: старый update_stats (UPDATE + INSERT OR REPLACE
+# + commit на каждого игрока) против пакетного StatsWriter.
+#
+#   python benchmarks/bench_stats_writer.py --games 2000
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from minigames.global_stats import SCHEMA as GLOBAL_SCHEMA
+from minigames.rollups import SCHEMA as ROLLUP_SCHEMA
+from minigames.stats_writer import StatsWriter
+from minigames.storage import Storage
+
+GAME_TYPES = ["russian_roulette", "dice_battle", "number_guess", "tic_tac_toe", "quick_math", "coin_flip"]
+
+
+def create_db(path, users, chats):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('''
+        CREATE TABLE users (
+            user_id INTEGER, chat_id INTEGER, username TEXT,
+            wins INTEGER DEFAULT 0, losses INTEGER DEFAULT 0, points INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, chat_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE game_stats (
+            user_id INTEGER, chat_id INTEGER, game_type TEXT,
+            wins INTEGER DEFAULT 0, losses INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, chat_id, game_type)
+        )
+    ''')
+    conn.execute(GLOBAL_SCHEMA)
+    conn.execute(ROLLUP_SCHEMA)
+    conn.executemany(
+        'INSERT INTO users (user_id, chat_id, username) VALUES (?, ?, ?)',
+        [(user_id, chat_id, f"user{user_id}") for chat_id in range(chats) for user_id in range(users)]
+    )
+    conn.commit()
+    return conn
+
+
+# Прежняя реализация UserManager.update_stats
+def legacy_update_stats(conn, user_id, chat_id, game_type, won=True):
+    cursor = conn.cursor()
+    if won:
+        cursor.execute(
+            'UPDATE users SET wins = wins + 1, points = points + 1 WHERE user_id = ? AND chat_id = ?',
+            (user_id, chat_id)
+        )
+        cursor.execute(
+            '''INSERT OR REPLACE INTO game_stats
+            (user_id, chat_id, game_type, wins, losses)
+            VALUES (?, ?, ?, COALESCE((SELECT wins FROM game_stats WHERE user_id = ? AND chat_id = ? AND game_type = ?), 0) + 1,
+            COALESCE((SELECT losses FROM game_stats WHERE user_id = ? AND chat_id = ? AND game_type = ?), 0))''',
+            (user_id, chat_id, game_type, user_id, chat_id, game_type, user_id, chat_id, game_type)
+        )
+    else:
+        cursor.execute(
+            'UPDATE users SET losses = losses + 1, points = points - 1 WHERE user_id = ? AND chat_id = ?',
+            (user_id, chat_id)
+        )
+        cursor.execute(
+            '''INSERT OR REPLACE INTO game_stats
+            (user_id, chat_id, game_type, wins, losses)
+            VALUES (?, ?, ?, COALESCE((SELECT wins FROM game_stats WHERE user_id = ? AND chat_id = ? AND game_type = ?), 0),
+            COALESCE((SELECT losses FROM game_stats WHERE user_id = ? AND chat_id = ? AND game_type = ?), 0) + 1)''',
+            (user_id, chat_id, game_type, user_id, chat_id, game_type, user_id, chat_id, game_type)
+        )
+    conn.commit()
+
+
+def make_results(games, users, chats, seed):
+    rng = random.Random(seed)
+    results = []
+    for _ in range(games):
+        chat_id = rng.randrange(chats)
+        winner, loser = rng.sample(range(users), 2)
+        results.append((chat_id, winner, loser, rng.choice(GAME_TYPES)))
+    return results
+
+
+def bench_legacy(conn, results):
+    start = time.perf_counter()
+    for chat_id, winner, loser, game_type in results:
+        legacy_update_stats(conn, winner, chat_id, game_type, won=True)
+        legacy_update_stats(conn, loser, chat_id, game_type, won=False)
+    return time.perf_counter() - start
+
+
+async def bench_writer(db_path, results, max_pending):
+    storage = Storage(db_path)
+    writer = StatsWriter(storage, max_pending=max_pending)
+    start = time.perf_counter()
+    for i, (chat_id, winner, loser, game_type) in enumerate(results):
+        writer.add(winner, chat_id, game_type, won=True)
+        writer.add(loser, chat_id, game_type, won=False)
+        # Отдаем управление фоновому сбросу, как между апдейтами в боте
+        if i % 100 == 0:
+            await asyncio.sleep(0)
+    await writer.close()
+    elapsed = time.perf_counter() - start
+    await storage.close()
+    return elapsed
+
+
+def totals(conn):
+    return (
+        conn.execute('SELECT SUM(wins), SUM(losses), SUM(points) FROM users').fetchone(),
+        conn.execute('SELECT SUM(wins), SUM(losses) FROM game_stats').fetchone(),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--chats', type=int, default=20)
+    parser.add_argument('--max-pending', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    
+    results = make_results(args.games, args.users, args.chats, args.seed)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_conn = create_db(os.path.join(tmp, 'legacy.db'), args.users, args.chats)
+        writer_path = os.path.join(tmp, 'writer.db')
+        create_db(writer_path, args.users, args.chats).close()
+        
+        legacy_time = bench_legacy(legacy_conn, results)
+        writer_time = asyncio.run(bench_writer(writer_path, results, args.max_pending))
+        
+        writer_conn = sqlite3.connect(writer_path)
+        if totals(legacy_conn) != totals(writer_conn):
+            print("❌ Итоговая статистика не совпадает!")
+            sys.exit(1)
+        
+        legacy_conn.close()
+        writer_conn.close()
+    
+    print(f"games: {args.games}, users: {args.users}, chats: {args.chats}")
+    print(f"before (update_stats x2 + commit): {args.games / legacy_time:12.0f} games/s")
+    print(f"after  (StatsWriter, batch {args.max_pending}): {args.games / writer_time:12.0f} games/s")
+    print(f"speedup: {legacy_time / writer_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+# Регистрация игроков при старте игры: прежний get_or_create_user (SELECT, для
+# новых еще INSERT + commit в потоке Storage на каждый вызов) против UserCache
+# с записью новых строк пакетом StatsWriter.
+#
+#   python benchmarks/bench_user_cache.py --games 20000
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from minigames.global_stats import SCHEMA as GLOBAL_SCHEMA
+from minigames.rollups import SCHEMA as ROLLUP_SCHEMA
+from minigames.stats_writer import StatsWriter
+from minigames.storage import Storage
+from minigames.user_cache import UserCache
+
+
+def create_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE users (
+            user_id INTEGER, chat_id INTEGER, username TEXT,
+            wins INTEGER DEFAULT 0, losses INTEGER DEFAULT 0, points INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, chat_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE game_stats (
+            user_id INTEGER, chat_id INTEGER, game_type TEXT,
+            wins INTEGER DEFAULT 0, losses INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, chat_id, game_type)
+        )
+    ''')
+    conn.execute(GLOBAL_SCHEMA)
+    conn.execute(ROLLUP_SCHEMA)
+    conn.commit()
+    conn.close()
+
+
+# Прежняя реализация UserManager._get_or_create_user
+def legacy_get_or_create_user(conn, user_id, chat_id, username):
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM users WHERE user_id = ? AND chat_id = ?', (user_id, chat_id))
+    user = cursor.fetchone()
+    if not user:
+        cursor.execute(
+            'INSERT INTO users (user_id, chat_id, username) VALUES (?, ?, ?)',
+            (user_id, chat_id, username)
+        )
+        conn.commit()
+    return user
+
+
+def make_players(games, users, chats, rename_rate, seed):
+    # Активность игроков неравномерна: немногие играют много (распределение Парето)
+    rng = random.Random(seed)
+    players = []
+    for _ in range(games):
+        chat_id = rng.randrange(chats)
+        for _ in range(2):
+            user_id = min(int(rng.paretovariate(1.2)), users)
+            suffix = "_new" if rng.random() < rename_rate else ""
+            players.append((user_id, chat_id, f"user{user_id}{suffix}"))
+    return players
+
+
+async def bench_legacy(db_path, players):
+    storage = Storage(db_path)
+    started = time.perf_counter()
+    for user_id, chat_id, username in players:
+        await storage.run(legacy_get_or_create_user, user_id, chat_id, username)
+    elapsed = time.perf_counter() - started
+    await storage.close()
+    return elapsed
+
+
+async def bench_cache(db_path, players):
+    storage = Storage(db_path)
+    writer = StatsWriter(storage)
+    cache = UserCache()
+    started = time.perf_counter()
+    for i, (user_id, chat_id, username) in enumerate(players):
+        if cache.check(user_id, chat_id, username):
+            writer.add_user(user_id, chat_id, username)
+        # Отдаем управление фоновому сбросу, как между апдейтами в боте
+        if i % 100 == 0:
+            await asyncio.sleep(0)
+    await writer.close()
+    elapsed = time.perf_counter() - started
+    await storage.close()
+    return elapsed, cache
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--rename-rate", type=float, default=0.001)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    players = make_players(args.games, args.users, args.chats, args.rename_rate, args.seed)
+    workdir = tempfile.mkdtemp()
+    legacy_path = os.path.join(workdir, "legacy.db")
+    cache_path = os.path.join(workdir, "cache.db")
+    create_db(legacy_path)
+    create_db(cache_path)
+    
+    legacy = asyncio.run(bench_legacy(legacy_path, players))
+    cached, cache = asyncio.run(bench_cache(cache_path, players))
+    rows = [sqlite3.connect(path).execute('SELECT COUNT(*) FROM users').fetchone()[0] for path in (legacy_path, cache_path)]
+    
+    print(f"games: {args.games}, lookups: {len(players)}, users rows: {rows[0]} / {rows[1]}")
+    print(f"before (SELECT per call + INSERT):  {args.games / legacy:9.0f} games/s")
+    print(f"after  (UserCache + StatsWriter):   {args.games / cached:9.0f} games/s")
+    print(f"speedup: {legacy / cached:.1f}x")
+    print(f"cache: hit rate {cache.hit_rate():.1%}, {cache.hits} hits, {cache.misses} misses, "
+          f"{cache.renames} renames; storage round trips {len(players)} -> 0 on the game path, "
+          f"rows written {cache.misses + cache.renames}")
+
+
+if __name__ == "__main__":
+    main()
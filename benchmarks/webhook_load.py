@@ -0,0 +1,95 @@
+# Нагрузочный тест webhook-режима: отправляет записанные апдейты (JSON по строке на апдейт)
+# на локальный сервер и считает пропускную способность и задержки ответов.
+#
+#   BOT_MODE=webhook WEBHOOK_SECRET=s python MiniGamesTelegramBot.py
+#   python benchmarks/webhook_load.py updates.jsonl --secret s --concurrency 50 --repeat 10
+#
+# Без файла апдейтов генерируются команды /start из разных чатов.
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def load_updates(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_updates(count):
+    now = int(time.time())
+    return [
+        {
+            "update_id": i,
+            "message": {
+                "message_id": i,
+                "date": now,
+                "chat": {"id": -1000 - i % 100, "type": "supergroup"},
+                "from": {"id": 1 + i % 500, "is_bot": False, "first_name": f"u{i % 500}"},
+                "text": "/start",
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(url, updates, concurrency, secret):
+    queue = asyncio.Queue()
+    for i, update in enumerate(updates):
+        queue.put_nowait(dict(update, update_id=i + 1))
+    
+    latencies = []
+    errors = 0
+    headers = {SECRET_HEADER: secret} if secret else {}
+    
+    async def worker(session):
+        nonlocal errors
+        while not queue.empty():
+            update = queue.get_nowait()
+            started = time.perf_counter()
+            async with session.post(url, json=update, headers=headers) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append(time.perf_counter() - started)
+    
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    print(f"requests: {len(latencies)}, errors: {errors}, time: {elapsed:.2f} s")
+    print(f"throughput: {len(latencies) / elapsed:,.0f} req/s")
+    print(f"latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p99: {percentile(latencies, 0.99) * 1000:.2f} ms, "
+          f"max: {latencies[-1] * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("updates", nargs="?", help="файл с апдейтами в формате JSON lines")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/webhook")
+    parser.add_argument("--secret", default=None)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--count", type=int, default=5000, help="число синтетических апдейтов")
+    args = parser.parse_args()
+    
+    updates = load_updates(args.updates) if args.updates else synthetic_updates(args.count)
+    asyncio.run(run(args.url, updates * args.repeat, args.concurrency, args.secret))
+
+
+if __name__ == "__main__":
+    main()
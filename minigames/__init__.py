@@ -0,0 +1 @@
+# Вспомогательные модули GameBot: таймеры, хранилище, кодеки и т.д.
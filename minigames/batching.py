@@ -0,0 +1,55 @@
+import abc
+import asyncio
+
+
+# Фоновый сброс накопленных записей в БД: по таймеру flush_interval или сразу,
+# когда очередь дорастает до max_pending. Общая часть StatsWriter, MatchLog и
+# Ratings; подкласс хранит очередь сам и реализует flush().
+class BatchWriter(abc.ABC):
+    def __init__(self, storage, max_pending=500, flush_interval=1.0):
+        self.storage = storage
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._wakeup = None
+        self._task = None
+    
+    @abc.abstractmethod
+    async def flush(self):
+        pass
+    
+    def _queued(self, size):
+        # Вызывается после добавления в очередь; size - ее текущий размер
+        self._ensure_running()
+        if size >= self.max_pending and self._wakeup is not None:
+            self._wakeup.set()
+    
+    def _ensure_running(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Нет event loop - очередь сбросит явный flush() или close()
+            return
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+    
+    async def _run(self):
+        # Задача завершается сама, когда close() снимает ее с self._task.
+        # cancel() здесь не используется: на 3.11 wait_for может проглотить отмену,
+        # пришедшую вместе с пробуждением, а отмена посреди flush() теряла бы пакет
+        while self._task is asyncio.current_task():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+    
+    async def close(self):
+        # Дожидаемся текущего сброса и сбрасываем остаток
+        task, self._task = self._task, None
+        if task is not None:
+            self._wakeup.set()
+            await task
+        await self.flush()
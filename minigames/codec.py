@@ -0,0 +1,68 @@
+import time
+
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(ALPHABET)
+DIGITS = {char: value for value, char in enumerate(ALPHABET)}
+SEPARATOR = ':'
+
+
+def encode_id(value):
+    if value == 0:
+        return ALPHABET[0]
+    chars = []
+    while value:
+        value, digit = divmod(value, BASE)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def decode_id(text):
+    value = 0
+    for char in text:
+        value = value * BASE + DIGITS[char]
+    return value
+
+
+# Id игр - возрастающий счетчик. Начальное значение берется из часов (мс),
+# поэтому кнопки игр из прошлого запуска не попадут в новые игры.
+# Сейчас это 7 символов base-62.
+class IdAllocator:
+    def __init__(self, start=None):
+        if start is None:
+            start = int(time.time() * 1000)
+        self._next = start
+    
+    def next_id(self):
+        value = self._next
+        self._next += 1
+        return value
+    
+    def advance_past(self, value):
+        # После восстановления игр новые id должны быть больше уже занятых
+        if value >= self._next:
+            self._next = value + 1
+
+
+# callback_data игровых кнопок: "<действие>:<id игры в base-62>[:<аргумент>]",
+# например "ttt:1aB3xYz:4" - 12 байт вместо ~60 у прежних id.
+def pack(action, game_id, arg=None):
+    data = f"{action}{SEPARATOR}{encode_id(game_id)}"
+    if arg is not None:
+        data += f"{SEPARATOR}{arg}"
+    return data
+
+
+def unpack(data):
+    # -> (action, game_id, arg); game_id = None, если данные повреждены
+    parts = data.split(SEPARATOR, 2)
+    action = parts[0]
+    try:
+        game_id = decode_id(parts[1]) if len(parts) > 1 and parts[1] else None
+    except KeyError:
+        game_id = None
+    arg = parts[2] if len(parts) > 2 else None
+    return action, game_id, arg
+
+
+def action_of(data):
+    return data.split(SEPARATOR, 1)[0]
@@ -0,0 +1,112 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Единая куча дедлайнов вместо отдельной asyncio-задачи на каждую игру.
+# Одна фоновая корутина спит до ближайшего дедлайна и вызывает on_expire(key).
+# Продление (touch) не трогает кучу: новый дедлайн запоминается в словаре,
+# а устаревшая запись при извлечении переставляется на актуальное время.
+class DeadlineHeap:
+    def __init__(self, on_expire, clock=time.monotonic):
+        self.on_expire = on_expire
+        self.clock = clock
+        self._heap = []
+        self._deadlines = {}
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._task = None
+    
+    def __len__(self):
+        return len(self._deadlines)
+    
+    def __contains__(self, key):
+        return key in self._deadlines
+    
+    def schedule(self, key, timeout):
+        deadline = self.clock() + timeout
+        current = self._deadlines.get(key)
+        self._deadlines[key] = deadline
+        # Более поздний дедлайн для уже запланированного ключа подхватится лениво
+        if current is None or deadline < current:
+            self._push(deadline, key)
+    
+    def touch(self, key, timeout):
+        if key in self._deadlines:
+            self.schedule(key, timeout)
+    
+    def cancel(self, key):
+        self._deadlines.pop(key, None)
+    
+    def deadline(self, key):
+        return self._deadlines.get(key)
+    
+    def _push(self, deadline, key):
+        heapq.heappush(self._heap, (deadline, next(self._seq), key))
+        self._compact()
+        self._ensure_running()
+        if self._wakeup is not None and self._heap[0][2] == key:
+            self._wakeup.set()
+    
+    def _compact(self):
+        # Отмененные записи удаляются лениво; не даем куче разрастись
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._deadlines):
+            self._heap = [entry for entry in self._heap if self._deadlines.get(entry[2]) is not None]
+            heapq.heapify(self._heap)
+    
+    def pop_expired(self, now=None):
+        if now is None:
+            now = self.clock()
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, key = heapq.heappop(self._heap)
+            actual = self._deadlines.get(key)
+            if actual is None:
+                continue
+            if actual > deadline:
+                heapq.heappush(self._heap, (actual, next(self._seq), key))
+                continue
+            del self._deadlines[key]
+            expired.append(key)
+        return expired
+    
+    def _ensure_running(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop (например, при загрузке снапшота) - запустимся позже
+            return
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+    
+    async def _run(self):
+        # Условие цикла, а не только cancel(): в Python 3.11 wait_for теряет отмену,
+        # если пробуждение пришло в тот же момент
+        while self._task is asyncio.current_task():
+            for key in self.pop_expired():
+                try:
+                    self.on_expire(key)
+                except Exception:
+                    logger.exception("Expiry callback failed for %r", key)
+            
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - self.clock() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,102 @@
+import importlib
+
+
+# Описание типа игры. Название, описание и префикс callback_data известны сразу,
+# а модуль с состоянием и обработчиками импортируется при первом обращении.
+# Модуль игры предоставляет:
+#   create_state(chat_id, player1_id, player2_id, player1_name, player2_name, **options)
+#   parse_options(args) -> dict или None      - необязательно: параметры из "/play тип ..."
+#   solo_error(options) -> текст или None     - необязательно: параметры, с которыми
+#                                               бот играть не умеет
+#   async start(ctx, message, game_id, game)
+#   async on_callback(ctx, callback)          - если задан callback_prefix
+#                                               (действие в callback_data, см. minigames.codec)
+#   async on_text(ctx, message, game_id, game) - если игра ждет ответ сообщением
+#   replay(game, moves) -> исход или None     - повтор партии по журналу ходов без бота
+#                                               (см. minigames.match_log)
+# solo=True - в игру можно играть против бота (второй игрок BOT_PLAYER_ID, ходит сам модуль игры).
+class GameType:
+    __slots__ = ('type', 'name', 'description', 'callback_prefix', 'solo', 'module_name', '_module')
+    
+    def __init__(self, type, name, description, callback_prefix=None, solo=False):
+        self.type = type
+        self.name = name
+        self.description = description
+        self.callback_prefix = callback_prefix
+        self.solo = solo
+        self.module_name = f"{__name__}.{type}"
+        self._module = None
+    
+    @property
+    def module(self):
+        if self._module is None:
+            self._module = importlib.import_module(self.module_name)
+        return self._module
+    
+    def create_state(self, *args, **options):
+        return self.module.create_state(*args, **options)
+    
+    def parse_options(self, args):
+        # None - параметры не подходят
+        parse = getattr(self.module, 'parse_options', None)
+        if parse is None:
+            return None if args else {}
+        return parse(args)
+    
+    def solo_error(self, options):
+        check = getattr(self.module, 'solo_error', None)
+        return None if check is None else check(options)
+    
+    def start(self, ctx, message, game_id, game):
+        return self.module.start(ctx, message, game_id, game)
+    
+    def on_callback(self, ctx, callback):
+        return self.module.on_callback(ctx, callback)
+    
+    def replay(self, game, moves):
+        return self.module.replay(game, moves)
+    
+    @property
+    def on_text(self):
+        return getattr(self.module, 'on_text', None)
+
+
+GAME_TYPES = {
+    spec.type: spec
+    for spec in (
+        GameType(
+            "russian_roulette", "🔫 Русская рулетка",
+            "Смертельная игра на удачу. 1 патрон, 6 камор. Кто выживет?",
+            callback_prefix="rr"
+        ),
+        GameType(
+            "dice_battle", "🎲 Битва кубиков",
+            "Бросай кубики и набирай очки. У кого будет больше?",
+            callback_prefix="db", solo=True
+        ),
+        GameType(
+            "number_guess", "🔢 Угадай число",
+            "Угадай загаданное число. Меньше попыток - больше шансов!",
+            solo=True
+        ),
+        GameType(
+            "tic_tac_toe", "⭕ Крестики-нолики",
+            "Классическая игра в крестики-нолики. Прояви стратегию! "
+            "Поле побольше: /play tic_tac_toe 8 5 (8x8, 5 в ряд)",
+            callback_prefix="ttt", solo=True
+        ),
+        GameType(
+            "quick_math", "🧮 Быстрая математика",
+            "Решай примеры на скорость. Первый до 3 очков побеждает! "
+            "Уровни: /play quick_math easy|normal|hard|expert [seed]"
+        ),
+        GameType(
+            "coin_flip", "🪙 Бросок монеты",
+            "Простая игра на удачу. Выбери сторону монеты!",
+            callback_prefix="cf"
+        ),
+    )
+}
+
+# Действие из callback_data -> тип игры
+CALLBACK_PREFIXES = {spec.callback_prefix: spec for spec in GAME_TYPES.values() if spec.callback_prefix}
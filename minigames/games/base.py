@@ -0,0 +1,80 @@
+import time
+
+# Бот как второй игрок в одиночных играх. В статистику он не попадает.
+BOT_PLAYER_ID = 0
+BOT_PLAYER_NAME = "🤖 Бот"
+
+# Слот случайных событий в журнале ходов (позиция патрона, загаданное число, ответ задачи)
+CHANCE = -1
+
+# Исход партии для журнала (minigames.match_log): слот победителя 0/1, ничья или
+# партия, удаленная по таймауту без результата
+DRAW = 2
+ABANDONED = 3
+
+
+# Общая часть состояния игры на двоих. Игроки адресуются слотами 0 и 1,
+# поля на игрока хранятся в кортежах/списках из двух элементов.
+# moves - журнал партии: плоский список пар (слот, значение), который пишут
+# методы состояния; по нему партию можно повторить (replay в модуле игры).
+class Game:
+    __slots__ = ('chat_id', 'player_ids', 'names', 'turn', 'created_at', 'moves')
+    
+    type = None
+    has_turns = True
+    
+    def __init__(self, chat_id, player1_id, player2_id, player1_name, player2_name):
+        self.chat_id = chat_id
+        self.player_ids = (player1_id, player2_id)
+        self.names = (player1_name, player2_name)
+        self.turn = 0
+        self.created_at = time.time()
+        self.moves = []
+    
+    def slot(self, user_id):
+        if user_id == self.player_ids[0]:
+            return 0
+        if user_id == self.player_ids[1]:
+            return 1
+        return None
+    
+    @property
+    def solo(self):
+        return self.player_ids[1] == BOT_PLAYER_ID
+    
+    @property
+    def current_player(self):
+        return self.player_ids[self.turn] if self.has_turns else None
+    
+    @property
+    def current_name(self):
+        return self.names[self.turn]
+    
+    def pass_turn(self):
+        self.turn ^= 1
+    
+    def record(self, slot, value=0):
+        self.moves += (slot, value)
+    
+    @property
+    def options(self):
+        # Параметры create_state, с которыми партию можно создать заново
+        return {}
+
+
+# Общие объекты бота, которые получают обработчики игр
+class GameContext:
+    __slots__ = ('games', 'users', 'outbox')
+    
+    def __init__(self, games, users, outbox):
+        self.games = games
+        self.users = users
+        self.outbox = outbox
+    
+    def record_stats(self, game, winner_id, loser_id, draw=False):
+        # Итог партии в статистику; ничья засчитывается обоим как победа.
+        # Игры с ботом не учитываются целиком, как и в рейтинге
+        if game.solo:
+            return
+        self.users.update_stats(winner_id, game.chat_id, game.type, won=True)
+        self.users.update_stats(loser_id, game.chat_id, game.type, won=draw)
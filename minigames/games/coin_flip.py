@@ -0,0 +1,144 @@
+import random
+
+from aiogram import types
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from minigames.codec import pack, unpack
+from minigames.games.base import CHANCE, Game
+from minigames.keyboards import get_play_again_keyboard
+
+SIDES = ('heads', 'tails')
+SIDE_CODES = {'h': 'heads', 't': 'tails'}
+
+
+class CoinFlipGame(Game):
+    __slots__ = ('choices',)
+    
+    type = "coin_flip"
+    has_turns = False
+    
+    def __init__(self, *args):
+        super().__init__(*args)
+        # Выбор игроков: 0 - еще не выбрал, 1 - орел, 2 - решка
+        self.choices = [0, 0]
+    
+    def choose(self, slot, side):
+        self.choices[slot] = SIDES.index(side) + 1
+        self.record(slot, self.choices[slot])
+    
+    def choice(self, slot):
+        choice = self.choices[slot]
+        return SIDES[choice - 1] if choice else None
+    
+    def flip(self):
+        result = random.choice(SIDES)
+        self.record(CHANCE, SIDES.index(result) + 1)
+        return result
+    
+    def winner(self, result):
+        return 0 if self.choice(0) == result else 1
+
+create_state = CoinFlipGame
+
+def replay(game: CoinFlipGame, moves):
+    for slot, value in moves:
+        if value not in (1, 2):
+            raise ValueError(f"invalid side {value}")
+        if slot == CHANCE:
+            if not all(game.choices):
+                raise ValueError("coin flipped before both choices")
+            return game.winner(SIDES[value - 1])
+        if game.choices[slot]:
+            raise ValueError(f"second choice by slot {slot}")
+        game.choose(slot, SIDES[value - 1])
+    return None
+
+async def start(ctx, message: types.Message, game_id: int, game: CoinFlipGame):
+    player1_name, player2_name = game.names
+    
+    text = (
+        f"🪙 **Бросок монеты**\n\n"
+        f"🎯 Игроки:\n"
+        f"• {player1_name}\n"
+        f"• {player2_name}\n\n"
+        f"Выбери сторону монеты:"
+    )
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="🦅 Орел", callback_data=pack("cf", game_id, "h")),
+            InlineKeyboardButton(text="📀 Решка", callback_data=pack("cf", game_id, "t"))
+        ]
+    ])
+    
+    ctx.outbox.reply(message, text, reply_markup=keyboard)
+
+async def on_callback(ctx, callback: types.CallbackQuery):
+    _, game_id, side = unpack(callback.data)
+    choice = SIDE_CODES.get(side)  # heads или tails
+    
+    game = ctx.games.get_game(game_id)
+    if not game or choice is None:
+        await callback.answer("❌ Игра завершена!", show_alert=True)
+        return
+    
+    user_id = callback.from_user.id
+    slot = game.slot(user_id)
+    if slot is None:
+        await callback.answer("❌ Вы не участник игры!", show_alert=True)
+        return
+    
+    # Выбор окончательный: повторное нажатие его не меняет
+    previous = game.choice(slot)
+    if previous:
+        await callback.answer(f"✅ Ты уже выбрал {'Орел' if previous == 'heads' else 'Решка'}!")
+        return
+    
+    ctx.games.touch_game(game_id)
+    
+    # Записываем выбор игрока
+    game.choose(slot, choice)
+    player_name = game.names[slot]
+    
+    # Проверяем, сделали ли оба игрока выбор
+    player1_choice = game.choice(0)
+    player2_choice = game.choice(1)
+    player1_name, player2_name = game.names
+    
+    if player1_choice and player2_choice:
+        # Оба сделали выбор, подбрасываем монету
+        result = game.flip()
+        result_emoji = '🦅' if result == 'heads' else '📀'
+        
+        # Определяем победителя
+        winner_slot = game.winner(result)
+        winner_id = game.player_ids[winner_slot]
+        loser_id = game.player_ids[winner_slot ^ 1]
+        winner_name = game.names[winner_slot]
+        loser_name = game.names[winner_slot ^ 1]
+        
+        text = (
+            f"🪙 **Бросок монеты**\n\n"
+            f"🎯 Результат: {result_emoji} {'Орел' if result == 'heads' else 'Решка'}\n\n"
+            f"🏆 Победитель: {winner_name}\n"
+            f"💀 Проигравший: {loser_name}\n\n"
+            f"Выборы:\n"
+            f"• {player1_name}: {'Орел' if player1_choice == 'heads' else 'Решка'}\n"
+            f"• {player2_name}: {'Орел' if player2_choice == 'heads' else 'Решка'}"
+        )
+        
+        ctx.record_stats(game, winner_id, loser_id)
+        
+        ctx.outbox.edit(callback.message, text, reply_markup=get_play_again_keyboard("coin_flip"))
+        ctx.games.finish_game(game_id, winner_slot)
+        
+    else:
+        # Ждем второго игрока
+        text = (
+            f"🪙 **Бросок монеты**\n\n"
+            f"✅ {player_name} выбрал: {'Орел' if choice == 'heads' else 'Решка'}\n"
+            f"⏳ Ожидаем выбор второго игрока..."
+        )
+        
+        ctx.outbox.edit(callback.message, text, reply_markup=callback.message.reply_markup)
+        await callback.answer(f"✅ Ты выбрал {'Орел' if choice == 'heads' else 'Решка'}!")
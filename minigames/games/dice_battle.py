@@ -0,0 +1,199 @@
+import random
+
+from aiogram import types
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from minigames.codec import pack, unpack
+from minigames.games.base import DRAW, Game
+from minigames.keyboards import get_play_again_keyboard
+
+ROLLS_PER_PLAYER = 3
+
+
+def sum_distribution(rolls):
+    # Распределение суммы rolls бросков кубика: сумма -> вероятность
+    distribution = {0: 1.0}
+    for _ in range(rolls):
+        next_distribution = {}
+        for total, probability in distribution.items():
+            for face in range(1, 7):
+                next_distribution[total + face] = next_distribution.get(total + face, 0.0) + probability / 6
+        distribution = next_distribution
+    return distribution
+
+
+# Исход против соперника, который еще не бросал: сумма -> (победа, ничья, поражение)
+SUM_DISTRIBUTION = sum_distribution(ROLLS_PER_PLAYER)
+OUTCOME_ODDS = {
+    score: (
+        sum(p for total, p in SUM_DISTRIBUTION.items() if total < score),
+        SUM_DISTRIBUTION[score],
+        sum(p for total, p in SUM_DISTRIBUTION.items() if total > score)
+    )
+    for score in SUM_DISTRIBUTION
+}
+
+
+def odds_line(game):
+    # В игре с ботом показываем, каковы были шансы игрока после его бросков
+    if not game.solo:
+        return ""
+    win, draw, _ = OUTCOME_ODDS[game.scores[0]]
+    return f"\n📈 Шансы {game.names[0]} после бросков: победа {win:.0%}, ничья {draw:.0%}"
+
+
+class DiceBattleGame(Game):
+    __slots__ = ('scores', 'rolls_left')
+    
+    type = "dice_battle"
+    
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.scores = [0, 0]
+        self.rolls_left = [ROLLS_PER_PLAYER, ROLLS_PER_PLAYER]
+    
+    def roll(self, slot, value):
+        self.scores[slot] += value
+        self.rolls_left[slot] -= 1
+        self.record(slot, value)
+    
+    def winner(self):
+        player1_score, player2_score = self.scores
+        if player1_score == player2_score:
+            return DRAW
+        return 0 if player1_score > player2_score else 1
+
+create_state = DiceBattleGame
+
+def replay(game: DiceBattleGame, moves):
+    for slot, value in moves:
+        if slot != game.turn or not game.rolls_left[slot] or not 1 <= value <= 6:
+            raise ValueError(f"invalid roll {value} by slot {slot}")
+        game.roll(slot, value)
+        if not game.rolls_left[slot]:
+            if slot == 1:
+                return game.winner()
+            game.pass_turn()
+    return None
+
+def get_roll_keyboard(game_id):
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🎲 БРОСИТЬ КУБИК", callback_data=pack("db", game_id))]
+    ])
+
+async def start(ctx, message: types.Message, game_id: int, game: DiceBattleGame):
+    player1_name, player2_name = game.names
+    
+    text = (
+        f"🎲 **Битва кубиков**\n\n"
+        f"🎯 Игроки:\n"
+        f"• {player1_name} (3 броска)\n"
+        f"• {player2_name} (3 броска)\n\n"
+        f"🎲 Ход: {player1_name}\n\n"
+        f"Бросай кубик и набирай очки!"
+    )
+    
+    ctx.outbox.reply(message, text, reply_markup=get_roll_keyboard(game_id))
+
+async def on_callback(ctx, callback: types.CallbackQuery):
+    _, game_id, _ = unpack(callback.data)
+    game = ctx.games.get_game(game_id)
+    
+    if not game:
+        await callback.answer("❌ Игра завершена!", show_alert=True)
+        return
+    
+    user_id = callback.from_user.id
+    slot = game.slot(user_id)
+    if slot is None:
+        await callback.answer("❌ Вы не участник игры!", show_alert=True)
+        return
+    
+    if slot != game.turn:
+        await callback.answer("❌ Сейчас не ваш ход!", show_alert=True)
+        return
+    
+    ctx.games.touch_game(game_id)
+    make_roll(ctx, callback, game_id, game, slot)
+    
+    # В игре с ботом он бросает все свои кубики сразу после игрока
+    while game.solo and game.turn == 1 and ctx.games.get_game(game_id) is game:
+        make_roll(ctx, callback, game_id, game, 1)
+    
+    await callback.answer()
+
+def make_roll(ctx, callback: types.CallbackQuery, game_id: int, game: DiceBattleGame, slot: int):
+    # Бросаем кубик
+    dice_roll = random.randint(1, 6)
+    game.roll(slot, dice_roll)
+    
+    player_name = game.names[slot]
+    player1_id, player2_id = game.player_ids
+    player1_name, player2_name = game.names
+    player1_score, player2_score = game.scores
+    
+    if game.rolls_left[slot] > 0:
+        # Еще есть броски
+        text = (
+            f"🎲 **Битва кубиков**\n\n"
+            f"🎯 {player_name} выбросил: {dice_roll}\n"
+            f"📊 Текущий счет: {game.scores[slot]}\n"
+            f"🎲 Осталось бросков: {game.rolls_left[slot]}\n\n"
+            f"Бросай снова!"
+        )
+        
+        ctx.outbox.edit(callback.message, text, reply_markup=get_roll_keyboard(game_id))
+        
+    else:
+        # Броски закончились, передаем ход
+        if slot == 0:
+            ctx.games.pass_turn(game_id)
+            next_player_name = player2_name
+            
+            text = (
+                f"🎲 **Битва кубиков**\n\n"
+                f"🎯 {player_name} выбросил: {dice_roll}\n"
+                f"📊 Итоговый счет {player_name}: {game.scores[slot]}\n\n"
+                f"🎲 Ход переходит к: {next_player_name}"
+            )
+            
+            ctx.outbox.edit(callback.message, text, reply_markup=get_roll_keyboard(game_id))
+            
+        else:
+            # Оба игрока бросили, определяем победителя
+            winner_slot = game.winner()
+            if winner_slot == DRAW:
+                # Ничья
+                text = (
+                    f"🎲 **Битва кубиков - НИЧЬЯ!**\n\n"
+                    f"📊 Счет:\n"
+                    f"• {player1_name}: {player1_score}\n"
+                    f"• {player2_name}: {player2_score}\n\n"
+                    f"{'🤝 Игра с ботом - без очков' if game.solo else '🤝 Оба игрока получают по 1 очку!'}"
+                    f"{odds_line(game)}"
+                )
+                
+                ctx.record_stats(game, player1_id, player2_id, draw=True)
+                
+                ctx.outbox.edit(callback.message, text, reply_markup=get_play_again_keyboard("dice_battle"))
+                ctx.games.finish_game(game_id, DRAW)
+                return
+            
+            winner_id = game.player_ids[winner_slot]
+            loser_id = game.player_ids[winner_slot ^ 1]
+            winner_name = game.names[winner_slot]
+            
+            text = (
+                f"🎲 **Битва кубиков - ПОБЕДА!**\n\n"
+                f"🏆 Победитель: {winner_name}\n"
+                f"📊 Счет:\n"
+                f"• {player1_name}: {player1_score}\n"
+                f"• {player2_name}: {player2_score}\n\n"
+                f"{'🎯 Игра с ботом - без очков' if game.solo else f'🎯 {winner_name} получает 1 очко!'}"
+                f"{odds_line(game)}"
+            )
+            
+            ctx.record_stats(game, winner_id, loser_id)
+            
+            ctx.outbox.edit(callback.message, text, reply_markup=get_play_again_keyboard("dice_battle"))
+            ctx.games.finish_game(game_id, winner_slot)
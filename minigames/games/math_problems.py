@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import random
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Размер пула задач на уровень и порог, ниже которого запускается пополнение
+POOL_SIZE = 512
+LOW_WATER = 128
+REFILL_CHUNK = 64
+
+# Знаки для текста задачи: '*' ломает разметку Markdown в сообщении
+SIGNS = {'+': '+', '-': '-', '*': '×', '/': '÷'}
+
+
+def _apply(op, x, y):
+    if op == '+':
+        return x + y
+    if op == '-':
+        return x - y
+    return x * y
+
+
+def _easy(rng):
+    a, b = rng.randint(1, 20), rng.randint(1, 20)
+    if rng.random() < 0.5:
+        return f"{a} + {b}", a + b
+    # Без отрицательных ответов
+    a, b = max(a, b), min(a, b)
+    return f"{a} - {b}", a - b
+
+
+def _normal(rng):
+    a, b = rng.randint(1, 20), rng.randint(1, 20)
+    op = rng.choice('+-*')
+    return f"{a} {SIGNS[op]} {b}", _apply(op, a, b)
+
+
+def _hard(rng):
+    op = rng.choice('+-*/')
+    if op in '+-':
+        a, b = rng.randint(10, 99), rng.randint(10, 99)
+        return f"{a} {op} {b}", _apply(op, a, b)
+    a, b = rng.randint(2, 20), rng.randint(2, 20)
+    if op == '*':
+        return f"{a} × {b}", a * b
+    # Деление только нацело: делимое строим из ответа
+    return f"{a * b} ÷ {b}", a
+
+
+def _expert(rng):
+    a, b, c = rng.randint(2, 30), rng.randint(2, 30), rng.randint(2, 12)
+    form = rng.randrange(3)
+    if form == 0:
+        op1, op2 = rng.choice('+-*'), rng.choice('+-*')
+        # Умножение выполняется раньше сложения и вычитания
+        if op2 == '*' and op1 != '*':
+            answer = _apply(op1, a, b * c)
+        else:
+            answer = _apply(op2, _apply(op1, a, b), c)
+        return f"{a} {SIGNS[op1]} {b} {SIGNS[op2]} {c}", answer
+    if form == 1:
+        op1 = rng.choice('+-')
+        return f"({a} {op1} {b}) × {c}", _apply(op1, a, b) * c
+    return f"{a * c} ÷ {c} + {b}", a + b
+
+
+# Уровни сложности: ключ -> (название, генератор задачи)
+LEVELS = {
+    'easy': ("🟢 Легкий", _easy),
+    'normal': ("🟡 Обычный", _normal),
+    'hard': ("🔴 Сложный", _hard),
+    'expert': ("🧠 Эксперт", _expert),
+}
+DEFAULT_LEVEL = 'normal'
+
+
+def seeded_problem(level, seed, index):
+    # Задача номер index последовательности seed: одинаковая при каждом запуске,
+    # поэтому турнир можно переиграть на том же наборе задач
+    return LEVELS[level][1](random.Random(f"{seed}:{level}:{index}"))
+
+
+# Заранее сгенерированные задачи одного уровня. pop() берет готовую задачу за O(1),
+# а когда задач остается мало, пул пополняется фоновой задачей небольшими порциями.
+class ProblemPool:
+    def __init__(self, level, size=POOL_SIZE, low_water=LOW_WATER):
+        self.level = level
+        self.size = size
+        self.low_water = low_water
+        self._generate = LEVELS[level][1]
+        self._rng = random.Random()
+        self._problems = deque()
+        self._refill_task = None
+        self.fill(size)
+    
+    def fill(self, count):
+        generate, rng = self._generate, self._rng
+        self._problems.extend([generate(rng) for _ in range(count)])
+    
+    def pop(self):
+        if not self._problems:
+            # Пул опустел быстрее, чем пополнялся
+            self.fill(REFILL_CHUNK)
+        problem = self._problems.popleft()
+        if len(self._problems) < self.low_water and self._refill_task is None:
+            self._schedule_refill()
+        return problem
+    
+    def _schedule_refill(self):
+        try:
+            self._refill_task = asyncio.get_running_loop().create_task(self._refill())
+        except RuntimeError:
+            # Нет event loop (например, в скриптах) - пополняем сразу
+            self.fill(self.size - len(self._problems))
+    
+    async def _refill(self):
+        try:
+            while len(self._problems) < self.size:
+                self.fill(min(REFILL_CHUNK, self.size - len(self._problems)))
+                await asyncio.sleep(0)
+        except Exception:
+            logger.exception("Failed to refill %s math problems", self.level)
+        finally:
+            self._refill_task = None
+    
+    def __len__(self):
+        return len(self._problems)
+
+
+POOLS = {}
+
+
+def pool(level):
+    # Пулы создаются при первой игре на уровне
+    problem_pool = POOLS.get(level)
+    if problem_pool is None:
+        problem_pool = POOLS[level] = ProblemPool(level)
+    return problem_pool
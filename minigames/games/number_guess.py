@@ -0,0 +1,139 @@
+import random
+
+from aiogram import types
+
+from minigames.games.base import CHANCE, Game
+from minigames.keyboards import get_play_again_keyboard
+
+MIN_NUMBER, MAX_NUMBER = 1, 100
+
+# Вероятность, с которой бот делит оставшийся диапазон пополам; в остальных
+# случаях он называет случайное число из диапазона. Подобрано симуляцией
+# (minigames.simulation) против игрока, который всегда делит пополам: бот ходит
+# вторым, и чистое деление пополам выигрывает у такого игрока лишь ~42% партий,
+# случайные догадки - ~53%, а 0.5 дает почти равную игру (~49%).
+BOT_BISECT_RATE = 0.5
+
+
+def bot_guess(low, high, bisect_rate=BOT_BISECT_RATE, rng=random):
+    if rng.random() < bisect_rate:
+        return (low + high) // 2
+    return rng.randint(low, high)
+
+
+class NumberGuessGame(Game):
+    __slots__ = ('target_number', 'attempts', 'low', 'high')
+    
+    type = "number_guess"
+    
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.target_number = random.randint(MIN_NUMBER, MAX_NUMBER)
+        self.attempts = [0, 0]
+        # Диапазон, который остается после подсказок (их видят оба игрока)
+        self.low = MIN_NUMBER
+        self.high = MAX_NUMBER
+        self.record(CHANCE, self.target_number)
+    
+    def guess(self, slot, value):
+        # -> True, если число угадано
+        self.attempts[slot] += 1
+        self.record(slot, value)
+        if value == self.target_number:
+            return True
+        self.narrow(value)
+        return False
+    
+    def narrow(self, guess):
+        if guess < self.target_number:
+            self.low = max(self.low, guess + 1)
+        elif guess > self.target_number:
+            self.high = min(self.high, guess - 1)
+
+create_state = NumberGuessGame
+
+def replay(game: NumberGuessGame, moves):
+    for slot, value in moves:
+        if slot == CHANCE:
+            game.target_number = value
+        elif slot != game.turn:
+            raise ValueError(f"move out of turn: slot {slot}")
+        elif game.guess(slot, value):
+            return slot
+        else:
+            game.pass_turn()
+    return None
+
+async def start(ctx, message: types.Message, game_id: int, game: NumberGuessGame):
+    player1_name, player2_name = game.names
+    
+    text = (
+        f"🔢 **Угадай число**\n\n"
+        f"🎯 Игроки:\n"
+        f"• {player1_name}\n"
+        f"• {player2_name}\n\n"
+        f"🎲 Загадано число от 1 до 100\n"
+        f"👤 Ход: {player1_name}\n\n"
+        f"Отправь число от 1 до 100:"
+    )
+    
+    ctx.outbox.reply(message, text)
+
+async def on_text(ctx, message: types.Message, game_id: int, game: NumberGuessGame):
+    try:
+        guess = int(message.text)
+    except ValueError:
+        ctx.outbox.reply(message, "❌ Введи корректное число!")
+        return
+    
+    if guess < MIN_NUMBER or guess > MAX_NUMBER:
+        ctx.outbox.reply(message, "❌ Число должно быть от 1 до 100!")
+        return
+    
+    ctx.games.touch_game(game_id)
+    finished = make_guess(ctx, message, game_id, game, guess)
+    # В одиночной игре бот отвечает сразу
+    if not finished and game.solo:
+        make_guess(ctx, message, game_id, game, bot_guess(game.low, game.high))
+
+def make_guess(ctx, message: types.Message, game_id: int, game: NumberGuessGame, guess: int):
+    slot = game.turn
+    target_number = game.target_number
+    player_name = game.names[slot]
+    
+    if game.guess(slot, guess):
+        # Игрок угадал!
+        winner_id = game.player_ids[slot]
+        loser_id = game.player_ids[slot ^ 1]
+        winner_name = player_name
+        attempts = game.attempts[slot]
+        
+        text = (
+            f"🔢 **Угадай число - ПОБЕДА!**\n\n"
+            f"🎯 Загаданное число: {target_number}\n"
+            f"🏆 Победитель: {winner_name}\n"
+            f"📊 Попыток: {attempts}\n\n"
+            f"🎯 {winner_name} угадал число!"
+        )
+        
+        ctx.record_stats(game, winner_id, loser_id)
+        
+        ctx.outbox.reply(message, text, reply_markup=get_play_again_keyboard("number_guess"))
+        ctx.games.finish_game(game_id, slot)
+        return True
+    
+    # Не угадал, передаем ход
+    hint = "🔻 Меньше" if guess > target_number else "🔺 Больше"
+    ctx.games.pass_turn(game_id)
+    next_player_name = game.current_name
+    
+    text = (
+        f"🔢 **Угадай число**\n\n"
+        f"🎯 {player_name}: {guess} {hint}\n"
+        f"📊 Попыток: {game.attempts[slot]}\n\n"
+        f"👤 Следующий ход: {next_player_name}\n\n"
+        f"Отправь число от 1 до 100:"
+    )
+    
+    ctx.outbox.reply(message, text)
+    return False
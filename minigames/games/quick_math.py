@@ -0,0 +1,167 @@
+from aiogram import types
+
+from minigames.games.base import CHANCE, Game
+from minigames.games.math_problems import DEFAULT_LEVEL, LEVELS, pool, seeded_problem
+from minigames.keyboards import get_play_again_keyboard
+
+WIN_SCORE = 3
+
+
+def parse_options(args):
+    # /play quick_math [уровень] [seed], например "/play quick_math hard cup2024"
+    options = {}
+    if args and args[0] in LEVELS:
+        options['level'] = args[0]
+        args = args[1:]
+    if len(args) > 1:
+        return None
+    if args:
+        # Seed попадает в текст с Markdown, поэтому только буквы и цифры
+        if not args[0].isalnum() or len(args[0]) > 32:
+            return None
+        options['seed'] = args[0]
+    return options
+
+
+class QuickMathGame(Game):
+    __slots__ = ('scores', 'problem', 'answer', 'level', 'seed', 'index')
+    
+    type = "quick_math"
+    
+    def __init__(self, *args, level=DEFAULT_LEVEL, seed=None):
+        super().__init__(*args)
+        self.scores = [0, 0]
+        self.level = level
+        # С seed задачи идут в заданном порядке, без него - из общего пула уровня
+        self.seed = seed
+        self.index = 0
+        self.next_problem()
+    
+    def next_problem(self):
+        if self.seed is None:
+            self.problem, self.answer = pool(self.level).pop()
+        else:
+            self.problem, self.answer = seeded_problem(self.level, self.seed, self.index)
+        self.index += 1
+        self.record(CHANCE, self.answer)
+    
+    def submit(self, slot, answer):
+        # -> True, если ответ верный
+        self.record(slot, answer)
+        if answer != self.answer:
+            return False
+        self.scores[slot] += 1
+        return True
+    
+    @property
+    def level_name(self):
+        return LEVELS[self.level][0]
+    
+    @property
+    def options(self):
+        if self.seed is None:
+            return {'level': self.level}
+        return {'level': self.level, 'seed': self.seed}
+
+create_state = QuickMathGame
+
+def replay(game: QuickMathGame, moves):
+    # Следующая задача приходит отдельным событием CHANCE с ее ответом
+    for slot, value in moves:
+        if slot == CHANCE:
+            game.answer = value
+        elif slot != game.turn:
+            raise ValueError(f"move out of turn: slot {slot}")
+        elif game.submit(slot, value) and game.scores[slot] >= WIN_SCORE:
+            return slot
+        else:
+            game.pass_turn()
+    return None
+
+async def start(ctx, message: types.Message, game_id: int, game: QuickMathGame):
+    player1_name, player2_name = game.names
+    
+    seed = f", набор {game.seed}" if game.seed is not None else ""
+    text = (
+        f"🧮 **Быстрая математика** ({game.level_name}{seed})\n\n"
+        f"🎯 Игроки:\n"
+        f"• {player1_name}\n"
+        f"• {player2_name}\n\n"
+        f"🎲 Ход: {player1_name}\n\n"
+        f"Реши пример:\n"
+        f"**{game.problem} = ?**\n\n"
+        f"Отправь ответ числом:"
+    )
+    
+    ctx.outbox.reply(message, text, parse_mode='Markdown')
+
+async def on_text(ctx, message: types.Message, game_id: int, game: QuickMathGame):
+    try:
+        answer = int(message.text)
+        ctx.games.touch_game(game_id)
+        slot = game.turn
+        correct_answer = game.answer
+        player_name = game.names[slot]
+        player1_name, player2_name = game.names
+        
+        if game.submit(slot, answer):
+            # Правильный ответ
+            player1_score, player2_score = game.scores
+            
+            if game.scores[slot] >= WIN_SCORE:
+                # Игрок достиг 3 очков
+                winner_id = game.player_ids[slot]
+                loser_id = game.player_ids[slot ^ 1]
+                winner_name = player_name
+                
+                text = (
+                    f"🧮 **Быстрая математика - ПОБЕДА!**\n\n"
+                    f"🏆 Победитель: {winner_name}\n"
+                    f"📊 Счет:\n"
+                    f"• {player1_name}: {player1_score}\n"
+                    f"• {player2_name}: {player2_score}\n\n"
+                    f"🎯 {winner_name} быстрее решает примеры!"
+                )
+                
+                ctx.record_stats(game, winner_id, loser_id)
+                
+                ctx.outbox.reply(message, text, reply_markup=get_play_again_keyboard("quick_math"))
+                ctx.games.finish_game(game_id, slot)
+                
+            else:
+                # Генерируем новый пример и передаем ход
+                game.next_problem()
+                ctx.games.pass_turn(game_id)
+                next_player_name = game.current_name
+                
+                text = (
+                    f"🧮 **Быстрая математика**\n\n"
+                    f"✅ {player_name} ответил правильно!\n"
+                    f"📊 Счет:\n"
+                    f"• {player1_name}: {player1_score}\n"
+                    f"• {player2_name}: {player2_score}\n\n"
+                    f"🎲 Следующий ход: {next_player_name}\n\n"
+                    f"Реши пример:\n"
+                    f"**{game.problem} = ?**"
+                )
+                
+                ctx.outbox.reply(message, text, parse_mode='Markdown')
+                
+        else:
+            # Неправильный ответ
+            ctx.games.pass_turn(game_id)
+            next_player_name = game.current_name
+            
+            text = (
+                f"🧮 **Быстрая математика**\n\n"
+                f"❌ {player_name} ответил неправильно!\n"
+                f"✅ Правильный ответ: {correct_answer}\n\n"
+                f"🎲 Следующий ход: {next_player_name}\n\n"
+                f"Реши пример:\n"
+                f"**{game.problem} = ?**"
+            )
+            
+            ctx.outbox.reply(message, text, parse_mode='Markdown')
+        
+    except ValueError:
+        ctx.outbox.reply(message, "❌ Введи корректное число!")
@@ -0,0 +1,126 @@
+import random
+
+from aiogram import types
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from minigames.codec import pack, unpack
+from minigames.games.base import CHANCE, Game
+from minigames.keyboards import get_play_again_keyboard
+
+
+class RussianRouletteGame(Game):
+    __slots__ = ('revolver', 'chamber')
+    
+    type = "russian_roulette"
+    
+    def __init__(self, *args):
+        super().__init__(*args)
+        # Битовая маска барабана: 1 патрон в случайной каморе из 6
+        bullet = random.randint(0, 5)
+        self.revolver = 1 << bullet
+        self.chamber = 0
+        self.record(CHANCE, bullet)
+    
+    def shoot(self):
+        self.record(self.turn)
+        chamber = self.chamber
+        self.chamber = (chamber + 1) % 6
+        return bool(self.revolver >> chamber & 1)
+
+create_state = RussianRouletteGame
+
+def replay(game: RussianRouletteGame, moves):
+    for slot, value in moves:
+        if slot == CHANCE:
+            game.revolver = 1 << value
+        elif slot != game.turn:
+            raise ValueError(f"move out of turn: slot {slot}")
+        elif game.shoot():
+            return slot ^ 1
+        else:
+            game.pass_turn()
+    return None
+
+async def start(ctx, message: types.Message, game_id: int, game: RussianRouletteGame):
+    player1_name, player2_name = game.names
+    
+    text = (
+        f"🔫 **Русская рулетка**\n\n"
+        f"🎯 Игроки:\n"
+        f"• {player1_name}\n"
+        f"• {player2_name}\n\n"
+        f"💀 В револьвере 1 патрон из 6 камор\n"
+        f"🎲 Ход: {player1_name}\n\n"
+        f"Нажми кнопку чтобы выстрелить..."
+    )
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="💥 ВЫСТРЕЛИТЬ!", callback_data=pack("rr", game_id))]
+    ])
+    
+    ctx.outbox.reply(message, text, reply_markup=keyboard)
+
+async def on_callback(ctx, callback: types.CallbackQuery):
+    _, game_id, _ = unpack(callback.data)
+    game = ctx.games.get_game(game_id)
+    
+    if not game:
+        await callback.answer("❌ Игра завершена!", show_alert=True)
+        return
+    
+    user_id = callback.from_user.id
+    slot = game.slot(user_id)
+    if slot is None:
+        await callback.answer("❌ Вы не участник игры!", show_alert=True)
+        return
+    
+    if slot != game.turn:
+        await callback.answer("❌ Сейчас не ваш ход!", show_alert=True)
+        return
+    
+    ctx.games.touch_game(game_id)
+    
+    # Определяем результат выстрела
+    current_chamber = game.chamber
+    is_bullet = game.shoot()
+    
+    player_name = game.names[slot]
+    
+    if is_bullet:
+        # Игрок проиграл
+        winner_id = game.player_ids[slot ^ 1]
+        winner_name = game.names[slot ^ 1]
+        
+        # Обновляем статистику
+        ctx.record_stats(game, winner_id, user_id)
+        
+        text = (
+            f"💥 **БАБАХ!**\n\n"
+            f"💀 {player_name} был убит!\n"
+            f"🏆 Победитель: {winner_name}\n\n"
+            f"Патрон был в каморе {current_chamber + 1}"
+        )
+        
+        ctx.outbox.edit(callback.message, text, reply_markup=get_play_again_keyboard("russian_roulette"))
+        ctx.games.finish_game(game_id, slot ^ 1)
+        
+    else:
+        # Игрок выжил, передаем ход
+        ctx.games.pass_turn(game_id)
+        next_player_name = game.current_name
+        
+        text = (
+            f"🔫 **Русская рулетка**\n\n"
+            f"✅ {player_name} выжил!\n"
+            f"🎲 Следующий ход: {next_player_name}\n"
+            f"📍 Пройдено камор: {game.chamber}\n\n"
+            f"Следующий игрок, нажми кнопку..."
+        )
+        
+        keyboard = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="💥 ВЫСТРЕЛИТЬ!", callback_data=pack("rr", game_id))]
+        ])
+        
+        ctx.outbox.edit(callback.message, text, reply_markup=keyboard)
+    
+    await callback.answer()
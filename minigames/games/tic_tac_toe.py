@@ -0,0 +1,251 @@
+from functools import lru_cache
+
+from aiogram import types
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from minigames.codec import pack, unpack
+from minigames.games.base import DRAW, Game
+from minigames.keyboards import get_play_again_keyboard
+
+SYMBOLS = ('❌', '⭕')
+EMPTY = '⬜'
+FULL_BOARD = 0b111111111
+
+# Поле от 3x3 до 8x8: в inline-клавиатуре Telegram не больше 8 кнопок в ряду
+MIN_SIZE, MAX_SIZE = 3, 8
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# Выигрышные линии поля 3x3 как битовые маски клеток 0..8 (для бота)
+WIN_MASKS = tuple(
+    sum(1 << cell for cell in line)
+    for line in (
+        (0, 1, 2), (3, 4, 5), (6, 7, 8),  # Горизонтальные
+        (0, 3, 6), (1, 4, 7), (2, 5, 8),  # Вертикальные
+        (0, 4, 8), (2, 4, 6)              # Диагональные
+    )
+)
+
+
+def is_win(marks):
+    for mask in WIN_MASKS:
+        if marks & mask == mask:
+            return True
+    return False
+
+
+def parse_options(args):
+    # /play tic_tac_toe [размер] [длина линии], например "/play tic_tac_toe 8 5"
+    if not args:
+        return {}
+    if len(args) > 2 or not all(arg.isdigit() for arg in args):
+        return None
+    size = int(args[0])
+    win_length = int(args[1]) if len(args) > 1 else min(size, 5)
+    if not MIN_SIZE <= size <= MAX_SIZE or not 3 <= win_length <= size:
+        return None
+    return {'size': size, 'win_length': win_length}
+
+
+def solo_error(options):
+    # Ходы бота (tic_tac_toe_ai) есть только для классического поля
+    if options.get('size', 3) != 3 or options.get('win_length', 3) != 3:
+        return "❌ Против бота можно играть только на поле 3x3"
+    return None
+
+
+class TicTacToeGame(Game):
+    __slots__ = ('marks', 'size', 'win_length')
+    
+    type = "tic_tac_toe"
+    
+    def __init__(self, *args, size=3, win_length=3):
+        super().__init__(*args)
+        # Битборды клеток каждого игрока, клетка = row * size + col
+        self.marks = [0, 0]
+        self.size = size
+        self.win_length = win_length
+    
+    def is_free(self, cell):
+        return not (self.marks[0] | self.marks[1]) >> cell & 1
+    
+    def place(self, slot, cell):
+        self.marks[slot] |= 1 << cell
+        self.record(slot, cell)
+    
+    def is_win_at(self, slot, cell):
+        # Проверяем только линии через последний ход: в каждом из четырех
+        # направлений считаем подряд идущие метки игрока в обе стороны
+        marks = self.marks[slot]
+        size = self.size
+        row, col = divmod(cell, size)
+        for d_row, d_col in DIRECTIONS:
+            count = 1
+            for step_row, step_col in ((d_row, d_col), (-d_row, -d_col)):
+                r, c = row + step_row, col + step_col
+                while 0 <= r < size and 0 <= c < size and marks >> (r * size + c) & 1:
+                    count += 1
+                    r += step_row
+                    c += step_col
+            if count >= self.win_length:
+                return True
+        return False
+    
+    def is_full(self):
+        return self.marks[0] | self.marks[1] == (1 << self.size * self.size) - 1
+    
+    @property
+    def board_name(self):
+        return f"{self.size}x{self.size}, {self.win_length} в ряд"
+    
+    @property
+    def options(self):
+        return {'size': self.size, 'win_length': self.win_length}
+
+create_state = TicTacToeGame
+
+def replay(game: TicTacToeGame, moves):
+    for slot, cell in moves:
+        if slot != game.turn or not 0 <= cell < game.size * game.size or not game.is_free(cell):
+            raise ValueError(f"invalid move {cell} by slot {slot}")
+        game.place(slot, cell)
+        if game.is_win_at(slot, cell):
+            return slot
+        if game.is_full():
+            return DRAW
+        game.pass_turn()
+    return None
+
+@lru_cache(maxsize=4096)
+def _keyboard_row(game_id, size, row, x_row, o_row):
+    # Ряд кнопок зависит только от меток в этом ряду: после хода меняется один ряд,
+    # остальные берутся из кэша
+    first = row * size
+    return tuple(
+        InlineKeyboardButton(
+            text=SYMBOLS[0] if x_row >> col & 1 else SYMBOLS[1] if o_row >> col & 1 else EMPTY,
+            callback_data=pack("ttt", game_id, first + col)
+        )
+        for col in range(size)
+    )
+
+@lru_cache(maxsize=1024)
+def _keyboard(game_id, size, x_marks, o_marks):
+    row_mask = (1 << size) - 1
+    return InlineKeyboardMarkup(inline_keyboard=[
+        list(_keyboard_row(game_id, size, row, x_marks >> row * size & row_mask, o_marks >> row * size & row_mask))
+        for row in range(size)
+    ])
+
+def get_tic_tac_toe_keyboard(game_id: int, game: TicTacToeGame):
+    # Клавиатура кэшируется по состоянию поля
+    x_marks, o_marks = game.marks
+    return _keyboard(game_id, game.size, x_marks, o_marks)
+
+async def start(ctx, message: types.Message, game_id: int, game: TicTacToeGame):
+    player1_name, player2_name = game.names
+    
+    text = (
+        f"⭕ **Крестики-нолики** ({game.board_name})\n\n"
+        f"🎯 Игроки:\n"
+        f"• {player1_name} (❌)\n"
+        f"• {player2_name} (⭕)\n\n"
+        f"🎲 Ход: {player1_name}\n\n"
+        f"Выбери клетку:"
+    )
+    
+    keyboard = get_tic_tac_toe_keyboard(game_id, game)
+    ctx.outbox.reply(message, text, reply_markup=keyboard)
+
+def make_move(ctx, callback: types.CallbackQuery, game_id: int, game: TicTacToeGame, slot: int, cell_index: int):
+    # Делаем ход
+    symbol = SYMBOLS[slot]
+    game.place(slot, cell_index)
+    player_name = game.names[slot]
+    
+    # Проверяем победу
+    if game.is_win_at(slot, cell_index):
+        # Игрок победил
+        winner_id = game.player_ids[slot]
+        loser_id = game.player_ids[slot ^ 1]
+        winner_name = player_name
+        loser_name = game.names[slot ^ 1]
+        
+        text = (
+            f"⭕ **Крестики-нолики - ПОБЕДА!**\n\n"
+            f"🏆 Победитель: {winner_name} ({symbol})\n"
+            f"💀 Проигравший: {loser_name}\n\n"
+            f"🎯 {winner_name} выиграл партию!"
+        )
+        
+        ctx.record_stats(game, winner_id, loser_id)
+        
+        keyboard = get_tic_tac_toe_keyboard(game_id, game)
+        ctx.outbox.edit(callback.message, text, reply_markup=keyboard)
+        ctx.outbox.reply(callback.message, "🎮 Игра завершена!", reply_markup=get_play_again_keyboard("tic_tac_toe"))
+        ctx.games.finish_game(game_id, slot)
+        return True
+        
+    elif game.is_full():
+        # Ничья
+        player1_id, player2_id = game.player_ids
+        
+        text = f"⭕ **Крестики-нолики - НИЧЬЯ!**\n\n🤝 Партия завершилась вничью!"
+        
+        ctx.record_stats(game, player1_id, player2_id, draw=True)
+        
+        keyboard = get_tic_tac_toe_keyboard(game_id, game)
+        ctx.outbox.edit(callback.message, text, reply_markup=keyboard)
+        ctx.outbox.reply(callback.message, "🎮 Игра завершена!", reply_markup=get_play_again_keyboard("tic_tac_toe"))
+        ctx.games.finish_game(game_id, DRAW)
+        return True
+        
+    else:
+        # Продолжаем игру
+        ctx.games.pass_turn(game_id)
+        next_player_name = game.current_name
+        next_symbol = SYMBOLS[game.turn]
+        
+        text = (
+            f"⭕ **Крестики-нолики**\n\n"
+            f"🎯 Ход сделал: {player_name} ({symbol})\n"
+            f"🎲 Следующий ход: {next_player_name} ({next_symbol})"
+        )
+        
+        keyboard = get_tic_tac_toe_keyboard(game_id, game)
+        ctx.outbox.edit(callback.message, text, reply_markup=keyboard)
+    
+    return False
+
+async def on_callback(ctx, callback: types.CallbackQuery):
+    _, game_id, cell_index = unpack(callback.data)
+    
+    game = ctx.games.get_game(game_id)
+    if not game or not cell_index or not cell_index.isdigit() or int(cell_index) >= game.size * game.size:
+        await callback.answer("❌ Игра завершена!", show_alert=True)
+        return
+    
+    cell_index = int(cell_index)
+    user_id = callback.from_user.id
+    slot = game.slot(user_id)
+    if slot is None:
+        await callback.answer("❌ Вы не участник игры!", show_alert=True)
+        return
+    
+    if slot != game.turn:
+        await callback.answer("❌ Сейчас не ваш ход!", show_alert=True)
+        return
+    
+    if not game.is_free(cell_index):
+        await callback.answer("❌ Клетка уже занята!", show_alert=True)
+        return
+    
+    ctx.games.touch_game(game_id)
+    
+    finished = make_move(ctx, callback, game_id, game, slot, cell_index)
+    # В игре с ботом он отвечает сразу; правка того же сообщения заменит
+    # еще не отправленную в очереди, так что уйдет одно редактирование
+    if not finished and game.solo:
+        from minigames.games.tic_tac_toe_ai import choose_move
+        make_move(ctx, callback, game_id, game, 1, choose_move(*game.marks))
+    
+    await callback.answer()
@@ -0,0 +1,63 @@
+import random
+
+from minigames.games.tic_tac_toe import FULL_BOARD, is_win
+
+# Таблица идеальной игры для поля 3x3: (крестики, нолики) -> лучшие клетки для того,
+# чей сейчас ход. Перебираются все достижимые позиции (их около 4.5 тысяч),
+# таблица строится один раз при первом ходе бота, дальше ход бота - поиск в dict.
+_table = None
+
+
+def _solve():
+    table = {}
+    scores = {}
+    
+    def search(x_marks, o_marks):
+        # Оценка позиции для ходящего: победа раньше лучше, поражение позже лучше
+        key = (x_marks, o_marks)
+        score = scores.get(key)
+        if score is not None:
+            return score
+        
+        occupied = x_marks | o_marks
+        x_to_move = bin(x_marks).count('1') == bin(o_marks).count('1')
+        best_score = None
+        best_cells = []
+        for cell in range(9):
+            if occupied >> cell & 1:
+                continue
+            bit = 1 << cell
+            mover = (x_marks if x_to_move else o_marks) | bit
+            if is_win(mover):
+                score = 10 - bin(occupied | bit).count('1')
+            elif occupied | bit == FULL_BOARD:
+                score = 0
+            elif x_to_move:
+                score = -search(mover, o_marks)
+            else:
+                score = -search(x_marks, mover)
+            
+            if best_score is None or score > best_score:
+                best_score = score
+                best_cells = [cell]
+            elif score == best_score:
+                best_cells.append(cell)
+        
+        scores[key] = best_score
+        table[key] = tuple(best_cells)
+        return best_score
+    
+    search(0, 0)
+    return table
+
+
+def best_moves(x_marks, o_marks):
+    global _table
+    if _table is None:
+        _table = _solve()
+    return _table[(x_marks, o_marks)]
+
+
+def choose_move(x_marks, o_marks):
+    # Среди равноценных лучших ходов выбираем случайный, чтобы партии не повторялись
+    return random.choice(best_moves(x_marks, o_marks))
@@ -0,0 +1,111 @@
+# Общая статистика игрока по всем чатам.
+#
+# users и game_stats хранят счетчики по (user_id, chat_id). Сумма по всем чатам
+# лежит готовой в global_stats: строки пополняются тем же пакетом, что и
+# users (StatsWriter.write_batch), а для топа есть индекс по очкам. Пересобрать
+# таблицу из users (перенос существующих данных или сверка) можно так:
+#
+#   python -m minigames.global_stats games.db
+import sqlite3
+import sys
+import time
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS global_stats (
+        user_id INTEGER PRIMARY KEY,
+        wins INTEGER DEFAULT 0,
+        losses INTEGER DEFAULT 0,
+        points INTEGER DEFAULT 0
+    )
+'''
+
+INDEX = 'CREATE INDEX IF NOT EXISTS idx_global_stats_points ON global_stats (points DESC)'
+
+
+def init(conn):
+    # Создает таблицу; при первом запуске на старой БД сразу переносит данные
+    conn.execute(SCHEMA)
+    conn.execute(INDEX)
+    if conn.execute('SELECT 1 FROM global_stats LIMIT 1').fetchone() is None:
+        rebuild(conn)
+
+
+def add_rows(conn, user_rows):
+    # user_rows: (wins, losses, points, user_id, chat_id), как в StatsWriter.write_batch
+    totals = {}
+    for wins, losses, points, user_id, _ in user_rows:
+        total = totals.get(user_id)
+        if total is None:
+            totals[user_id] = [wins, losses, points]
+        else:
+            total[0] += wins
+            total[1] += losses
+            total[2] += points
+    conn.executemany(
+        '''INSERT INTO global_stats (user_id, wins, losses, points) VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id) DO UPDATE SET
+            wins = wins + excluded.wins,
+            losses = losses + excluded.losses,
+            points = points + excluded.points''',
+        [(user_id, wins, losses, points) for user_id, (wins, losses, points) in totals.items()]
+    )
+
+
+def rebuild(conn):
+    # Заменяет global_stats суммами из users одним INSERT ... SELECT -> число игроков
+    with conn:
+        conn.execute('DELETE FROM global_stats')
+        return conn.execute(
+            '''INSERT INTO global_stats (user_id, wins, losses, points)
+            SELECT user_id, SUM(wins), SUM(losses), SUM(points) FROM users GROUP BY user_id'''
+        ).rowcount
+
+
+# Имя игрока - из любого его чата (поиск по префиксу ключа users)
+USERNAME = "COALESCE((SELECT username FROM users u WHERE u.user_id = g.user_id LIMIT 1), '')"
+
+
+def top(conn, limit=10):
+    # -> [(username, wins, losses, points)] по убыванию очков, обходом индекса
+    return conn.execute(
+        f'''SELECT {USERNAME}, g.wins, g.losses, g.points FROM global_stats g
+        WHERE g.wins + g.losses > 0 ORDER BY g.points DESC LIMIT ?''',
+        (limit,)
+    ).fetchall()
+
+
+def profile(conn, user_id):
+    # -> (username, wins, losses, points, место, число чатов, [(game_type, wins, losses)]) или None
+    row = conn.execute(
+        f'SELECT {USERNAME}, g.wins, g.losses, g.points FROM global_stats g WHERE g.user_id = ?',
+        (user_id,)
+    ).fetchone()
+    if row is None or row[1] + row[2] == 0:
+        return None
+    # Место среди тех же игроков, что и в top(): только с сыгранными партиями
+    rank = conn.execute(
+        'SELECT COUNT(*) + 1 FROM global_stats WHERE points > ? AND wins + losses > 0', (row[3],)
+    ).fetchone()[0]
+    chats = conn.execute('SELECT COUNT(*) FROM users WHERE user_id = ?', (user_id,)).fetchone()[0]
+    games = conn.execute(
+        '''SELECT game_type, SUM(wins), SUM(losses) FROM game_stats WHERE user_id = ?
+        GROUP BY game_type ORDER BY SUM(wins) + SUM(losses) DESC''',
+        (user_id,)
+    ).fetchall()
+    return row + (rank, chats, games)
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("usage: python -m minigames.global_stats DB_PATH")
+        return
+    conn = sqlite3.connect(sys.argv[1])
+    conn.execute(SCHEMA)
+    conn.execute(INDEX)
+    started = time.perf_counter()
+    players = rebuild(conn)
+    print(f"rebuilt {players} global rows in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
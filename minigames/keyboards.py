@@ -0,0 +1,39 @@
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from minigames.games import GAME_TYPES
+
+
+def get_main_keyboard():
+    keyboard = [
+        [InlineKeyboardButton(text="🎮 Выбрать игру", callback_data="select_game")],
+        [InlineKeyboardButton(text="📊 Моя статистика", callback_data="my_stats"),
+         InlineKeyboardButton(text="🏆 Топ игроков", callback_data="top_players")],
+        [InlineKeyboardButton(text="📖 Правила игр", callback_data="game_rules")]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_games_keyboard():
+    # По две игры в ряд, в порядке регистрации
+    buttons = [
+        InlineKeyboardButton(text=spec.name, callback_data=f"game_{spec.type}")
+        for spec in GAME_TYPES.values()
+    ]
+    keyboard = [buttons[i:i + 2] for i in range(0, len(buttons), 2)]
+    keyboard.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="main_menu")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_game_menu_keyboard(game_type):
+    # Поиск соперника, для игр с ботом - еще кнопка одиночной игры, затем главное меню
+    row = [InlineKeyboardButton(text="🔍 Найти соперника", callback_data=f"find_{game_type}")]
+    if GAME_TYPES[game_type].solo:
+        row.append(InlineKeyboardButton(text="🤖 Играть с ботом", callback_data=f"solo_{game_type}"))
+    keyboard = [row] + get_main_keyboard().inline_keyboard
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_play_again_keyboard(game_type):
+    keyboard = [
+        [InlineKeyboardButton(text="🎮 Играть снова", callback_data=f"game_{game_type}"),
+         InlineKeyboardButton(text="📊 Статистика", callback_data="my_stats")],
+        [InlineKeyboardButton(text="🏠 Главное меню", callback_data="main_menu")]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
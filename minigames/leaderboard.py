@@ -0,0 +1,107 @@
+import bisect
+from collections import OrderedDict
+
+
+# Таблица лидеров чата в памяти: все игроки чата и список (-points, user_id),
+# отсортированный по очкам. Топ - это срез первых N элементов, изменение очков -
+# удаление и вставка через bisect.
+class ChatBoard:
+    __slots__ = ('rows', 'order')
+    
+    def __init__(self):
+        # user_id -> [username, wins, losses, points]
+        self.rows = {}
+        self.order = []
+    
+    def set_row(self, user_id, username, wins, losses, points):
+        row = self.rows.get(user_id)
+        if row is not None:
+            self._unlink(user_id, row[3])
+        self.rows[user_id] = [username, wins, losses, points]
+        bisect.insort(self.order, (-points, user_id))
+    
+    def add_user(self, user_id, username):
+        # Новый игрок с нулевым счетом или новое имя известного
+        row = self.rows.get(user_id)
+        if row is None:
+            self.set_row(user_id, username, 0, 0, 0)
+        else:
+            row[0] = username
+    
+    def apply(self, user_id, wins, losses):
+        row = self.rows.get(user_id)
+        if row is None:
+            # Игрока нет в таблице users - UPDATE в БД тоже ничего не изменит
+            return
+        self._unlink(user_id, row[3])
+        row[1] += wins
+        row[2] += losses
+        row[3] += wins - losses
+        bisect.insort(self.order, (-row[3], user_id))
+    
+    def _unlink(self, user_id, points):
+        index = bisect.bisect_left(self.order, (-points, user_id))
+        del self.order[index]
+    
+    def top(self, limit):
+        rows = self.rows
+        return [tuple(rows[user_id]) for _, user_id in self.order[:limit]]
+
+
+# Кэш таблиц лидеров по чатам (LRU). Таблица чата строится лениво из БД;
+# изменения, пришедшие во время загрузки, копятся и применяются после нее.
+class Leaderboard:
+    def __init__(self, max_chats=1000):
+        self.max_chats = max_chats
+        self.boards = OrderedDict()
+        self.loading = {}
+    
+    def is_loaded(self, chat_id):
+        return chat_id in self.boards
+    
+    def begin_load(self, chat_id):
+        self.loading.setdefault(chat_id, [])
+    
+    def abort_load(self, chat_id):
+        self.loading.pop(chat_id, None)
+    
+    def finish_load(self, chat_id, rows, pending, users=None):
+        # rows: (user_id, username, wins, losses, points) из БД,
+        # pending: {user_id: (wins, losses)} еще не записанные в БД,
+        # users: {user_id: username} еще не записанные новые игроки и имена
+        board = ChatBoard()
+        for user_id, username, wins, losses, points in rows:
+            board.set_row(user_id, username, wins, losses, points)
+        for user_id, username in (users or {}).items():
+            board.add_user(user_id, username)
+        for user_id, (wins, losses) in pending.items():
+            board.apply(user_id, wins, losses)
+        for change in self.loading.pop(chat_id, []):
+            if change[0] == 'user':
+                board.add_user(change[1], change[2])
+            else:
+                board.apply(change[1], change[2], change[3])
+        
+        self.boards[chat_id] = board
+        self.boards.move_to_end(chat_id)
+        while len(self.boards) > self.max_chats:
+            self.boards.popitem(last=False)
+    
+    def add_user(self, chat_id, user_id, username):
+        board = self.boards.get(chat_id)
+        if board is not None:
+            board.add_user(user_id, username)
+        elif chat_id in self.loading:
+            self.loading[chat_id].append(('user', user_id, username))
+    
+    def apply(self, chat_id, user_id, wins, losses):
+        board = self.boards.get(chat_id)
+        if board is not None:
+            board.apply(user_id, wins, losses)
+        elif chat_id in self.loading:
+            self.loading[chat_id].append(('stats', user_id, wins, losses))
+    
+    def top(self, chat_id, limit=10):
+        board = self.boards[chat_id]
+        self.boards.move_to_end(chat_id)
+        return board.top(limit)
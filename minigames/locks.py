@@ -0,0 +1,51 @@
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+
+# Блокировки по ключу (например, по id игры). Lock создается при первом
+# обращении и удаляется, когда его больше никто не держит и не ждет,
+# поэтому неактивные игры ничего не занимают.
+class KeyedLocks:
+    __slots__ = ('_locks',)
+    
+    def __init__(self):
+        # key -> [asyncio.Lock, число владельцев и ожидающих]
+        self._locks = {}
+    
+    @asynccontextmanager
+    async def hold(self, key):
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+    
+    def __len__(self):
+        return len(self._locks)
+
+
+# Последние увиденные id (callback query, update) для отбрасывания повторов
+class RecentIds:
+    __slots__ = ('_ids', 'maxlen', 'duplicates')
+    
+    def __init__(self, maxlen=10000):
+        self._ids = OrderedDict()
+        self.maxlen = maxlen
+        self.duplicates = 0
+    
+    def check(self, key):
+        # True, если id встретился впервые
+        if key in self._ids:
+            self.duplicates += 1
+            return False
+        self._ids[key] = None
+        if len(self._ids) > self.maxlen:
+            self._ids.popitem(last=False)
+        return True
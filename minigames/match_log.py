@@ -0,0 +1,125 @@
+import json
+import logging
+import sqlite3
+import sys
+import time
+from array import array
+from collections import namedtuple
+
+from minigames.batching import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+INT32_MIN, INT32_MAX = -2 ** 31, 2 ** 31 - 1
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS match_log (
+        id INTEGER PRIMARY KEY,
+        game_type TEXT,
+        chat_id INTEGER,
+        player1_id INTEGER,
+        player2_id INTEGER,
+        started_at REAL,
+        finished_at REAL,
+        result INTEGER,
+        options TEXT,
+        moves BLOB
+    )
+'''
+
+Match = namedtuple('Match', (
+    'id', 'game_type', 'chat_id', 'player1_id', 'player2_id',
+    'started_at', 'finished_at', 'result', 'options', 'moves'
+))
+
+
+def encode_moves(moves):
+    # Журнал ходов -> int32 little-endian. Значения вне int32 (ответ "10**30" в
+    # математике) верными быть не могут и сохраняются как граница диапазона.
+    try:
+        data = array('i', moves)
+    except OverflowError:
+        data = array('i', [min(max(value, INT32_MIN), INT32_MAX) for value in moves])
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
+
+
+def decode_moves(blob):
+    data = array('i')
+    data.frombytes(blob)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data
+
+
+def pairs(moves):
+    # Плоский журнал -> пары (слот, значение)
+    iterator = iter(moves)
+    return zip(iterator, iterator)
+
+
+# Журнал завершенных партий: только добавление, по строке на партию.
+# append() складывает запись в память, а пакет уходит одной транзакцией
+# в потоке Storage по порогу размера или по таймеру (как StatsWriter).
+class MatchLog(BatchWriter):
+    def __init__(self, storage, max_pending=500, flush_interval=1.0):
+        super().__init__(storage, max_pending, flush_interval)
+        self.pending = []
+        self.written = 0
+    
+    def append(self, game, result):
+        options = game.options
+        self.pending.append((
+            game.type, game.chat_id, game.player_ids[0], game.player_ids[1],
+            game.created_at, time.time(), result,
+            json.dumps(options) if options else None, encode_moves(game.moves)
+        ))
+        self._queued(len(self.pending))
+    
+    @staticmethod
+    def write_batch(conn, batch):
+        with conn:
+            conn.executemany(
+                'INSERT INTO match_log (game_type, chat_id, player1_id, player2_id, '
+                'started_at, finished_at, result, options, moves) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                batch
+            )
+    
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            await self.storage.run(self.write_batch, batch)
+        except Exception:
+            logger.exception("Match log flush failed, %d matches requeued", len(batch))
+            self.pending[:0] = batch
+            return
+        self.written += len(batch)
+
+
+def iter_matches(conn, game_type=None, after_id=0, match_id=None, batch_size=10000):
+    # Потоковое чтение журнала по возрастанию id: в памяти не больше batch_size строк
+    sql = 'SELECT * FROM match_log WHERE id > ?'
+    params = [after_id]
+    if game_type is not None:
+        sql += ' AND game_type = ?'
+        params.append(game_type)
+    if match_id is not None:
+        sql += ' AND id = ?'
+        params.append(match_id)
+    cursor = conn.execute(sql + ' ORDER BY id', params)
+    
+    loads = json.loads
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        for row in rows:
+            yield Match(*row[:8], loads(row[8]) if row[8] else {}, decode_moves(row[9]))
+
+
+def open_log(db_path):
+    # Соединение только для чтения: повтор можно запускать рядом с работающим ботом
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
@@ -0,0 +1,94 @@
+import time
+from collections import OrderedDict
+
+from minigames.expiry import DeadlineHeap
+
+# Ожидающий игрок удаляется из очереди через 2 минуты
+SEARCH_TIMEOUT = 120
+
+
+class Waiter:
+    __slots__ = ('scope', 'chat_id', 'user_id', 'name', 'game_type', 'band')
+    
+    def __init__(self, scope, chat_id, user_id, name, game_type, band):
+        self.scope = scope
+        self.chat_id = chat_id
+        self.user_id = user_id
+        self.name = name
+        self.game_type = game_type
+        self.band = band
+
+
+# Очереди поиска соперника: (scope, game_type, band) -> OrderedDict {user_id: Waiter}.
+# scope - обычно chat_id, band - диапазон очков при подборе по силе (иначе 0).
+# Встать в очередь, выйти из нее и забрать самого давнего ожидающего - O(1);
+# просроченные ожидающие снимаются той же кучей дедлайнов, что и игры.
+class Matchmaker:
+    def __init__(self, on_expire=None, timeout=SEARCH_TIMEOUT, skill_band=0, clock=time.monotonic):
+        self.on_expire = on_expire
+        self.timeout = timeout
+        # Ширина диапазона очков; 0 - подбор без учета силы
+        self.skill_band = skill_band
+        self.queues = {}
+        # (scope, user_id) -> Waiter: один поиск на игрока в каждом чате
+        self.waiters = {}
+        self.expiry = DeadlineHeap(self._expire, clock)
+    
+    def __len__(self):
+        return len(self.waiters)
+    
+    def band(self, points):
+        return points // self.skill_band if self.skill_band else 0
+    
+    def get(self, scope, user_id):
+        return self.waiters.get((scope, user_id))
+    
+    def find(self, scope, chat_id, user_id, name, game_type, points=0):
+        # Ищем соперника; если его нет, ставим игрока в очередь.
+        # -> Waiter соперника (уже снятый с очереди) или None
+        self.cancel(scope, user_id)
+        band = self.band(points)
+        # Свой диапазон очков, затем соседние
+        bands = (band, band - 1, band + 1) if self.skill_band else (band,)
+        for candidate in bands:
+            queue = self.queues.get((scope, game_type, candidate))
+            if queue:
+                _, opponent = queue.popitem(last=False)
+                self._forget(opponent, queue)
+                return opponent
+        
+        waiter = Waiter(scope, chat_id, user_id, name, game_type, band)
+        self.queues.setdefault((scope, game_type, band), OrderedDict())[user_id] = waiter
+        self.waiters[(scope, user_id)] = waiter
+        self.expiry.schedule((scope, user_id), self.timeout)
+        return None
+    
+    def cancel(self, scope, user_id):
+        waiter = self.waiters.get((scope, user_id))
+        if waiter is None:
+            return None
+        queue = self.queues[(scope, waiter.game_type, waiter.band)]
+        del queue[user_id]
+        self._forget(waiter, queue)
+        return waiter
+    
+    def _forget(self, waiter, queue):
+        key = (waiter.scope, waiter.user_id)
+        del self.waiters[key]
+        self.expiry.cancel(key)
+        if not queue:
+            del self.queues[(waiter.scope, waiter.game_type, waiter.band)]
+    
+    def _expire(self, key):
+        waiter = self.cancel(*key)
+        if waiter is not None and self.on_expire is not None:
+            self.on_expire(waiter)
+    
+    def count_by_type(self):
+        counts = {}
+        for waiter in self.waiters.values():
+            counts[waiter.game_type] = counts.get(waiter.game_type, 0) + 1
+        return counts
+    
+    async def stop(self):
+        await self.expiry.stop()
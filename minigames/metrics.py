@@ -0,0 +1,216 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from aiohttp import web
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм в секундах (как le в Prometheus)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+    
+    def __init__(self):
+        # Последняя корзина - все, что больше BUCKETS[-1]
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def quantile(self, q):
+        # Оценка по корзинам с линейной интерполяцией внутри корзины
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-1]
+
+
+class Timer:
+    __slots__ = ('histogram', 'started')
+    
+    def __init__(self, histogram):
+        self.histogram = histogram
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+# Гистограммы одной метрики с разбивкой по значению одной метки.
+# Новые метки добавляет и поток Storage, поэтому добавление и чтение списка
+# серий идут под блокировкой; найденная серия берется без нее.
+class HistogramFamily:
+    __slots__ = ('name', 'help', 'label', 'series', '_lock')
+    
+    def __init__(self, name, help, label):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.series = {}
+        self._lock = threading.Lock()
+    
+    def labels(self, value):
+        histogram = self.series.get(value)
+        if histogram is None:
+            with self._lock:
+                histogram = self.series.setdefault(value, Histogram())
+        return histogram
+    
+    def items(self):
+        # Копия серий: обход не упадет, если другой поток добавит метку
+        with self._lock:
+            return list(self.series.items())
+    
+    def observe(self, value, seconds):
+        self.labels(value).observe(seconds)
+    
+    def time(self, value):
+        return Timer(self.labels(value))
+
+
+# Значение gauge вычисляется при чтении метрик, на горячем пути ничего не считается.
+# fn возвращает число или {значение метки: число}.
+class Gauge:
+    __slots__ = ('name', 'help', 'label', 'fn')
+    
+    def __init__(self, name, help, fn, label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.fn = fn
+    
+    def values(self):
+        value = self.fn()
+        if isinstance(value, dict):
+            return sorted(value.items())
+        return [(None, value)]
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = {}
+        self.gauges = {}
+    
+    def histogram(self, name, help, label):
+        family = self.histograms.get(name)
+        if family is None:
+            family = self.histograms[name] = HistogramFamily(name, help, label)
+        return family
+    
+    def gauge(self, name, help, fn, label=None):
+        self.gauges[name] = Gauge(name, help, fn, label)
+    
+    def _gauge_values(self, gauge):
+        try:
+            return gauge.values()
+        except Exception:
+            logger.exception("Failed to read gauge %s", gauge.name)
+            return []
+    
+    def render(self):
+        # Текстовый формат Prometheus
+        lines = []
+        for family in self.histograms.values():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} histogram")
+            for value, histogram in sorted(family.items()):
+                label = f'{family.label}="{value}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{family.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{family.name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+                lines.append(f'{family.name}_sum{{{label}}} {histogram.sum:.6f}')
+                lines.append(f'{family.name}_count{{{label}}} {histogram.count}')
+        for gauge in self.gauges.values():
+            lines.append(f"# HELP {gauge.name} {gauge.help}")
+            lines.append(f"# TYPE {gauge.name} gauge")
+            for value, number in self._gauge_values(gauge):
+                if value is None:
+                    lines.append(f"{gauge.name} {number}")
+                else:
+                    lines.append(f'{gauge.name}{{{gauge.label}="{value}"}} {number}')
+        return "\n".join(lines) + "\n"
+    
+    def summary(self):
+        # Краткий отчет для команды /metrics: число вызовов, среднее, p50, p99 в мс
+        lines = []
+        for family in self.histograms.values():
+            series = family.items()
+            if not series:
+                continue
+            lines.append(f"{family.name}:")
+            for value, histogram in sorted(series, key=lambda item: -item[1].sum):
+                average = histogram.sum / histogram.count if histogram.count else 0.0
+                lines.append(
+                    f"  {value}: n={histogram.count} avg={average * 1000:.2f} "
+                    f"p50={histogram.quantile(0.5) * 1000:.2f} p99={histogram.quantile(0.99) * 1000:.2f}"
+                )
+        for gauge in self.gauges.values():
+            values = self._gauge_values(gauge)
+            if len(values) == 1 and values[0][0] is None:
+                lines.append(f"{gauge.name}: {values[0][1]}")
+            else:
+                lines.append(f"{gauge.name}: " + ", ".join(f"{value}={number}" for value, number in values))
+        return "\n".join(lines)
+
+
+registry = Registry()
+
+HANDLER_SECONDS = registry.histogram('minigames_handler_seconds', 'Update handler time', 'handler')
+API_SECONDS = registry.histogram('minigames_api_seconds', 'Bot API request time', 'method')
+
+
+# Время обработчиков aiogram (inner-middleware: вызывается только для найденного обработчика)
+class HandlerTimingMiddleware(BaseMiddleware):
+    async def __call__(self, handler, event, data):
+        histogram = HANDLER_SECONDS.labels(data["handler"].callback.__name__)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+
+# Время запросов к Bot API, включая ошибки
+class ApiTimingMiddleware(BaseRequestMiddleware):
+    async def __call__(self, make_request, bot, method):
+        histogram = API_SECONDS.labels(type(method).__name__)
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+
+async def start_metrics_server(host, port, registry=registry):
+    async def handle(request):
+        return web.Response(text=registry.render(), content_type="text/plain")
+    
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("📈 Metrics available at http://%s:%s/metrics", host, port)
+    return runner
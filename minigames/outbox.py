@@ -0,0 +1,274 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.methods import EditMessageText, SendMessage
+from aiogram.types import ReplyParameters
+
+logger = logging.getLogger(__name__)
+
+# Лимиты Telegram: не больше 20 сообщений в минуту на группу,
+# около 1 в секунду на личный чат и около 30 в секунду на бота в целом.
+# Для групп - скользящее окно: бакет с запасом 20 за первую минуту пропустил бы
+# запас плюс пополнение, около 40 сообщений
+GROUP_LIMIT, GROUP_WINDOW = 20, 60.0
+PRIVATE_RATE, PRIVATE_BURST = 1.0, 3
+GLOBAL_RATE, GLOBAL_BURST = 30.0, 30
+
+# Сколько сообщений помнить для пропуска повторных редактирований
+MAX_RENDERED = 10000
+
+
+def render_hash(text, parse_mode=None, reply_markup=None):
+    # parse_mode по умолчанию (Default) приравниваем к отсутствующему
+    if not isinstance(parse_mode, str):
+        parse_mode = None
+    markup = reply_markup.model_dump_json(exclude_none=True) if reply_markup is not None else None
+    return hash((text, parse_mode, markup))
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'burst', 'tokens', 'updated', 'clock')
+    
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.clock = clock
+        self.updated = clock()
+    
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self):
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+    
+    def time_to_full(self):
+        self._refill()
+        return (self.burst - self.tokens) / self.rate
+    
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+
+# Не больше limit отправок в любом окне длиной window секунд
+class SlidingWindow:
+    __slots__ = ('limit', 'window', 'sent', 'clock')
+    
+    def __init__(self, limit, window, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.sent = deque()
+        self.clock = clock
+    
+    def _expire(self):
+        now = self.clock()
+        while self.sent and self.sent[0] <= now - self.window:
+            self.sent.popleft()
+        return now
+    
+    def wait_time(self):
+        now = self._expire()
+        return 0.0 if len(self.sent) < self.limit else self.sent[0] + self.window - now
+    
+    def time_to_full(self):
+        now = self._expire()
+        return self.sent[-1] + self.window - now if self.sent else 0.0
+    
+    def take(self):
+        self.sent.append(self.clock())
+
+
+# Исходящая очередь одного чата
+class ChatOutbox:
+    __slots__ = ('queue', 'edits', 'bucket', 'paused_until', 'wakeup', 'worker')
+    
+    def __init__(self, bucket):
+        self.queue = deque()
+        # (message_id) -> запрос на редактирование, еще не отправленный
+        self.edits = {}
+        self.bucket = bucket
+        self.paused_until = 0.0
+        self.wakeup = asyncio.Event()
+        self.worker = None
+
+
+# Отправка сообщений в фоне. Обработчики ставят запросы в очередь чата и сразу
+# возвращаются; воркер чата отправляет их по порядку в рамках лимитов чата и бота.
+# Новое редактирование сообщения заменяет еще не отправленное, так что уходит
+# только последнее состояние поля. Редактирование, которое не меняет текст и клавиатуру,
+# не отправляется вовсе. На 429 чат ставится на паузу на retry_after.
+class Outbox:
+    def __init__(self, bot, clock=time.monotonic):
+        self.bot = bot
+        self.clock = clock
+        self.global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_BURST, clock)
+        self.chats = {}
+        # (chat_id, message_id) -> хэш последнего успешно отправленного (text, markup)
+        self.rendered = OrderedDict()
+        self._closing = False
+        self.sent = 0
+        self.collapsed = 0
+        self.retries = 0
+        self.failed = 0
+        self.skipped = 0
+    
+    def _chat(self, chat_id):
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            if chat_id < 0:
+                bucket = SlidingWindow(GROUP_LIMIT, GROUP_WINDOW, self.clock)
+            else:
+                bucket = TokenBucket(PRIVATE_RATE, PRIVATE_BURST, self.clock)
+            chat = self.chats[chat_id] = ChatOutbox(bucket)
+        return chat
+    
+    def _enqueue(self, chat_id, method):
+        chat = self._chat(chat_id)
+        chat.queue.append(method)
+        chat.wakeup.set()
+        if chat.worker is None:
+            chat.worker = asyncio.create_task(self._run(chat_id, chat))
+    
+    def send(self, chat_id, text, **kwargs):
+        self._enqueue(chat_id, SendMessage(chat_id=chat_id, text=text, **kwargs))
+    
+    def reply(self, message, text, **kwargs):
+        reply_parameters = ReplyParameters(message_id=message.message_id, allow_sending_without_reply=True)
+        self.send(message.chat.id, text, reply_parameters=reply_parameters, **kwargs)
+    
+    def _remember(self, key, rendered):
+        self.rendered[key] = rendered
+        self.rendered.move_to_end(key)
+        if len(self.rendered) > MAX_RENDERED:
+            self.rendered.popitem(last=False)
+    
+    def edit(self, message, text, **kwargs):
+        chat_id = message.chat.id
+        key = (chat_id, message.message_id)
+        parse_mode = kwargs.get('parse_mode')
+        rendered = render_hash(text, parse_mode, kwargs.get('reply_markup'))
+        chat = self.chats.get(chat_id)
+        pending = chat.edits.get(message.message_id) if chat is not None else None
+        if pending is not None:
+            # Сравниваем с тем, что уже ждет отправки
+            last = render_hash(pending.text, pending.parse_mode, pending.reply_markup)
+        else:
+            last = self.rendered.get(key)
+            if last is None and parse_mode is None:
+                # Сообщения нет в кэше - сравниваем с тем, что пришло в апдейте
+                last = render_hash(message.text, None, message.reply_markup)
+        if rendered == last:
+            self.skipped += 1
+            return
+        
+        method = EditMessageText(chat_id=chat_id, message_id=message.message_id, text=text, **kwargs)
+        chat = self._chat(chat_id)
+        if pending is not None:
+            # Подменяем устаревшее состояние на месте, сохраняя позицию в очереди
+            chat.queue[chat.queue.index(pending)] = method
+            self.collapsed += 1
+        else:
+            self._enqueue(chat_id, method)
+        chat.edits[message.message_id] = method
+    
+    def pending(self):
+        return sum(len(chat.queue) for chat in self.chats.values())
+    
+    async def _wait_for_budget(self, chat):
+        while True:
+            wait = max(
+                chat.bucket.wait_time(),
+                self.global_bucket.wait_time(),
+                chat.paused_until - self.clock()
+            )
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        chat.bucket.take()
+        self.global_bucket.take()
+    
+    async def _run(self, chat_id, chat):
+        try:
+            while True:
+                if not chat.queue:
+                    if self._closing:
+                        break
+                    # Состояние чата держим, пока бакет не восполнится, иначе лимит обнулится
+                    chat.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(chat.wakeup.wait(), chat.bucket.time_to_full())
+                    except asyncio.TimeoutError:
+                        if not chat.queue:
+                            break
+                    continue
+                
+                # Пока ждем лимит, запрос в голове очереди еще может быть заменен
+                await self._wait_for_budget(chat)
+                method = chat.queue.popleft()
+                if isinstance(method, EditMessageText) and chat.edits.get(method.message_id) is method:
+                    del chat.edits[method.message_id]
+                
+                try:
+                    result = await self.bot(method)
+                    self.sent += 1
+                    # Хэш запоминаем только после успешной отправки: после ошибки
+                    # в кэше не должно остаться состояния, которого пользователь не видел
+                    message_id = result.message_id if isinstance(method, SendMessage) else method.message_id
+                    self._remember(
+                        (chat_id, message_id),
+                        render_hash(method.text, method.parse_mode, method.reply_markup)
+                    )
+                except TelegramRetryAfter as e:
+                    self.retries += 1
+                    chat.paused_until = self.clock() + e.retry_after
+                    logger.warning("Flood control in chat %s, retry in %s s", chat_id, e.retry_after)
+                    # Повторяем, если за это время не пришло более новое редактирование
+                    if isinstance(method, EditMessageText):
+                        if method.message_id in chat.edits:
+                            continue
+                        chat.edits[method.message_id] = method
+                    chat.queue.appendleft(method)
+                except TelegramBadRequest as e:
+                    if isinstance(method, EditMessageText) and "not modified" in e.message:
+                        # Сообщение уже показывает это состояние
+                        self._remember(
+                            (chat_id, method.message_id),
+                            render_hash(method.text, method.parse_mode, method.reply_markup)
+                        )
+                        logger.debug("Outbox edit not modified in chat %s", chat_id)
+                        continue
+                    self.failed += 1
+                    if isinstance(method, EditMessageText):
+                        self.rendered.pop((chat_id, method.message_id), None)
+                    logger.warning("Outbox request rejected in chat %s: %s", chat_id, e.message)
+                except Exception:
+                    self.failed += 1
+                    if isinstance(method, EditMessageText):
+                        self.rendered.pop((chat_id, method.message_id), None)
+                    logger.exception("Failed to send message to chat %s", chat_id)
+        finally:
+            chat.worker = None
+            if not chat.queue and self.chats.get(chat_id) is chat:
+                del self.chats[chat_id]
+    
+    async def close(self, timeout=10.0):
+        self._closing = True
+        workers = []
+        for chat in self.chats.values():
+            chat.wakeup.set()
+            if chat.worker is not None:
+                workers.append(chat.worker)
+        if not workers:
+            return
+        done, pending = await asyncio.wait(workers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("Outbox closed with %s chats still pending", len(pending))
@@ -0,0 +1,298 @@
+# Рейтинг Эло по чату и типу игры.
+#
+# Рейтинги обновляются по мере окончания партий (GameManager.finish_game) и лежат
+# в памяти таблицами по (chat_id, game_type), как таблица лидеров по очкам;
+# изменения уходят в БД пакетами. recompute() пересчитывает все рейтинги по
+# журналу партий (match_log) векторно, на NumPy из requirements-dev.txt:
+#
+#   python -m minigames.rating games.db      # бот должен быть остановлен
+import asyncio
+import bisect
+import logging
+import os
+import sqlite3
+import sys
+import time
+from array import array
+from collections import OrderedDict
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from minigames.batching import BatchWriter
+from minigames.games.base import ABANDONED, BOT_PLAYER_ID, DRAW
+
+logger = logging.getLogger(__name__)
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS ratings (
+        chat_id INTEGER,
+        game_type TEXT,
+        user_id INTEGER,
+        rating REAL,
+        games INTEGER,
+        PRIMARY KEY (chat_id, game_type, user_id)
+    )
+'''
+
+
+def expected_score(rating, opponent):
+    return 1 / (1 + 10 ** ((opponent - rating) / 400))
+
+
+def first_player_score(result):
+    # Исход партии -> очки первого игрока: 1, 0.5 за ничью или 0
+    if result == DRAW:
+        return 0.5
+    return 1.0 if result == 0 else 0.0
+
+
+def rated(player1_id, player2_id, result):
+    # Брошенные партии и игры с ботом на рейтинг не влияют
+    return result != ABANDONED and BOT_PLAYER_ID not in (player1_id, player2_id)
+
+
+# Рейтинги одной игры в чате: игроки и список (-rating, user_id), отсортированный
+# по рейтингу (см. ChatBoard в minigames.leaderboard)
+class RatingBoard:
+    __slots__ = ('rows', 'order')
+    
+    def __init__(self):
+        # user_id -> [username, rating, games]
+        self.rows = {}
+        self.order = []
+    
+    def set_row(self, user_id, username, rating, games):
+        row = self.rows.get(user_id)
+        if row is not None:
+            del self.order[bisect.bisect_left(self.order, (-row[1], user_id))]
+        self.rows[user_id] = [username, rating, games]
+        bisect.insort(self.order, (-rating, user_id))
+    
+    def get(self, user_id):
+        row = self.rows.get(user_id)
+        return (INITIAL_RATING, 0) if row is None else (row[1], row[2])
+    
+    def rank(self, user_id):
+        row = self.rows.get(user_id)
+        if row is None:
+            return None
+        return bisect.bisect_left(self.order, (-row[1], user_id)) + 1
+    
+    def top(self, limit):
+        rows = self.rows
+        return [tuple(rows[user_id]) for _, user_id in self.order[:limit]]
+
+
+class Ratings(BatchWriter):
+    def __init__(self, storage, max_boards=1000, max_pending=500, flush_interval=1.0, k=K_FACTOR):
+        super().__init__(storage, max_pending, flush_interval)
+        self.max_boards = max_boards
+        self.k = k
+        self.boards = OrderedDict()
+        # Партии таблиц, которые еще загружаются: (chat_id, game_type) -> [партии по порядку]
+        self.queued = {}
+        self._loads = {}
+        # Незаписанные рейтинги: (chat_id, game_type, user_id) -> (rating, games, username)
+        self.pending = {}
+    
+    def record(self, game, result):
+        # Слушатель GameManager.finish_game
+        player1_id, player2_id = game.player_ids
+        if not rated(player1_id, player2_id, result):
+            return
+        key = (game.chat_id, game.type)
+        match = (player1_id, player2_id, game.names, first_player_score(result))
+        board = self.boards.get(key)
+        if board is not None:
+            # Активный чат не должен вытесняться раньше тех, где только смотрят /rating
+            self.boards.move_to_end(key)
+            self._apply(key, board, match)
+            return
+        # Эло зависит от порядка партий: копим их до загрузки таблицы
+        self.queued.setdefault(key, []).append(match)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Нет event loop - партии применятся при следующей загрузке
+            return
+        self._load(key)
+    
+    def _apply(self, key, board, match):
+        player1_id, player2_id, (name1, name2), score = match
+        rating1, games1 = board.get(player1_id)
+        rating2, games2 = board.get(player2_id)
+        delta = self.k * (score - expected_score(rating1, rating2))
+        chat_id, game_type = key
+        for user_id, username, rating, games in (
+            (player1_id, name1, rating1 + delta, games1 + 1),
+            (player2_id, name2, rating2 - delta, games2 + 1)
+        ):
+            board.set_row(user_id, username, rating, games)
+            self.pending[(chat_id, game_type, user_id)] = (rating, games, username)
+        self._queued(len(self.pending))
+    
+    def _load(self, key):
+        task = self._loads.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_board(key))
+            self._loads[key] = task
+            task.add_done_callback(lambda _: self._loads.pop(key, None))
+        return task
+    
+    async def _load_board(self, key):
+        # Еще не записанные значения (таблица могла быть вытеснена из кэша) берем до
+        # запроса: все, что записано раньше, запрос уже увидит (см. StatsWriter.flush)
+        pending = [(row_key[2], value) for row_key, value in self.pending.items() if row_key[:2] == key]
+        rows = await self.storage.fetchall(
+            '''SELECT r.user_id, COALESCE(u.username, ''), r.rating, r.games
+            FROM ratings r LEFT JOIN users u ON u.user_id = r.user_id AND u.chat_id = r.chat_id
+            WHERE r.chat_id = ? AND r.game_type = ?''',
+            key
+        )
+        board = RatingBoard()
+        for user_id, username, rating, games in rows:
+            board.set_row(user_id, username, rating, games)
+        for user_id, (rating, games, username) in pending:
+            board.set_row(user_id, username, rating, games)
+        for match in self.queued.pop(key, ()):
+            self._apply(key, board, match)
+        
+        self.boards[key] = board
+        while len(self.boards) > self.max_boards:
+            self.boards.popitem(last=False)
+        return board
+    
+    async def board(self, chat_id, game_type):
+        key = (chat_id, game_type)
+        board = self.boards.get(key)
+        if board is None:
+            return await self._load(key)
+        self.boards.move_to_end(key)
+        return board
+    
+    async def top(self, chat_id, game_type, limit=10):
+        # -> [(username, rating, games)] по убыванию рейтинга
+        return (await self.board(chat_id, game_type)).top(limit)
+    
+    @staticmethod
+    def write_batch(conn, batch):
+        with conn:
+            conn.executemany(
+                '''INSERT INTO ratings (chat_id, game_type, user_id, rating, games)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (chat_id, game_type, user_id) DO UPDATE SET
+                    rating = excluded.rating,
+                    games = excluded.games''',
+                [key + (rating, games) for key, (rating, games, _) in batch.items()]
+            )
+    
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        try:
+            await self.storage.run(self.write_batch, batch)
+        except Exception:
+            logger.exception("Ratings flush failed, %d rows requeued", len(batch))
+            # Более новые значения, появившиеся за время записи, не трогаем
+            for key, value in batch.items():
+                self.pending.setdefault(key, value)
+
+
+def recompute(matches, k=K_FACTOR):
+    # Полный пересчет по партиям в порядке их окончания.
+    # matches: (chat_id, game_type, player1_id, player2_id, result)
+    # -> {(chat_id, game_type, user_id): (rating, games)}
+    #
+    # Партии раскладываются по слоям: слой партии на 1 больше последнего слоя
+    # каждого из ее игроков. В одном слое у партий нет общих игроков, поэтому слой
+    # обновляется одной векторной операцией, а результат совпадает с
+    # последовательным применением Эло.
+    import numpy as np
+    
+    columns = list(zip(*matches)) or [()] * 5
+    chat_ids, game_types, player1_ids, player2_ids, results = columns
+    count = len(results)
+    type_codes = {}
+    type_ids = np.fromiter((type_codes.setdefault(t, len(type_codes)) for t in game_types), np.int64, count)
+    chat_ids = np.fromiter(chat_ids, np.int64, count)
+    player1_ids = np.fromiter(player1_ids, np.int64, count)
+    player2_ids = np.fromiter(player2_ids, np.int64, count)
+    results = np.fromiter(results, np.int64, count)
+    
+    keep = (results != ABANDONED) & (player1_ids != BOT_PLAYER_ID) & (player2_ids != BOT_PLAYER_ID)
+    chat_ids, type_ids, results = chat_ids[keep], type_ids[keep], results[keep]
+    count = len(results)
+    # Игрок рейтинга - тройка (chat_id, тип игры, user_id). Тройка упаковывается
+    # в одно число из номеров чата и пользователя: unique по int64 намного
+    # быстрее, чем по строкам двумерного массива
+    chats, chat_index = np.unique(chat_ids, return_inverse=True)
+    users, user_index = np.unique(np.concatenate((player1_ids[keep], player2_ids[keep])), return_inverse=True)
+    keys = np.tile(chat_index * len(type_codes) + type_ids, 2) * len(users) + user_index
+    players, inverse = np.unique(keys, return_inverse=True)
+    first, second = inverse[:count], inverse[count:]
+    scores = np.where(results == DRAW, 0.5, np.where(results == 0, 1.0, 0.0))
+    
+    # Слои - единственная последовательная часть
+    last_layer = [0] * len(players)
+    layers = array('q')
+    append = layers.append
+    for index1, index2 in zip(first.tolist(), second.tolist()):
+        layer = max(last_layer[index1], last_layer[index2]) + 1
+        last_layer[index1] = last_layer[index2] = layer
+        append(layer)
+    layers = np.frombuffer(layers, dtype=np.int64)
+    
+    ratings = np.full(len(players), INITIAL_RATING)
+    order = np.argsort(layers, kind='stable')
+    for chunk in np.split(order, np.flatnonzero(np.diff(layers[order])) + 1):
+        index1, index2 = first[chunk], second[chunk]
+        delta = k * (scores[chunk] - 1 / (1 + 10 ** ((ratings[index2] - ratings[index1]) / 400)))
+        ratings[index1] += delta
+        ratings[index2] -= delta
+    
+    games = np.bincount(inverse, minlength=len(players))
+    chat_type, user_index = np.divmod(players, len(users))
+    chat_index, type_ids = np.divmod(chat_type, len(type_codes))
+    type_names = list(type_codes)
+    return {
+        (chat_id, type_names[type_id], user_id): (rating, played)
+        for chat_id, type_id, user_id, rating, played in zip(
+            chats[chat_index].tolist(), type_ids.tolist(), users[user_index].tolist(),
+            ratings.tolist(), games.tolist()
+        )
+    }
+
+
+def rebuild(conn, k=K_FACTOR):
+    # Заменяет таблицу ratings пересчетом по match_log -> число игроков
+    matches = conn.execute(
+        'SELECT chat_id, game_type, player1_id, player2_id, result FROM match_log ORDER BY id'
+    )
+    ratings = recompute(matches, k)
+    with conn:
+        conn.execute('DELETE FROM ratings')
+        conn.executemany(
+            'INSERT INTO ratings (chat_id, game_type, user_id, rating, games) VALUES (?, ?, ?, ?, ?)',
+            [key + value for key, value in ratings.items()]
+        )
+    return len(ratings)
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("usage: python -m minigames.rating DB_PATH")
+        return
+    conn = sqlite3.connect(sys.argv[1])
+    conn.execute(SCHEMA)
+    started = time.perf_counter()
+    players = rebuild(conn)
+    print(f"recomputed {players} ratings in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
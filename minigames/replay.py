@@ -0,0 +1,94 @@
+# Повтор партий из журнала match_log через логику игр, без бота и сети.
+#
+#   python -m minigames.replay games.db                 # все партии, сверка исходов
+#   python -m minigames.replay games.db --game dice_battle
+#   python -m minigames.replay games.db --match 1234    # ход за ходом одной партии
+#
+# Каждая партия создается заново, ходы применяются методами состояния игры,
+# а полученный исход сравнивается с записанным.
+import argparse
+import os
+import sys
+import time
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from minigames.games import GAME_TYPES
+from minigames.games.base import ABANDONED, CHANCE, DRAW
+from minigames.match_log import iter_matches, open_log, pairs
+
+
+def replay(match):
+    # -> исход партии (слот победителя, DRAW) или None, если ходы партию не завершают
+    spec = GAME_TYPES[match.game_type]
+    game = spec.create_state(match.chat_id, match.player1_id, match.player2_id, "", "", **match.options)
+    return spec.replay(game, pairs(match.moves))
+
+
+def expected(match):
+    # Брошенная партия при повторе не должна завершаться
+    return None if match.result == ABANDONED else match.result
+
+
+def describe_result(result):
+    if result is None:
+        return "не завершена"
+    if result == DRAW:
+        return "ничья"
+    return f"победа игрока {result + 1}"
+
+
+def print_match(match):
+    print(f"#{match.id} {match.game_type} в чате {match.chat_id}: {match.player1_id} против {match.player2_id}")
+    print(f"длительность {match.finished_at - match.started_at:.1f} с, параметры {match.options or '-'}")
+    for number, (slot, value) in enumerate(pairs(match.moves), 1):
+        who = "случай" if slot == CHANCE else f"игрок {slot + 1}"
+        print(f"  {number:3}. {who}: {value}")
+    print(f"записано: {describe_result(expected(match))}, при повторе: {describe_result(replay(match))}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("db_path")
+    parser.add_argument("--game", help="только партии этого типа")
+    parser.add_argument("--match", type=int, help="показать одну партию по id")
+    parser.add_argument("--after", type=int, default=0, help="начать после этого id")
+    args = parser.parse_args()
+    
+    conn = open_log(args.db_path)
+    if args.match is not None:
+        for match in iter_matches(conn, match_id=args.match):
+            print_match(match)
+            return
+        print(f"Партия #{args.match} не найдена")
+        return
+    
+    # Модули игр загружаются лениво; импорт не должен попасть в замер
+    for spec in GAME_TYPES.values():
+        spec.module
+    
+    counts = {}
+    mismatches = []
+    started = time.perf_counter()
+    for match in iter_matches(conn, game_type=args.game, after_id=args.after):
+        counts[match.game_type] = counts.get(match.game_type, 0) + 1
+        try:
+            result = replay(match)
+        except Exception as exc:
+            result = exc
+        if result != expected(match):
+            mismatches.append((match.id, result))
+    elapsed = time.perf_counter() - started
+    
+    total = sum(counts.values())
+    print(f"replayed {total} matches in {elapsed:.2f} s ({total / elapsed if elapsed else 0:,.0f} matches/s)")
+    for game_type, count in sorted(counts.items()):
+        print(f"  {game_type}: {count}")
+    print(f"mismatches: {len(mismatches)}")
+    for match_id, result in mismatches[:20]:
+        print(f"  #{match_id}: {result!r}")
+
+
+if __name__ == "__main__":
+    main()
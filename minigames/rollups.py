@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Статистика по временным корзинам для таблиц лидеров за период.
+# Победы и поражения попадают в дневную корзину тем же пакетом, что и users/game_stats
+# (StatsWriter.write_batch). Дневные корзины старше DAY_RETENTION дней сливаются
+# в месячные, поэтому запрос за неделю или месяц читает не больше 30 дневных корзин
+# чата, а запрос за год - еще не больше 12 месячных, сколько бы лет истории в нем ни было.
+# Окно длиннее DAY_RETENTION всегда начинается с первого дня месяца, в который
+# попадает его начало: сжатые дни хранятся только помесячно. Так /top year
+# охватывает от 365 до 395 дней, и результат не меняется после сжатия.
+DAY = 86400
+DAILY, MONTHLY = 0, 1
+DAY_RETENTION = 35
+
+# Окна для /top: ключ -> (дней, название)
+WINDOWS = {
+    'day': (1, "за сегодня"),
+    'week': (7, "за неделю"),
+    'month': (30, "за месяц"),
+    'year': (365, "с начала месяца год назад"),
+}
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS stats_rollup (
+        chat_id INTEGER,
+        period INTEGER,
+        bucket INTEGER,
+        user_id INTEGER,
+        game_type TEXT,
+        wins INTEGER DEFAULT 0,
+        losses INTEGER DEFAULT 0,
+        PRIMARY KEY (chat_id, period, bucket, user_id, game_type)
+    )
+'''
+
+UPSERT = '''
+    INSERT INTO stats_rollup (chat_id, period, bucket, user_id, game_type, wins, losses)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (chat_id, period, bucket, user_id, game_type) DO UPDATE SET
+        wins = wins + excluded.wins,
+        losses = losses + excluded.losses
+'''
+
+
+def today(now=None):
+    # Номер дня UTC с начала эпохи - номер дневной корзины
+    return int((time.time() if now is None else now) // DAY)
+
+
+def month(day):
+    # Номер месячной корзины для дня day: год * 12 + месяц - 1, как в compact()
+    date = datetime.fromtimestamp(day * DAY, timezone.utc)
+    return date.year * 12 + date.month - 1
+
+
+def month_start(month):
+    # Первый день месячной корзины month
+    date = datetime(month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(date.timestamp()) // DAY
+
+
+def window_start(days, day):
+    # -> (since_day, since_month) для окна из days дней, заканчивающегося днем day.
+    # Месячные корзины читаются только окнами длиннее DAY_RETENTION; такое окно
+    # расширяется до начала месяца, иначе его длина зависела бы от того, какие дни
+    # уже сжаты
+    since_day = day - days + 1
+    if days <= DAY_RETENTION:
+        return since_day, None
+    since_month = month(since_day)
+    return month_start(since_month), since_month
+
+
+def add_rows(conn, day, game_rows):
+    # game_rows: (user_id, chat_id, game_type, wins, losses), как в StatsWriter.write_batch
+    conn.executemany(UPSERT, [
+        (chat_id, DAILY, day, user_id, game_type, wins, losses)
+        for user_id, chat_id, game_type, wins, losses in game_rows
+    ])
+
+
+def window_stats(conn, chat_id, since_day, game_type=None, since_month=None):
+    # -> [(user_id, username, wins, losses)] за дни начиная с since_day и,
+    # если задан since_month, за сжатые месяцы начиная с него (см. window_start)
+    # Диапазоны по первичному ключу (chat_id, period, bucket): читаются только корзины окна
+    ranges = [(DAILY, since_day)]
+    if since_month is not None:
+        ranges.append((MONTHLY, since_month))
+    parts = []
+    params = []
+    for period, since in ranges:
+        part = 'SELECT user_id, wins, losses FROM stats_rollup WHERE chat_id = ? AND period = ? AND bucket >= ?'
+        params += [chat_id, period, since]
+        if game_type is not None:
+            part += ' AND game_type = ?'
+            params.append(game_type)
+        parts.append(part)
+    sql = ' UNION ALL '.join(parts)
+    return conn.execute(
+        f'''SELECT w.user_id, COALESCE(u.username, ''), w.wins, w.losses
+        FROM (
+            SELECT user_id, SUM(wins) AS wins, SUM(losses) AS losses
+            FROM ({sql}) GROUP BY user_id
+        ) AS w
+        LEFT JOIN users u ON u.user_id = w.user_id AND u.chat_id = ?''',
+        params + [chat_id]
+    ).fetchall()
+
+
+def compact(conn, before_day):
+    # Сливает дневные корзины раньше before_day в месячные -> число слитых строк
+    with conn:
+        conn.execute(
+            '''INSERT INTO stats_rollup (chat_id, period, bucket, user_id, game_type, wins, losses)
+            SELECT chat_id, ?, month, user_id, game_type, SUM(wins), SUM(losses)
+            FROM (
+                SELECT *, CAST(strftime('%Y', bucket * 86400, 'unixepoch') AS INTEGER) * 12
+                    + CAST(strftime('%m', bucket * 86400, 'unixepoch') AS INTEGER) - 1 AS month
+                FROM stats_rollup WHERE period = ? AND bucket < ?
+            )
+            WHERE true
+            GROUP BY chat_id, month, user_id, game_type
+            ON CONFLICT (chat_id, period, bucket, user_id, game_type) DO UPDATE SET
+                wins = wins + excluded.wins,
+                losses = losses + excluded.losses''',
+            (MONTHLY, DAILY, before_day)
+        )
+        return conn.execute(
+            'DELETE FROM stats_rollup WHERE period = ? AND bucket < ?', (DAILY, before_day)
+        ).rowcount
+
+
+# Периодическое сжатие старых дневных корзин в потоке Storage
+class RollupCompactor:
+    def __init__(self, storage, interval=3600.0, retention=DAY_RETENTION):
+        self.storage = storage
+        self.interval = interval
+        self.retention = retention
+        self._task = None
+    
+    async def compact(self):
+        merged = await self.storage.run(compact, today() - self.retention)
+        if merged:
+            logger.info("🗜️ Compacted %d daily stats rows", merged)
+        return merged
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.compact()
+            except Exception:
+                logger.exception("Failed to compact stats rollups")
+            await asyncio.sleep(self.interval)
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
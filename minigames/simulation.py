@@ -0,0 +1,90 @@
+# Пакетная симуляция партий на NumPy: калибровка ботов и проверка честности
+# случайных чисел. Боту NumPy не нужен - модуль используется только из
+# benchmarks/bench_simulation.py и для ручных проверок (pip install -r requirements-dev.txt).
+import random
+
+import numpy as np
+
+from minigames.games.dice_battle import ROLLS_PER_PLAYER, SUM_DISTRIBUTION
+from minigames.games.number_guess import MAX_NUMBER, MIN_NUMBER
+
+
+def dice_battle(games, rng=None):
+    # -> (победы первого, ничьи, победы второго) в долях
+    rng = rng or np.random.default_rng()
+    rolls = rng.integers(1, 7, size=(games, 2, ROLLS_PER_PLAYER), dtype=np.int8)
+    totals = rolls.sum(axis=2, dtype=np.int16)
+    first, second = totals[:, 0], totals[:, 1]
+    return (
+        np.count_nonzero(first > second) / games,
+        np.count_nonzero(first == second) / games,
+        np.count_nonzero(first < second) / games
+    )
+
+
+def dice_battle_exact():
+    # Те же доли из точного распределения суммы (для сравнения с симуляцией)
+    win = draw = 0.0
+    for first, p_first in SUM_DISTRIBUTION.items():
+        for second, p_second in SUM_DISTRIBUTION.items():
+            if first > second:
+                win += p_first * p_second
+            elif first == second:
+                draw += p_first * p_second
+    return win, draw, 1 - win - draw
+
+
+def _guess(low, high, rate, rng):
+    # Векторный bot_guess: с вероятностью rate середина диапазона, иначе случайное число из него
+    middle = (low + high) // 2
+    if rate >= 1:
+        return middle
+    uniform = low + (rng.random(low.shape) * (high - low + 1)).astype(np.int64)
+    return np.where(rng.random(low.shape) < rate, middle, uniform)
+
+
+def number_guess(games, first_rate=1.0, second_rate=1.0, rng=None):
+    # Партии "Угадай число" между двумя стратегиями bot_guess.
+    # -> (доля побед первого игрока, среднее число ходов)
+    rng = rng or np.random.default_rng()
+    target = rng.integers(MIN_NUMBER, MAX_NUMBER + 1, size=games)
+    low = np.full(games, MIN_NUMBER, dtype=np.int64)
+    high = np.full(games, MAX_NUMBER, dtype=np.int64)
+    winner = np.full(games, -1, dtype=np.int8)
+    moves = np.zeros(games, dtype=np.int64)
+    active = np.arange(games)
+    
+    turn = 0
+    while active.size:
+        rate = first_rate if turn == 0 else second_rate
+        guess = _guess(low[active], high[active], rate, rng)
+        moves[active] += 1
+        hit = guess == target[active]
+        winner[active[hit]] = turn
+        
+        # Подсказка сужает диапазон для обоих игроков
+        below = guess < target[active]
+        low[active] = np.where(below, np.maximum(low[active], guess + 1), low[active])
+        high[active] = np.where(~below & ~hit, np.minimum(high[active], guess - 1), high[active])
+        
+        active = active[~hit]
+        turn ^= 1
+    
+    return np.count_nonzero(winner == 0) / games, moves.mean()
+
+
+def calibrate_number_guess(rates, games=200_000, rng=None):
+    # Доля побед бота (ходит вторым, как в одиночной игре) против игрока,
+    # который всегда делит диапазон пополам -> {rate: доля побед бота}
+    rng = rng or np.random.default_rng()
+    return {rate: 1 - number_guess(games, 1.0, rate, rng)[0] for rate in rates}
+
+
+def randint_fairness(samples=1_000_000, low=1, high=6, rng=random):
+    # Хи-квадрат для значений random.randint, которыми бот бросает кубики и
+    # загадывает числа. -> (статистика, число степеней свободы, частоты)
+    values = np.fromiter((rng.randint(low, high) for _ in range(samples)), dtype=np.int64, count=samples)
+    counts = np.bincount(values - low, minlength=high - low + 1)
+    expected = samples / (high - low + 1)
+    chi2 = float(((counts - expected) ** 2 / expected).sum())
+    return chi2, high - low, counts / samples
@@ -0,0 +1,186 @@
+import asyncio
+import gc
+import logging
+import pickle
+import time
+from contextlib import contextmanager
+
+from minigames.games import GAME_TYPES
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+
+# Сколько игр снимать за один шаг, не отдавая управление event loop
+CAPTURE_CHUNK = 2000
+
+
+def state_fields(cls):
+    # Все слоты класса состояния, начиная с базового Game
+    fields = []
+    for klass in reversed(cls.__mro__):
+        fields.extend(klass.__dict__.get('__slots__', ()))
+    return tuple(fields)
+
+
+@contextmanager
+def gc_paused():
+    # Сборщик мусора на десятках тысяч новых объектов съедает большую часть
+    # времени снимка и загрузки, а циклов здесь нет - выключаем его на это время
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _capture_chunk(game_ids, active_games, expiry, fields):
+    # Одна часть снимка -> pickle {game_type: [(game_id, remaining, values)]}
+    now = expiry.clock()
+    records = {}
+    for game_id in game_ids:
+        game = active_games.get(game_id)
+        if game is None:
+            # Игра закончилась, пока снимались предыдущие части
+            continue
+        game_type = game.type
+        if game_type not in records:
+            if game_type not in fields:
+                fields[game_type] = state_fields(type(game))
+            records[game_type] = []
+        deadline = expiry.deadline(game_id)
+        remaining = deadline - now if deadline is not None else 0.0
+        values = []
+        for field in fields[game_type]:
+            value = getattr(game, field)
+            values.append(value[:] if type(value) is list else value)
+        records[game_type].append((game_id, remaining, tuple(values)))
+    return pickle.dumps(records, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# Снимок живых игр: по каждому типу - список полей, и части по CAPTURE_CHUNK игр,
+# каждая уже сериализована. Между частями управление отдается event loop, так что
+# снимок десятков тысяч игр не останавливает обработку апдейтов, а записи части
+# живут только внутри шага и не попадают к сборщику мусора. Каждая игра
+# снимается целиком за один шаг; закончившиеся по ходу игры пропускаются.
+async def capture(active_games, expiry, chunk=CAPTURE_CHUNK):
+    snapshot = {'version': SNAPSHOT_VERSION, 'saved_at': time.time(), 'fields': {}, 'chunks': []}
+    # Только id игр: числа не отслеживаются сборщиком мусора, в отличие от пар items()
+    game_ids = list(active_games)
+    for start in range(0, len(game_ids), chunk):
+        if start:
+            await asyncio.sleep(0)
+        with gc_paused():
+            snapshot['chunks'].append(
+                _capture_chunk(game_ids[start:start + chunk], active_games, expiry, snapshot['fields'])
+            )
+    return snapshot
+
+
+def encode(snapshot):
+    return pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _records(snapshot):
+    # Версия 1 хранила записи одним словарем, без частей
+    if snapshot['version'] == 1:
+        yield snapshot['records']
+        return
+    for chunk in snapshot['chunks']:
+        yield pickle.loads(chunk)
+
+
+def decode(data):
+    # -> список (game_id, game, remaining)
+    snapshot = pickle.loads(data)
+    if snapshot.get('version') not in (1, SNAPSHOT_VERSION):
+        logger.warning("Unsupported game snapshot version %r, skipped", snapshot.get('version'))
+        return []
+    
+    classes = {}
+    for game_type, fields in snapshot['fields'].items():
+        spec = GAME_TYPES.get(game_type)
+        if spec is None:
+            logger.warning("Unknown game type %r in snapshot, its games dropped", game_type)
+            continue
+        cls = spec.module.create_state
+        if fields != state_fields(cls):
+            # Состояние игры поменялось между версиями - такие игры не восстанавливаем
+            logger.warning("Game state of %r changed, its games dropped", game_type)
+            continue
+        classes[game_type] = cls
+    
+    games = []
+    for records in _records(snapshot):
+        for game_type, type_records in records.items():
+            cls = classes.get(game_type)
+            if cls is None:
+                continue
+            fields = snapshot['fields'][game_type]
+            new = cls.__new__
+            for game_id, remaining, values in type_records:
+                game = new(cls)
+                for field, value in zip(fields, values):
+                    setattr(game, field, value)
+                games.append((game_id, game, remaining))
+    return games
+
+
+# Периодическое сохранение снимка в SQLite (одна строка game_snapshot)
+class GameSnapshotter:
+    def __init__(self, game_manager, storage, interval=60.0):
+        self.game_manager = game_manager
+        self.storage = storage
+        self.interval = interval
+        self._task = None
+    
+    async def save(self):
+        snapshot = await capture(self.game_manager.active_games, self.game_manager.expiry)
+        await self.storage.run(self._write, snapshot)
+    
+    @staticmethod
+    def _write(conn, snapshot):
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO game_snapshot (id, saved_at, data) VALUES (0, ?, ?)',
+                (snapshot['saved_at'], encode(snapshot))
+            )
+    
+    async def restore(self):
+        row = await self.storage.fetchone('SELECT data FROM game_snapshot WHERE id = 0')
+        if not row:
+            return 0
+        with gc_paused():
+            try:
+                games = decode(row[0])
+            except Exception:
+                logger.exception("Failed to read game snapshot")
+                return 0
+            for game_id, game, remaining in games:
+                self.game_manager.restore_game(game_id, game, remaining)
+        return len(games)
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save()
+            except Exception:
+                logger.exception("Failed to save game snapshot")
+    
+    async def stop(self):
+        # Остановка с финальным снимком
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.save()
@@ -0,0 +1,134 @@
+import logging
+
+from minigames import global_stats, rollups
+from minigames.batching import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+
+# Отложенная пакетная запись статистики.
+# update_stats только складывает дельты в память (слияние по user/chat/game_type),
+# а запись в БД идет одной транзакцией в потоке Storage по порогу размера или по таймеру.
+# Той же транзакцией пополняются дневные корзины stats_rollup (minigames.rollups)
+# и суммы по всем чатам global_stats (minigames.global_stats).
+# Новые игроки и смена имени (см. UserCache) тоже пишутся этим пакетом, до счетчиков.
+class StatsWriter(BatchWriter):
+    def __init__(self, storage, max_pending=500, flush_interval=1.0):
+        super().__init__(storage, max_pending, flush_interval)
+        # (user_id, chat_id) -> {game_type: [wins, losses]}
+        self.pending = {}
+        self.pending_count = 0
+        # (user_id, chat_id) -> username: строки users для создания или переименования
+        self.pending_users = {}
+        self.flushed_batches = 0
+    
+    def _delta(self, key, game_type):
+        games = self.pending.setdefault(key, {})
+        delta = games.get(game_type)
+        if delta is None:
+            delta = games[game_type] = [0, 0]
+            self.pending_count += 1
+        return delta
+    
+    def add(self, user_id, chat_id, game_type, won=True):
+        self._delta((user_id, chat_id), game_type)[0 if won else 1] += 1
+        self._queued(self.pending_count + len(self.pending_users))
+    
+    def add_user(self, user_id, chat_id, username):
+        self.pending_users[(user_id, chat_id)] = username
+        self._queued(self.pending_count + len(self.pending_users))
+    
+    def pending_chat_users(self, chat_id):
+        # {user_id: username} по незаписанным строкам users чата
+        return {
+            user_id: username
+            for (user_id, pending_chat_id), username in self.pending_users.items()
+            if pending_chat_id == chat_id
+        }
+    
+    def pending_user(self, user_id, chat_id):
+        wins = losses = 0
+        for game_wins, game_losses in self.pending.get((user_id, chat_id), {}).values():
+            wins += game_wins
+            losses += game_losses
+        return wins, losses
+    
+    def pending_games(self, user_id, chat_id):
+        return self.pending.get((user_id, chat_id), {})
+    
+    def pending_chat(self, chat_id):
+        # {user_id: (wins, losses)} по всем незаписанным результатам чата
+        totals = {}
+        for (user_id, pending_chat_id), games in self.pending.items():
+            if pending_chat_id == chat_id:
+                totals[user_id] = self.pending_user(user_id, chat_id)
+        return totals
+    
+    def take_batch(self):
+        batch, self.pending, self.pending_count = self.pending, {}, 0
+        return batch
+    
+    def restore_batch(self, batch):
+        # Не удалось записать - возвращаем дельты обратно в очередь
+        for key, games in batch.items():
+            for game_type, (wins, losses) in games.items():
+                delta = self._delta(key, game_type)
+                delta[0] += wins
+                delta[1] += losses
+    
+    @staticmethod
+    def write_batch(conn, batch, day=None, users=None):
+        # day - дневная корзина пакета, по умолчанию текущий день;
+        # users - {(user_id, chat_id): username} для создания или переименования
+        if day is None:
+            day = rollups.today()
+        user_rows = []
+        game_rows = []
+        for (user_id, chat_id), games in batch.items():
+            wins = losses = 0
+            for game_type, (game_wins, game_losses) in games.items():
+                wins += game_wins
+                losses += game_losses
+                game_rows.append((user_id, chat_id, game_type, game_wins, game_losses))
+            user_rows.append((wins, losses, wins - losses, user_id, chat_id))
+        
+        with conn:
+            if users:
+                conn.executemany(
+                    '''INSERT INTO users (user_id, chat_id, username) VALUES (?, ?, ?)
+                    ON CONFLICT (user_id, chat_id) DO UPDATE SET username = excluded.username''',
+                    [key + (username,) for key, username in users.items()]
+                )
+            conn.executemany(
+                'UPDATE users SET wins = wins + ?, losses = losses + ?, points = points + ? '
+                'WHERE user_id = ? AND chat_id = ?',
+                user_rows
+            )
+            conn.executemany(
+                '''INSERT INTO game_stats (user_id, chat_id, game_type, wins, losses)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, chat_id, game_type) DO UPDATE SET
+                    wins = wins + excluded.wins,
+                    losses = losses + excluded.losses''',
+                game_rows
+            )
+            global_stats.add_rows(conn, user_rows)
+            rollups.add_rows(conn, day, game_rows)
+    
+    async def flush(self):
+        if not self.pending and not self.pending_users:
+            return
+        # Пакет уходит в очередь Storage сразу после take_batch, поэтому чтения,
+        # поставленные после него, уже видят записанные данные
+        batch = self.take_batch()
+        users, self.pending_users = self.pending_users, {}
+        try:
+            await self.storage.run(self.write_batch, batch, None, users)
+        except Exception:
+            logger.exception("Stats flush failed, %d rows requeued", len(batch) + len(users))
+            self.restore_batch(batch)
+            # Имена, пришедшие за время записи, новее
+            for key, username in users.items():
+                self.pending_users.setdefault(key, username)
+            return
+        self.flushed_batches += 1
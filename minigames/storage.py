@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from minigames.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+STORAGE_SECONDS = registry.histogram('minigames_storage_seconds', 'SQLite operation time', 'op')
+
+
+def _set_result(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future, exc):
+    if not future.done():
+        future.set_exception(exc)
+
+
+# Асинхронный доступ к SQLite: единственное соединение живет в отдельном потоке,
+# запросы приходят через очередь и выполняются по порядку, а обработчики
+# aiogram только ждут future и не блокируют event loop.
+class Storage:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._worker, name="storage", daemon=True)
+        self._thread.start()
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        # WAL + synchronous=NORMAL: один fsync на чекпоинт вместо каждого коммита
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+    
+    def _worker(self):
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            func, args, future, loop = item
+            started = time.perf_counter()
+            try:
+                result = func(conn, *args)
+            except Exception as exc:
+                callback, value = _set_exception, exc
+            else:
+                callback, value = _set_result, result
+            STORAGE_SECONDS.observe(getattr(func, '__name__', 'other'), time.perf_counter() - started)
+            try:
+                loop.call_soon_threadsafe(callback, future, value)
+            except RuntimeError:
+                # Event loop уже закрыт - результат никому не нужен
+                pass
+        conn.close()
+    
+    def run(self, func, *args):
+        # func(conn, *args) выполняется в потоке БД
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((func, args, future, loop))
+        return future
+    
+    def fetchone(self, sql, params=()):
+        return self.run(_fetchone, sql, params)
+    
+    def fetchall(self, sql, params=()):
+        return self.run(_fetchall, sql, params)
+    
+    def execute(self, sql, params=()):
+        return self.run(_execute, sql, params)
+    
+    async def close(self):
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+
+
+def _fetchone(conn, sql, params):
+    return conn.execute(sql, params).fetchone()
+
+
+def _fetchall(conn, sql, params):
+    return conn.execute(sql, params).fetchall()
+
+
+def _execute(conn, sql, params):
+    with conn:
+        conn.execute(sql, params)
@@ -0,0 +1,42 @@
+from collections import OrderedDict
+
+
+# Известные строки users: (user_id, chat_id) -> username (LRU).
+# Попадание означает, что строка уже есть в БД или ждет записи в StatsWriter,
+# поэтому ни SELECT, ни INSERT для нее не нужен; промах или смена имени
+# ставят строку в пакет StatsWriter.
+class UserCache:
+    __slots__ = ('_users', 'max_size', 'hits', 'misses', 'renames')
+    
+    def __init__(self, max_size=50000):
+        self._users = OrderedDict()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.renames = 0
+    
+    def __len__(self):
+        return len(self._users)
+    
+    def check(self, user_id, chat_id, username):
+        # True, если строку нужно записать: игрок новый или сменил имя
+        key = (user_id, chat_id)
+        cached = self._users.get(key)
+        if cached is None:
+            self.misses += 1
+            self._users[key] = username
+            if len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+            return True
+        
+        self.hits += 1
+        self._users.move_to_end(key)
+        if cached != username:
+            self.renames += 1
+            self._users[key] = username
+            return True
+        return False
+    
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
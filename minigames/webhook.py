@@ -0,0 +1,112 @@
+import asyncio
+import hmac
+import json
+import logging
+import signal
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+# Прием апдейтов через webhook. Запрос проверяется по секретному токену,
+# апдейт уходит в диспетчер фоновой задачей, а Telegram сразу получает 200.
+# Одновременно обрабатывается не больше max_in_flight апдейтов: когда лимит
+# исчерпан, ответ задерживается до освобождения места, и Telegram сам
+# притормаживает отправку.
+class WebhookServer:
+    def __init__(self, dp, bot, path="/webhook", secret_token=None, max_in_flight=100):
+        self.dp = dp
+        self.bot = bot
+        self.path = path
+        self.secret_token = secret_token
+        self.max_in_flight = max_in_flight
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._tasks = set()
+        self._runner = None
+        self.received = 0
+        self.rejected = 0
+    
+    @property
+    def in_flight(self):
+        return len(self._tasks)
+    
+    def create_app(self):
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        return app
+    
+    def verify_secret(self, request):
+        if not self.secret_token:
+            return True
+        return hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), self.secret_token)
+    
+    async def handle(self, request):
+        if not self.verify_secret(request):
+            self.rejected += 1
+            return web.Response(status=401, text="Unauthorized")
+        
+        try:
+            update = json.loads(await request.read())
+        except ValueError:
+            self.rejected += 1
+            return web.Response(status=400, text="Bad Request")
+        
+        await self._slots.acquire()
+        self.received += 1
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response(status=200)
+    
+    async def _process(self, update):
+        try:
+            await self.dp.feed_raw_update(self.bot, update)
+        except Exception:
+            logger.exception("Failed to process webhook update")
+        finally:
+            self._slots.release()
+    
+    async def start(self, host, port):
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info("🌐 Webhook server listening on %s:%s%s", host, port, self.path)
+    
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        # Дожидаемся уже принятых апдейтов
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+async def run_webhook(dp, bot, host, port, path, url=None, secret_token=None, max_in_flight=100):
+    server = WebhookServer(dp, bot, path=path, secret_token=secret_token, max_in_flight=max_in_flight)
+    
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    
+    await dp.emit_startup(bot=bot, **dp.workflow_data)
+    await server.start(host, port)
+    try:
+        # Без публичного url вебхук у Telegram не регистрируем (например, для локальных нагрузочных тестов)
+        if url:
+            await bot.set_webhook(
+                url,
+                secret_token=secret_token,
+                allowed_updates=dp.resolve_used_update_types(),
+                max_connections=min(max_in_flight, 100)
+            )
+        await stop_event.wait()
+    finally:
+        await server.stop()
+        await dp.emit_shutdown(bot=bot, **dp.workflow_data)